@@ -7,14 +7,94 @@ Módulo para análisis de archivos DIAN y contables
 
 import pandas as pd
 import logging
+import numbers
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple
 import openpyxl
 import numpy as np
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 import re
 from itertools import combinations
-from difflib import SequenceMatcher
+
+from .matching_engine import (DocumentHashIndex, ValueWindowIndex, WILDCARD_BLOCK, block_compatibility_mask,
+                              build_match_frame, concat_match_frames, date_window_mask,
+                              document_tokens, folio_token_groups, greedy_one_to_one, normalize_nit,
+                              parse_amounts, value_tolerance_mask)
+from .similarity_index import CharNgramIndex, parallel_search
+from .excel_reader import read_excel_frame, read_excel_header, resolve_backend
+from .frame_cache import FrameCache
+from .cleaning_rules import CleaningPlan, load_cleaning_rules, rules_fingerprint
+from .column_roles import ColumnRoles
+from .layout_store import LayoutStore, layout_signature
+from .memory import StageMemoryTracker, compact_dtypes, frame_memory_bytes
+
+# Versión de las reglas de limpieza: incrementarla al cambiar la limpieza invalida la caché
+CLEANING_RULES_VERSION = '2'
+
+# Detección de la columna de documento contable: folios DIAN buscados y filas muestreadas
+# de cada columna
+DOCUMENT_PROBE_FOLIOS = 20
+DOCUMENT_PROBE_ROWS = 10000
+
+# Proyección del archivo contable: columnas posicionales (A-C y CX) y palabras clave con que
+# el cruce y los reportes buscan documento, valor, fecha, NIT y descripción
+CONTABLE_POSITIONAL_COLUMNS = [0, 1, 2, 90]
+CONTABLE_PROJECTION_KEYWORDS = [
+    'numero', 'documento', 'cruce', 'factura', 'comprobante', 'folio',
+    'valor', 'monto', 'importe', 'total', 'debito', 'credito',
+    'fecha', 'date', 'dia', 'mes', 'año', 'year', 'month', 'day',
+    'descripcion', 'descripción', 'concepto', 'detalle', 'observacion', 'nombre', 'razon', 'social',
+    'nit', 'identificacion', 'cedula', 'ruc', 'unnamed'
+]
+# Reglas de proyección tal como entran en la firma del layout y en la clave de caché contable
+# (el archivo contable se guarda en caché ya proyectado)
+CONTABLE_PROJECTION_RULES = [CONTABLE_PROJECTION_KEYWORDS, CONTABLE_POSITIONAL_COLUMNS]
+
+# Conjuntos de columnas distintos cuya clasificación de roles se conserva (LRU)
+COLUMN_ROLES_CACHE_SIZE = 16
+
+# Formatos aceptados para fechas en texto (las celdas con fecha de Excel llegan como datetime)
+DATE_INPUT_FORMATS = ('%d-%m-%Y', '%d-%m-%Y %H:%M:%S')
+
+# Columnas del DataFrame de discrepancias de valor del reporte de matching
+DISCREPANCY_COLUMNS = ['type', 'dian_idx', 'contable_idx', 'dian_value', 'contable_value', 'difference', 'match_score']
+
+# Estados de validación de una coincidencia, de mejor a peor
+MATCH_QUALITY_GRADES = ['Perfecta', 'Buena', 'Regular', 'Revisar']
+
+# Motivos de no coincidencia por ORIGEN: reglas en orden de prioridad (gana la primera que
+# se cumple) y motivo por defecto. Pruebas sobre 'column': 'blank' (texto vacío o 'nan',
+# recortado si 'strip'), 'not_amount' (no es un monto), 'above' / 'below' (monto mayor /
+# menor que 'limit'). Si falta alguna columna de las reglas se usa el motivo por defecto.
+NON_MATCH_REASON_RULES: Dict[str, Dict[str, Any]] = {
+    'DIAN': {
+        'default': 'Registro DIAN sin contraparte contable',
+        'rules': [
+            {'column': 'FOLIO DIAN', 'test': 'blank', 'strip': True, 'reason': 'Folio DIAN vacío o inválido'},
+            {'column': 'VALOR DIAN', 'test': 'not_amount', 'reason': 'Registro DIAN sin contraparte contable'},
+            {'column': 'VALOR DIAN', 'test': 'above', 'limit': 1000000000,
+             'reason': 'Valor DIAN extremadamente alto (posible error)'},
+            {'column': 'VALOR DIAN', 'test': 'below', 'limit': 0, 'reason': 'Valor DIAN negativo'},
+            {'column': 'FECHA DIAN', 'test': 'blank', 'strip': False, 'reason': 'Fecha DIAN vacía o inválida'},
+        ]
+    },
+    'CONTABLE': {
+        'default': 'Registro contable sin contraparte DIAN',
+        'rules': [
+            {'column': 'NÚMERO DOCUMENTO CRUCE', 'test': 'blank', 'strip': True,
+             'reason': 'Número de documento contable vacío o inválido'},
+            {'column': 'VALOR CONTABLE', 'test': 'not_amount', 'reason': 'Registro contable sin contraparte DIAN'},
+            {'column': 'VALOR CONTABLE', 'test': 'above', 'limit': 1000000000,
+             'reason': 'Valor contable extremadamente alto (posible error)'},
+            {'column': 'VALOR CONTABLE', 'test': 'below', 'limit': 0, 'reason': 'Valor contable negativo'},
+            {'column': 'FECHA CONTABLE', 'test': 'blank', 'strip': False, 'reason': 'Fecha contable vacía o inválida'},
+        ]
+    }
+}
 
 # Configurar logging
 logging.basicConfig(
@@ -36,6 +116,42 @@ class CausacionProcessor:
         self.contable_data: Optional[pd.DataFrame] = None
         self.dian_file_path: Optional[Path] = None
         self.contable_file_path: Optional[Path] = None
+        # Columna CX (índice 90 del archivo contable) resuelta al cargar
+        self.contable_cx_column: Optional[str] = None
+        # Backend de lectura de Excel: 'auto' (según tamaño), 'openpyxl', 'calamine' o 'pandas'
+        self.excel_backend = 'auto'
+        # Caché en disco de los DataFrames ya limpios (use_frame_cache=False la omite)
+        self.frame_cache = FrameCache()
+        self.use_frame_cache = True
+        # Layouts contables ya resueltos por firma de encabezados (use_layout_store=False los
+        # omite) y layout del archivo contable cargado
+        self.layout_store = LayoutStore()
+        self.use_layout_store = True
+        self.contable_layout: Optional[Dict[str, Any]] = None
+        # Reglas de limpieza por fuente (resources/cleaning_rules.json o el archivo indicado
+        # en CAUSACION_CLEANING_RULES) y reporte por regla de la última limpieza
+        self.cleaning_rules: Dict[str, Any] = load_cleaning_rules(os.environ.get('CAUSACION_CLEANING_RULES'))
+        self.cleaning_reports: Dict[str, List[Dict[str, Any]]] = {}
+        self._cleaning_plans: Dict[Tuple[str, str], CleaningPlan] = {}
+        # Tipos compactos al cargar (texto category/string[pyarrow], enteros reducidos)
+        self.compact_dtypes = False
+        # RSS máximo por etapa (ver memory_tracker.stage)
+        self.memory_tracker = StageMemoryTracker()
+        # Roles de columnas (valor, fecha, NIT...) de los últimos conjuntos de columnas (ver column_roles)
+        self._column_roles = lru_cache(maxsize=COLUMN_ROLES_CACHE_SIZE)(ColumnRoles)
+        # Última detección de la columna de documento contable por folios DIAN
+        # (columna, folios encontrados, folios buscados y confianza entre 0 y 1)
+        self.document_column_detection: Dict[str, Any] = {}
+        
+        # Configuración del cruce por similitud de texto
+        # (similarity_top_k=None compara contra todo el corpus, como búsqueda exacta)
+        self.similarity_threshold = 0.7
+        self.similarity_top_k: Optional[int] = 20
+        self.similarity_rerank = True
+        # Procesos para el cruce por similitud (1 = en serie, None = todos los núcleos)
+        self.similarity_workers: Optional[int] = 1
+        # Restringir los cruces por valor/fecha y similitud a registros del mismo NIT
+        self.nit_blocking = False
         
         self.logger.info("CausacionProcessor inicializado")
     
@@ -66,24 +182,38 @@ class CausacionProcessor:
             
             self.logger.info(f"Cargando archivo DIAN: {file_path}")
             
-            # Leer el archivo Excel
-            df = pd.read_excel(file_path)
-            
-            # Validar que el DataFrame no esté vacío
-            if df.empty:
-                raise ValueError("El archivo DIAN está vacío")
+            # Buscar el resultado limpio en caché (mismo contenido y misma versión de limpieza)
+            cache_key = self._frame_cache_key(file_path, 'dian')
+            cached = self.frame_cache.get(cache_key) if cache_key else None
             
-            # Limpiar datos básicos
-            df = self._clean_dataframe(df)
-            
-            # Aplicar limpieza específica para DIAN
-            df = self.clean_dian_data(df)
+            if cached is not None:
+                df, _ = cached
+                self.logger.info("Archivo DIAN limpio recuperado de la caché")
+            else:
+                # Leer el archivo Excel
+                df = self._read_excel(file_path)
+                
+                # Validar que el DataFrame no esté vacío
+                if df.empty:
+                    raise ValueError("El archivo DIAN está vacío")
+                
+                # Limpiar datos básicos
+                df = self._clean_dataframe(df)
+                
+                # Aplicar limpieza específica para DIAN
+                df = self.clean_dian_data(df)
+                
+                if cache_key:
+                    self.frame_cache.put(cache_key, df)
             
             # Validar calidad de datos
             quality_report = self.validate_data_quality(df, 'DIAN')
             if not quality_report['is_valid']:
                 self.logger.warning(f"Problemas de calidad en archivo DIAN: Score {quality_report['overall_score']:.1f}")
             
+            if self.compact_dtypes:
+                df = self._compact_frame(df, 'DIAN')
+            
             # Guardar referencia
             self.dian_data = df
             self.dian_file_path = file_path
@@ -126,31 +256,30 @@ class CausacionProcessor:
             
             self.logger.info(f"Cargando archivo contable: {file_path}")
             
-            # Leer el archivo Excel saltando las primeras 4 filas de metadatos
-            # Los encabezados están en la fila 5 (índice 4)
-            try:
-                df = pd.read_excel(file_path, header=4)
-                self.logger.info("Archivo contable leído con header=4 (saltando 4 filas de metadatos)")
-            except Exception as e:
-                self.logger.warning(f"Error al leer con header=4, intentando con header=0: {e}")
-                # Fallback: leer normalmente y eliminar filas después
-                df = pd.read_excel(file_path)
+            # Buscar el resultado limpio en caché (mismo contenido y misma versión de limpieza)
+            cache_key = self._frame_cache_key(file_path, 'contable')
+            cached = self.frame_cache.get(cache_key) if cache_key else None
             
-            # Validar que el DataFrame no esté vacío
-            if df.empty:
-                raise ValueError("El archivo contable está vacío")
-            
-            # Limpiar datos básicos
-            df = self._clean_dataframe(df)
-            
-            # Aplicar limpieza específica para contable
-            df = self.clean_contable_data(df)
+            if cached is not None:
+                df, metadata = cached
+                self.contable_cx_column = metadata.get('cx_column')
+                self.contable_layout = self._stored_layout(metadata.get('layout_signature'))
+                self.logger.info("Archivo contable limpio recuperado de la caché")
+            else:
+                df = self._read_contable_excel(file_path)
+                if cache_key:
+                    layout_key = self.contable_layout.get('signature') if self.contable_layout else None
+                    self.frame_cache.put(cache_key, df, {'cx_column': self.contable_cx_column,
+                                                         'layout_signature': layout_key})
             
             # Validar calidad de datos
             quality_report = self.validate_data_quality(df, 'contable')
             if not quality_report['is_valid']:
                 self.logger.warning(f"Problemas de calidad en archivo contable: Score {quality_report['overall_score']:.1f}")
             
+            if self.compact_dtypes:
+                df = self._compact_frame(df, 'contable')
+            
             # Guardar referencia
             self.contable_data = df
             self.contable_file_path = file_path
@@ -166,6 +295,304 @@ class CausacionProcessor:
             self.logger.error(f"Error al cargar archivo contable: {e}")
             raise Exception(f"Error al cargar archivo contable: {e}")
     
+    def load_files_concurrently(self, dian_file: str | Path, contable_file: str | Path,
+                                progress_callback: Optional[Callable[[str], None]] = None
+                                ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Cargar los archivos DIAN y contable al mismo tiempo (lectura, limpieza y validación)
+        
+        Cada archivo se carga en su propio proceso; si no se pueden crear procesos se usan
+        hilos. El resultado y el estado del procesador quedan igual que al llamar
+        load_dian_file y load_contable_file en secuencia; los errores de la carga de un
+        archivo (p. ej. archivo inexistente o bloqueado) se propagan sin reintentar. El RSS
+        de cada carga se mide donde se ejecuta y se agrega a memory_tracker ('Carga DIAN',
+        'Carga contable').
+        
+        Args:
+            dian_file: Ruta del archivo DIAN
+            contable_file: Ruta del archivo contable
+            progress_callback: Función opcional que recibe los mensajes de progreso por archivo
+            
+        Returns:
+            Tuple con (DataFrame DIAN, DataFrame contable)
+        """
+        jobs = {'dian': Path(dian_file), 'contable': Path(contable_file)}
+        labels = {'dian': 'DIAN', 'contable': 'contable'}
+        settings = {
+            'excel_backend': self.excel_backend,
+            'frame_cache': self.frame_cache,
+            'use_frame_cache': self.use_frame_cache,
+            'layout_store': self.layout_store,
+            'use_layout_store': self.use_layout_store,
+            'cleaning_rules': self.cleaning_rules,
+            'compact_dtypes': self.compact_dtypes
+        }
+        notify = progress_callback or (lambda message: None)
+        
+        def submit_jobs(executor) -> Dict[Any, str]:
+            return {executor.submit(_load_file_worker, kind, file_path, settings): kind
+                    for kind, file_path in jobs.items()}
+        
+        def collect(futures: Dict[Any, str]) -> Dict[str, Tuple[pd.DataFrame, Dict[str, Any]]]:
+            # Informar cada archivo en cuanto termina; los errores de la carga se propagan
+            results = {}
+            for future in as_completed(futures):
+                kind = futures[future]
+                results[kind] = future.result()
+                notify(f"Archivo {labels[kind]} cargado: {len(results[kind][0])} registros")
+            return results
+        
+        for kind in jobs:
+            notify(f"Cargando archivo {labels[kind]}...")
+        
+        results = None
+        # Con un solo núcleo los procesos no aportan y solo suman el costo de crearlos
+        if (os.cpu_count() or 1) >= 2:
+            executor = None
+            try:
+                executor = ProcessPoolExecutor(max_workers=len(jobs))
+                futures = submit_jobs(executor)
+            except (OSError, NotImplementedError) as e:
+                # Solo fallas al crear el pool; las de la carga de cada archivo no se capturan aquí
+                self.logger.warning(f"No se pudieron crear procesos para la carga, se usan hilos: {e}")
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+            else:
+                with executor:
+                    try:
+                        results = collect(futures)
+                    except BrokenProcessPool as e:
+                        self.logger.warning(f"Un proceso de carga terminó de forma inesperada, se usan hilos: {e}")
+        
+        if results is None:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                results = collect(submit_jobs(executor))
+        
+        dian_df, dian_state = results['dian']
+        contable_df, contable_state = results['contable']
+        
+        # Guardar referencias como en las cargas individuales
+        self.dian_data = dian_df
+        self.dian_file_path = jobs['dian']
+        self.contable_data = contable_df
+        self.contable_file_path = jobs['contable']
+        self.contable_cx_column = contable_state.get('contable_cx_column')
+        self.contable_layout = contable_state.get('contable_layout')
+        self.cleaning_reports.update(dian_state.get('cleaning_reports', {}))
+        self.cleaning_reports.update(contable_state.get('cleaning_reports', {}))
+        # RSS medido dentro de cada carga (en su proceso, o en este si se usaron hilos)
+        self.memory_tracker.stages.extend(dian_state.get('memory_stages', []))
+        self.memory_tracker.stages.extend(contable_state.get('memory_stages', []))
+        
+        return dian_df, contable_df
+    
+    def _compact_frame(self, df: pd.DataFrame, source: str) -> pd.DataFrame:
+        """
+        Convertir un DataFrame cargado a tipos de datos compactos
+        
+        Args:
+            df: DataFrame limpio
+            source: Fuente de datos ('DIAN' o 'contable')
+            
+        Returns:
+            DataFrame con los mismos valores y menos memoria
+        """
+        before = frame_memory_bytes(df)
+        df = compact_dtypes(df)
+        after = frame_memory_bytes(df)
+        self.logger.info(f"Tipos compactos {source}: {before / 2**20:.2f} MB -> {after / 2**20:.2f} MB")
+        return df
+    
+    def _read_contable_excel(self, file_path: Path) -> pd.DataFrame:
+        """
+        Leer y limpiar el archivo contable (sin caché)
+        
+        Args:
+            file_path: Ruta del archivo contable
+            
+        Returns:
+            DataFrame contable limpio (actualiza self.contable_cx_column)
+        """
+        # Leer solo las columnas necesarias; si falla, se lee el archivo completo
+        df = None
+        cx_position = 90
+        layout = None
+        if file_path.suffix.lower() == '.xlsx':
+            try:
+                header_columns = read_excel_header(file_path, header=4)
+                # Con la misma fila de encabezados se reutiliza el layout resuelto antes
+                layout = self._contable_layout(header_columns)
+                if 'positions' in layout:
+                    positions = layout['positions']
+                else:
+                    positions = self._resolve_contable_projection(header_columns)
+                    layout['positions'] = positions
+                if positions is not None:
+                    df = self._read_excel(file_path, 4, positions, [header_columns[i] for i in positions])
+                    cx_position = positions.index(90) if 90 in positions else None
+                    self.logger.info(f"Archivo contable leído con header=4 proyectando {len(positions)} de {len(header_columns)} columnas")
+            except Exception as e:
+                self.logger.warning(f"No se pudo leer el archivo contable por columnas, se lee completo: {e}")
+                df = None
+                cx_position = 90
+                layout = None
+        
+        if df is None:
+            # Leer el archivo Excel saltando las primeras 4 filas de metadatos
+            # Los encabezados están en la fila 5 (índice 4)
+            try:
+                df = self._read_excel(file_path, header=4)
+                self.logger.info("Archivo contable leído con header=4 (saltando 4 filas de metadatos)")
+            except Exception as e:
+                self.logger.warning(f"Error al leer con header=4, intentando con header=0: {e}")
+                # Fallback: leer normalmente y eliminar filas después
+                df = pd.read_excel(file_path)
+        
+        # Validar que el DataFrame no esté vacío
+        if df.empty:
+            raise ValueError("El archivo contable está vacío")
+        
+        # Limpiar datos básicos
+        df = self._clean_dataframe(df)
+        
+        # Aplicar limpieza específica para contable
+        df = self.clean_contable_data(df, layout)
+        
+        # La limpieza conserva el orden de las columnas (solo renombra y agrega al final)
+        if cx_position is not None and len(df.columns) > cx_position:
+            self.contable_cx_column = df.columns[cx_position]
+        else:
+            self.contable_cx_column = None
+        
+        # Columnas limpias del layout: si cambian, la columna de documento guardada ya no aplica
+        if layout is not None:
+            if layout.get('columns') != list(df.columns):
+                layout['columns'] = list(df.columns)
+                layout.pop('document_column', None)
+            self._save_layout(layout)
+        self.contable_layout = layout
+        
+        return df
+    
+    def _contable_layout(self, header_columns: List[str]) -> Dict[str, Any]:
+        """
+        Obtener el layout guardado para una fila de encabezados contable
+        
+        Args:
+            header_columns: Nombres de columna de la fila de encabezados (header=4)
+            
+        Returns:
+            Layout guardado con la misma firma, o un layout nuevo a completar durante la carga
+        """
+        version = f'{CLEANING_RULES_VERSION}-{rules_fingerprint(self.cleaning_rules)}'
+        signature = layout_signature('contable', header_columns, version, CONTABLE_PROJECTION_RULES)
+        
+        layout = self._stored_layout(signature)
+        if layout is not None:
+            self.logger.info("Layout contable reconocido por su fila de encabezados, se reutiliza")
+            return layout
+        
+        self.logger.info("Layout contable nuevo, se detecta a partir del contenido")
+        return {'signature': signature, 'source': 'contable', 'header_row': 4}
+    
+    def _stored_layout(self, signature: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Leer un layout guardado (None si no existe o el almacén está deshabilitado)"""
+        if not (signature and self.use_layout_store):
+            return None
+        return self.layout_store.get(signature)
+    
+    def _save_layout(self, layout: Dict[str, Any]):
+        """Guardar un layout solo si cambió respecto al guardado"""
+        if self.use_layout_store and self.layout_store.get(layout['signature']) != layout:
+            self.layout_store.put(layout['signature'], layout)
+    
+    def _frame_cache_key(self, file_path: Path, namespace: str) -> Optional[str]:
+        """
+        Clave de caché del archivo limpio (None si la caché está deshabilitada)
+        
+        Args:
+            file_path: Ruta del archivo de entrada
+            namespace: Tipo de archivo ('dian' o 'contable')
+            
+        Returns:
+            Clave basada en el contenido del archivo y la versión de limpieza (para el
+            archivo contable, también en las reglas de proyección)
+        """
+        if not (self.use_frame_cache and self.frame_cache.enabled):
+            return None
+        
+        try:
+            version = f'{CLEANING_RULES_VERSION}-{rules_fingerprint(self.cleaning_rules)}'
+            if namespace == 'contable':
+                version += f"-{rules_fingerprint({'projection': CONTABLE_PROJECTION_RULES})}"
+            return self.frame_cache.make_key(file_path, namespace, version)
+        except OSError as e:
+            self.logger.warning(f"No se pudo calcular la clave de caché: {e}")
+            return None
+    
+    def _read_excel(self, file_path: Path, header: int = 0, positions: Optional[List[int]] = None,
+                    names: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Leer la primera hoja con el backend configurado (self.excel_backend)
+        
+        Si el backend rápido falla, se repite la lectura con el lector por defecto de pandas.
+        
+        Args:
+            file_path: Ruta del archivo Excel
+            header: Fila (base 0) de los encabezados
+            positions: Posiciones de las columnas a leer (None = todas)
+            names: Nombres de las columnas proyectadas
+            
+        Returns:
+            DataFrame con los datos de la hoja
+        """
+        backend = resolve_backend(file_path, self.excel_backend)
+        
+        if backend != 'pandas':
+            try:
+                start_time = datetime.now()
+                df = read_excel_frame(file_path, header, positions, names, backend=backend)
+                elapsed = (datetime.now() - start_time).total_seconds()
+                self.logger.info(f"Archivo leído con backend '{backend}' en {elapsed:.2f} s")
+                return df
+            except Exception as e:
+                self.logger.warning(f"Error al leer con backend '{backend}', se usa el lector de pandas: {e}")
+        
+        return read_excel_frame(file_path, header, positions, names, backend='pandas')
+    
+    def _resolve_contable_projection(self, columns: List[str]) -> Optional[List[int]]:
+        """
+        Resolver desde la fila de encabezados las columnas contables que se usan
+        
+        Se conservan las columnas posicionales (CONTABLE_POSITIONAL_COLUMNS) y todas las
+        columnas cuyo nombre contiene alguna palabra clave de CONTABLE_PROJECTION_KEYWORDS,
+        de modo que el resultado es el mismo que con el archivo completo.
+        
+        Args:
+            columns: Nombres de columna de la fila de encabezados
+            
+        Returns:
+            Lista ordenada de posiciones a leer, o None si se requiere el archivo completo
+        """
+        import unicodedata
+        
+        # Sin columna de cruce, la columna de documento se detecta por contenido de todas las columnas
+        if not any('cruce' in col.lower() for col in columns):
+            self.logger.info("No se encontró columna de documento cruce, se lee el archivo contable completo")
+            return None
+        
+        positions = []
+        for position, col in enumerate(columns):
+            col_lower = col.lower()
+            # Nombre sin tildes (así se busca "NÚMERO DE DOCUMENTO CRUCE" en los reportes)
+            col_plain = ''.join(c for c in unicodedata.normalize('NFD', col_lower) if unicodedata.category(c) != 'Mn')
+            if (position in CONTABLE_POSITIONAL_COLUMNS or
+                    any(keyword in col_lower for keyword in CONTABLE_PROJECTION_KEYWORDS) or
+                    ('numero' in col_plain and 'documento' in col_plain)):
+                positions.append(position)
+        
+        return positions
+    
     def validate_files(self) -> Tuple[bool, List[str]]:
         """
         Validar que los archivos existen y son válidos
@@ -231,149 +658,22 @@ class CausacionProcessor:
             DataFrame con datos DIAN limpios y procesados
         """
         self.logger.info("Iniciando limpieza de datos DIAN")
+        self.cleaning_reports['dian'] = []
         
         try:
             # Crear copia para no modificar el original
             clean_df = df_dian.copy()
             
-            # 1. Limpiar espacios en blanco de todas las columnas de texto
-            self.logger.info("Limpiando espacios en blanco...")
-            for col in clean_df.select_dtypes(include=['object']).columns:
-                clean_df[col] = clean_df[col].astype(str).str.strip()
-            
-            # 1.5. Filtrar registros no deseados según criterios específicos
+            # 1-3. Reglas de limpieza configurables: espacios en blanco, filtro de registros no
+            # deseados (application response, nómina), Folio como texto y formato de fechas
             filas_antes_filtro = len(clean_df)
-            
-            # Filtrar por columna A (Tipo de documento) - excluir "application response" y nómina
-            if len(clean_df.columns) > 0:
-                columna_a = clean_df.columns[0]  # Primera columna (columna A)
-                # Convertir a string y mayúsculas para comparación
-                clean_df[columna_a] = clean_df[columna_a].astype(str).str.strip().str.upper()
-                
-                # Filtrar registros que contengan "application response" o referencias a nómina
-                mask_tipo_doc = (
-                    ~clean_df[columna_a].str.contains('APPLICATION RESPONSE', case=False, na=False) &
-                    ~clean_df[columna_a].str.contains('NOMINA', case=False, na=False) &
-                    ~clean_df[columna_a].str.contains('NÓMINA', case=False, na=False) &
-                    ~clean_df[columna_a].str.contains('NOMINA', case=False, na=False)
-                )
-                clean_df = clean_df[mask_tipo_doc].copy()
-                
-                filas_despues_tipo = len(clean_df)
-                filtrados_tipo = filas_antes_filtro - filas_despues_tipo
-                if filtrados_tipo > 0:
-                    self.logger.info(f"Filtrados {filtrados_tipo} registros por tipo de documento (application response/nómina)")
-            
-            # Filtrar por columna K (Nombre Emisor) - excluir "MERIDIAN CONSULTING LTDA" 
-            # SOLO si también es "Application response" o "Nómina" (no excluir facturas válidas)
-            if len(clean_df.columns) > 10:
-                columna_k = clean_df.columns[10]  # Columna K (índice 10)
-                columna_a = clean_df.columns[0] if len(clean_df.columns) > 0 else None
-                # Convertir a string y mayúsculas para comparación
-                clean_df[columna_k] = clean_df[columna_k].astype(str).str.strip().str.upper()
-                
-                # Filtrar registros donde el nombre emisor sea "MERIDIAN CONSULTING LTDA" 
-                # Y además sea "Application response" o "Nómina"
-                filas_antes_emisor = len(clean_df)
-                
-                # Identificar registros MERIDIAN
-                es_meridian = clean_df[columna_k].str.contains('MERIDIAN CONSULTING LTDA', case=False, na=False)
-                
-                # De los registros MERIDIAN, solo excluir los que también sean Application response o Nómina
-                if columna_a:
-                    es_application_o_nomina = (
-                        clean_df[columna_a].str.contains('APPLICATION RESPONSE', case=False, na=False) |
-                        clean_df[columna_a].str.contains('NOMINA', case=False, na=False) |
-                        clean_df[columna_a].str.contains('NÓMINA', case=False, na=False)
-                    )
-                    # Excluir solo MERIDIAN que también sea Application/Nómina
-                    mask_nombre_emisor = ~(es_meridian & es_application_o_nomina)
-                else:
-                    # Si no hay columna A, mantener el filtro original (excluir todos los MERIDIAN)
-                    mask_nombre_emisor = ~es_meridian
-                
-                clean_df = clean_df[mask_nombre_emisor].copy()
-                
-                filas_despues_emisor = len(clean_df)
-                filtrados_emisor = filas_antes_emisor - filas_despues_emisor
-                if filtrados_emisor > 0:
-                    self.logger.info(f"Filtrados {filtrados_emisor} registros MERIDIAN CONSULTING que también son Application response/Nómina")
-                    # Contar cuántos MERIDIAN válidos se mantienen
-                    meridian_validos = (clean_df[columna_k].str.contains('MERIDIAN CONSULTING LTDA', case=False, na=False).sum() 
-                                      if columna_k in clean_df.columns else 0)
-                    if meridian_validos > 0:
-                        self.logger.info(f"Mantenidos {meridian_validos} registros MERIDIAN CONSULTING válidos (facturas electrónicas, etc.)")
-            
-            # También buscar por nombre de columna si existe (más robusto)
-            # Buscar columna "Tipo de documento" o similar
-            tipo_doc_cols = [col for col in clean_df.columns 
-                           if any(keyword in col.lower() for keyword in ['tipo', 'documento', 'type', 'doc'])]
-            if tipo_doc_cols:
-                for col in tipo_doc_cols:
-                    if col in clean_df.columns:
-                        clean_df[col] = clean_df[col].astype(str).str.strip().str.upper()
-                        mask = (
-                            ~clean_df[col].str.contains('APPLICATION RESPONSE', case=False, na=False) &
-                            ~clean_df[col].str.contains('NOMINA', case=False, na=False) &
-                            ~clean_df[col].str.contains('NÓMINA', case=False, na=False)
-                        )
-                        filas_antes = len(clean_df)
-                        clean_df = clean_df[mask].copy()
-                        filtrados = filas_antes - len(clean_df)
-                        if filtrados > 0:
-                            self.logger.info(f"Filtrados {filtrados} registros adicionales por columna '{col}'")
-            
-            # Buscar columna "Nombre Emisor" o similar
-            nombre_emisor_cols = [col for col in clean_df.columns 
-                                if any(keyword in col.lower() for keyword in ['nombre', 'emisor', 'name', 'issuer', 'remitente'])]
-            if nombre_emisor_cols:
-                for col in nombre_emisor_cols:
-                    if col in clean_df.columns:
-                        clean_df[col] = clean_df[col].astype(str).str.strip().str.upper()
-                        # Aplicar misma lógica: solo excluir MERIDIAN que también sea Application/Nómina
-                        es_meridian = clean_df[col].str.contains('MERIDIAN CONSULTING LTDA', case=False, na=False)
-                        # Buscar columna de tipo de documento si existe
-                        tipo_doc_col = None
-                        for tipo_col in tipo_doc_cols:
-                            if tipo_col in clean_df.columns:
-                                tipo_doc_col = tipo_col
-                                break
-                        
-                        if tipo_doc_col:
-                            es_application_o_nomina = (
-                                clean_df[tipo_doc_col].str.contains('APPLICATION RESPONSE', case=False, na=False) |
-                                clean_df[tipo_doc_col].str.contains('NOMINA', case=False, na=False) |
-                                clean_df[tipo_doc_col].str.contains('NÓMINA', case=False, na=False)
-                            )
-                            mask = ~(es_meridian & es_application_o_nomina)
-                        else:
-                            mask = ~es_meridian
-                        
-                        filas_antes = len(clean_df)
-                        clean_df = clean_df[mask].copy()
-                        filtrados = filas_antes - len(clean_df)
-                        if filtrados > 0:
-                            self.logger.info(f"Filtrados {filtrados} registros adicionales por columna '{col}' (Nombre Emisor - MERIDIAN con Application/Nómina)")
+            clean_df = self._apply_cleaning_rules(clean_df, 'dian')
             
             filas_despues_filtro = len(clean_df)
             total_filtrados = filas_antes_filtro - filas_despues_filtro
             if total_filtrados > 0:
                 self.logger.info(f"Total de registros filtrados: {total_filtrados}, registros restantes: {filas_despues_filtro}")
             
-            # 2. Convertir 'Folio' a string (asumiendo que existe la columna)
-            folio_columns = [col for col in clean_df.columns if 'folio' in col.lower()]
-            for col in folio_columns:
-                self.logger.info(f"Convirtiendo columna '{col}' a string...")
-                clean_df[col] = clean_df[col].astype(str).str.strip()
-            
-            # 3. Formatear fechas (buscar columnas que contengan 'fecha' o 'date')
-            date_columns = [col for col in clean_df.columns 
-                          if any(keyword in col.lower() for keyword in ['fecha', 'date', 'dia', 'mes', 'año'])]
-            
-            for col in date_columns:
-                self.logger.info(f"Procesando columna de fecha: {col}")
-                clean_df[col] = self._format_date_column(clean_df[col])
-            
             # 4. Validar campos críticos
             critical_fields = self._identify_critical_fields(clean_df)
             validation_result = self._validate_critical_fields(clean_df, critical_fields)
@@ -400,35 +700,36 @@ class CausacionProcessor:
             self.logger.error(f"Error en limpieza de datos DIAN: {e}")
             raise Exception(f"Error en limpieza de datos DIAN: {e}")
     
-    def clean_contable_data(self, df_contable: pd.DataFrame) -> pd.DataFrame:
+    def clean_contable_data(self, df_contable: pd.DataFrame,
+                            layout: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
         """
         Limpiar y procesar datos del archivo contable
         
         Args:
             df_contable: DataFrame con datos contables sin procesar
+            layout: Layout del archivo (ver _contable_layout); se reutiliza y completa su
+                mapeo de columnas sin nombre
             
         Returns:
             DataFrame con datos contables limpios y procesados
         """
         self.logger.info("Iniciando limpieza de datos contables")
+        self.cleaning_reports['contable'] = []
         
         try:
             # Crear copia para no modificar el original
             clean_df = df_contable.copy()
             
             # Nota: Si el archivo se leyó con header=4, ya no es necesario eliminar filas de metadatos
-            # Solo verificar si aún hay filas de metadatos al inicio (primera fila con valores no válidos)
-            if len(clean_df) > 0:
-                # Verificar si la primera fila parece ser metadatos (contiene texto de encabezado o está vacía)
-                first_row_values = clean_df.iloc[0].astype(str).str.lower().tolist()
-                metadata_keywords = ['meridian', 'modelo', 'importacion', 'movimiento', 'contable']
-                if any(any(kw in str(val) for kw in metadata_keywords) for val in first_row_values[:3]):
-                    self.logger.info("Eliminando primera fila de metadatos restante...")
-                    clean_df = clean_df.iloc[1:].reset_index(drop=True)
+            # Las reglas de la etapa 'raw' eliminan la primera fila si aún parece de metadatos
+            filas_antes = len(clean_df)
+            clean_df = self._apply_cleaning_rules(clean_df, 'contable', stage='raw')
+            if len(clean_df) != filas_antes:
+                clean_df = clean_df.reset_index(drop=True)
             
             # 2. Mapear columnas 'Unnamed' a nombres descriptivos (solo si es necesario)
             self.logger.info("Mapeando columnas sin nombre...")
-            clean_df = self._map_unnamed_columns(clean_df)
+            clean_df = self._map_unnamed_columns(clean_df, layout)
             
             # 3. Combinar Año/Mes/Día en fecha única
             clean_df = self._combine_date_columns(clean_df)
@@ -436,37 +737,14 @@ class CausacionProcessor:
             # 4. Limpiar datos numéricos
             clean_df = self._clean_numeric_data(clean_df)
             
-            # 5. Limpiar espacios en blanco
-            for col in clean_df.select_dtypes(include=['object']).columns:
-                try:
-                    # Verificar si la columna existe y es una Serie
-                    if col in clean_df.columns and isinstance(clean_df[col], pd.Series):
-                        clean_df[col] = clean_df[col].astype(str).str.strip()
-                    else:
-                        # Si hay columnas duplicadas, manejar cada una individualmente
-                        if col in clean_df.columns:
-                            clean_df[col] = clean_df[col].apply(lambda x: str(x).strip() if pd.notna(x) else x)
-                except Exception as e:
-                    self.logger.warning(f"No se pudo limpiar la columna '{col}': {e}")
-                    continue
+            # 5. Reglas de limpieza configurables: espacios en blanco y filtro de tipo de
+            # comprobante "P" en la columna A
+            filas_antes = len(clean_df)
+            clean_df = self._apply_cleaning_rules(clean_df, 'contable')
             
-            # 5.5. Filtrar solo registros con tipo de comprobante "P" en la columna A
-            if len(clean_df.columns) > 0:
-                primera_columna = clean_df.columns[0]
-                filas_antes = len(clean_df)
-                
-                # Convertir la primera columna a string y filtrar solo los que sean "P"
-                clean_df[primera_columna] = clean_df[primera_columna].astype(str).str.strip().str.upper()
-                clean_df = clean_df[clean_df[primera_columna] == 'P'].copy()
-                
-                filas_despues = len(clean_df)
-                filas_filtradas = filas_antes - filas_despues
-                
-                if filas_filtradas > 0:
-                    self.logger.info(f"Filtrados {filas_filtradas} registros que no tienen tipo de comprobante 'P' en columna A")
-                    self.logger.info(f"Registros restantes con tipo 'P': {filas_despues}")
-                else:
-                    self.logger.info(f"Todos los registros tienen tipo de comprobante 'P' en columna A")
+            filas_filtradas = filas_antes - len(clean_df)
+            if filas_filtradas > 0:
+                self.logger.info(f"Registros restantes tras las reglas de limpieza: {len(clean_df)}")
             
             # 6. Eliminar filas completamente vacías
             initial_rows = len(clean_df)
@@ -529,10 +807,7 @@ class CausacionProcessor:
                     )
             
             # 2. Validar formatos de fecha
-            date_columns = [col for col in df.columns 
-                          if any(keyword in col.lower() for keyword in ['fecha', 'date', 'dia', 'mes', 'año'])]
-            
-            for col in date_columns:
+            for col in self.column_roles(df).columns_for('fecha'):
                 date_issues = self._validate_date_format(df[col], col)
                 validation_results['date_format_issues'].extend(date_issues)
             
@@ -565,41 +840,98 @@ class CausacionProcessor:
             validation_results['error'] = str(e)
             return validation_results
     
-    def _format_date_column(self, date_series: pd.Series) -> pd.Series:
+    def _cleaning_plan(self, source: str) -> CleaningPlan:
         """
-        Formatear columna de fecha a formato DD-MM-YYYY
+        Obtener el plan compilado de reglas de limpieza de una fuente
         
         Args:
-            date_series: Serie con fechas
+            source: 'dian' o 'contable'
             
         Returns:
-            Serie con fechas formateadas
+            Plan compilado (se reutiliza mientras no cambien las reglas)
+        """
+        key = (source, rules_fingerprint(self.cleaning_rules))
+        plan = self._cleaning_plans.get(key)
+        if plan is None:
+            plan = CleaningPlan(self.cleaning_rules.get(source, []), source,
+                                converters={'fecha': self._parse_date_column})
+            self._cleaning_plans[key] = plan
+        return plan
+    
+    def _apply_cleaning_rules(self, df: pd.DataFrame, source: str, stage: str = 'clean') -> pd.DataFrame:
         """
-        try:
-            # Intentar convertir a datetime con formato específico
-            # Primero intentar con formato DD-MM-YYYY
-            try:
-                formatted_dates = pd.to_datetime(date_series, format='%d-%m-%Y', errors='coerce')
-            except:
-                # Si falla, intentar con formato DD-MM-YYYY HH:MM:SS
-                try:
-                    formatted_dates = pd.to_datetime(date_series, format='%d-%m-%Y %H:%M:%S', errors='coerce')
-                except:
-                    # Si falla, usar inferencia automática con dayfirst=True
-                    formatted_dates = pd.to_datetime(date_series, dayfirst=True, errors='coerce')
-            
-            # Formatear como DD-MM-YYYY
-            formatted_dates = formatted_dates.dt.strftime('%d-%m-%Y')
-            
-            # Reemplazar NaT con None
-            formatted_dates = formatted_dates.replace('NaT', None)
+        Ejecutar las reglas de limpieza de una fuente y etapa, guardando el reporte por regla
+        
+        Args:
+            df: DataFrame a limpiar
+            source: 'dian' o 'contable'
+            stage: 'raw' o 'clean'
             
-            return formatted_dates
+        Returns:
+            DataFrame limpio
+        """
+        clean_df, report = self._cleaning_plan(source).run(df, stage)
+        self.cleaning_reports.setdefault(source, []).extend(report)
+        return clean_df
+    
+    def _parse_date_column(self, date_series: pd.Series) -> pd.Series:
+        """
+        Convertir columna de fecha a datetime64 (el texto DD-MM-YYYY se genera solo al reportar)
+        
+        Args:
+            date_series: Serie con fechas
             
+        Returns:
+            Serie datetime64 (NaT para fechas vacías o inválidas)
+        """
+        try:
+            return self._parse_dates(date_series)
         except Exception as e:
-            self.logger.warning(f"Error al formatear fechas: {e}")
+            self.logger.warning(f"Error al convertir fechas: {e}")
             return date_series
     
+    def _parse_dates(self, values: pd.Series) -> pd.Series:
+        """
+        Convertir fechas a datetime64 una vez por valor distinto
+        
+        La columna se factoriza y solo se interpreta cada fecha distinta (un mes tiene pocas
+        fechas distintas); no se guarda nada entre llamadas.
+        
+        Args:
+            values: Serie con fechas (texto DD-MM-YYYY, datetime o vacíos)
+            
+        Returns:
+            Serie datetime64[ns] con el mismo índice (NaT para vacíos o inválidos)
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        
+        codes, uniques = pd.factorize(values)
+        parsed_uniques = np.empty(len(uniques), dtype='datetime64[ns]')
+        for position, value in enumerate(uniques):
+            parsed = self._parse_date_value(value)
+            parsed_uniques[position] = parsed.to_datetime64() if parsed is not pd.NaT else np.datetime64('NaT')
+        
+        parsed_values = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+        valid = codes >= 0
+        parsed_values[valid] = parsed_uniques[codes[valid]]
+        return pd.Series(parsed_values, index=values.index, name=values.name)
+    
+    def _parse_date_value(self, value) -> pd.Timestamp:
+        """Convertir un valor de fecha (NaT si no tiene un formato aceptado)"""
+        if isinstance(value, (datetime, date, np.datetime64)):
+            return pd.Timestamp(value)
+        if not isinstance(value, str):
+            return pd.NaT
+        
+        text = value.strip()
+        for date_format in DATE_INPUT_FORMATS:
+            try:
+                return pd.Timestamp(datetime.strptime(text, date_format))
+            except ValueError:
+                continue
+        return pd.NaT
+    
     def _identify_critical_fields(self, df: pd.DataFrame) -> List[str]:
         """
         Identificar campos críticos basado en nombres de columnas
@@ -610,14 +942,7 @@ class CausacionProcessor:
         Returns:
             Lista de nombres de columnas críticas
         """
-        critical_keywords = ['folio', 'numero', 'identificacion', 'nit', 'ruc', 'fecha', 'valor', 'monto']
-        critical_fields = []
-        
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in critical_keywords):
-                critical_fields.append(col)
-        
-        return critical_fields
+        return self.column_roles(df).columns_for('critico')
     
     def _validate_critical_fields(self, df: pd.DataFrame, critical_fields: List[str]) -> Dict[str, Any]:
         """
@@ -643,17 +968,27 @@ class CausacionProcessor:
             'errors': errors
         }
     
-    def _map_unnamed_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _map_unnamed_columns(self, df: pd.DataFrame, layout: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
         """
         Mapear columnas 'Unnamed' a nombres descriptivos basado en contenido
         
+        Si el layout ya tiene el mapeo de las mismas columnas y cada columna mapeada sigue
+        pareciendo de su tipo, se reutiliza sin analizar de nuevo el contenido.
+        
         Args:
             df: DataFrame con columnas sin nombre
+            layout: Layout del archivo; recibe el mapeo detectado
             
         Returns:
             DataFrame con columnas renombradas
         """
-        unnamed_columns = [col for col in df.columns if 'unnamed' in col.lower()]
+        unnamed_columns = self.column_roles(df).columns_for('unnamed')
+        
+        mapping = self._layout_unnamed_mapping(df, unnamed_columns, layout)
+        if mapping is not None:
+            if mapping:
+                self.logger.info(f"Columnas sin nombre mapeadas según el layout guardado: {mapping}")
+            return self._rename_unnamed_columns(df, mapping)
         
         if unnamed_columns:
             self.logger.info(f"Mapeando {len(unnamed_columns)} columnas sin nombre")
@@ -699,31 +1034,82 @@ class CausacionProcessor:
                     self.logger.warning(f"Error al analizar columna {col}: {e}")
                     continue
             
-            # Aplicar mapeo evitando duplicados
-            if mapping:
-                # Evitar nombres duplicados agregando sufijos
-                final_mapping = {}
-                used_names = set()
-                
-                for original_col, target_name in mapping.items():
-                    if target_name not in used_names:
-                        final_mapping[original_col] = target_name
-                        used_names.add(target_name)
-                    else:
-                        # Agregar sufijo para evitar duplicados
-                        counter = 2
-                        new_name = f"{target_name}_{counter}"
-                        while new_name in used_names:
-                            counter += 1
-                            new_name = f"{target_name}_{counter}"
-                        final_mapping[original_col] = new_name
-                        used_names.add(new_name)
-                
-                df = df.rename(columns=final_mapping)
-                self.logger.info(f"Columnas renombradas exitosamente: {list(final_mapping.values())}")
-            else:
+            if not mapping:
                 self.logger.warning("No se pudo mapear ninguna columna automáticamente")
         
+        if layout is not None:
+            layout['unnamed_columns'] = list(unnamed_columns)
+            layout['unnamed_mapping'] = dict(mapping or {})
+        
+        return self._rename_unnamed_columns(df, mapping or {})
+    
+    def _layout_unnamed_mapping(self, df: pd.DataFrame, unnamed_columns: List[str],
+                                layout: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        Obtener el mapeo de columnas sin nombre guardado en el layout, si sigue vigente
+        
+        Args:
+            df: DataFrame con columnas sin nombre
+            unnamed_columns: Columnas 'Unnamed' del DataFrame
+            layout: Layout del archivo (o None)
+            
+        Returns:
+            Mapeo columna -> tipo, o None si hay que detectarlo de nuevo
+        """
+        if not layout or layout.get('unnamed_columns') != list(unnamed_columns):
+            return None
+        
+        # Verificación rápida: cada columna mapeada sigue pareciendo de su tipo
+        checks = {
+            'numero_documento': self._looks_like_document_numbers,
+            'valor': self._looks_like_monetary_values,
+            'fecha': self._looks_like_dates,
+            'cuenta_contable': self._looks_like_account_codes,
+            'descripcion': self._looks_like_descriptions
+        }
+        mapping = layout.get('unnamed_mapping', {})
+        for col, target_name in mapping.items():
+            check = checks.get(target_name)
+            sample_values = df[col].dropna().head(10) if col in df.columns else pd.Series(dtype=object)
+            if check is None or len(sample_values) == 0 or not check(sample_values):
+                self.logger.info(f"La columna {col} ya no parece '{target_name}', se detecta de nuevo el mapeo")
+                return None
+        return mapping
+    
+    def _rename_unnamed_columns(self, df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
+        """
+        Renombrar las columnas mapeadas evitando nombres duplicados
+        
+        Args:
+            df: DataFrame con columnas sin nombre
+            mapping: Mapeo columna -> tipo detectado
+            
+        Returns:
+            DataFrame con columnas renombradas
+        """
+        if not mapping:
+            return df
+        
+        # Evitar nombres duplicados agregando sufijos
+        final_mapping = {}
+        used_names = set()
+        
+        for original_col, target_name in mapping.items():
+            if target_name not in used_names:
+                final_mapping[original_col] = target_name
+                used_names.add(target_name)
+            else:
+                # Agregar sufijo para evitar duplicados
+                counter = 2
+                new_name = f"{target_name}_{counter}"
+                while new_name in used_names:
+                    counter += 1
+                    new_name = f"{target_name}_{counter}"
+                final_mapping[original_col] = new_name
+                used_names.add(new_name)
+        
+        df = df.rename(columns=final_mapping)
+        self.logger.info(f"Columnas renombradas exitosamente: {list(final_mapping.values())}")
         return df
     
     def _looks_like_document_numbers(self, values: pd.Series) -> bool:
@@ -821,9 +1207,10 @@ class CausacionProcessor:
             DataFrame con fecha combinada
         """
         # Buscar columnas de año, mes, día
-        year_cols = [col for col in df.columns if 'año' in col.lower() or 'year' in col.lower()]
-        month_cols = [col for col in df.columns if 'mes' in col.lower() or 'month' in col.lower()]
-        day_cols = [col for col in df.columns if 'dia' in col.lower() or 'day' in col.lower()]
+        roles = self.column_roles(df)
+        year_cols = roles.columns_for('anio')
+        month_cols = roles.columns_for('mes')
+        day_cols = roles.columns_for('dia')
         
         if year_cols and month_cols and day_cols:
             self.logger.info("Combinando columnas de fecha...")
@@ -839,9 +1226,6 @@ class CausacionProcessor:
                 df[day_col].astype(str).str.zfill(2),
                 errors='coerce'
             )
-            
-            # Formatear como DD-MM-YYYY
-            df['fecha_combinada'] = df['fecha_combinada'].dt.strftime('%d-%m-%Y')
         
         return df
     
@@ -881,15 +1265,21 @@ class CausacionProcessor:
         """
         issues = []
         
+        # Las columnas ya convertidas a datetime64 no necesitan validación
+        if pd.api.types.is_datetime64_any_dtype(date_series):
+            return issues
+        
+        # Validar cada valor distinto una sola vez
+        unique_dates = pd.Series(date_series.unique())
         try:
             # Intentar convertir a datetime con formato específico
             try:
-                pd.to_datetime(date_series, format='%d-%m-%Y', errors='raise')
+                pd.to_datetime(unique_dates, format='%d-%m-%Y', errors='raise')
             except:
                 try:
-                    pd.to_datetime(date_series, format='%d-%m-%Y %H:%M:%S', errors='raise')
+                    pd.to_datetime(unique_dates, format='%d-%m-%Y %H:%M:%S', errors='raise')
                 except:
-                    pd.to_datetime(date_series, dayfirst=True, errors='raise')
+                    pd.to_datetime(unique_dates, dayfirst=True, errors='raise')
         except Exception as e:
             issues.append(f"Columna '{column_name}': Error en formato de fecha - {str(e)}")
         
@@ -944,8 +1334,12 @@ class CausacionProcessor:
             
             self.logger.info(f"Columnas de cruce: DIAN='{dian_doc_col}' vs Contable='{contable_doc_col}'")
             
+            # Bloques por NIT (una sola vez para los cruces secundario y por similitud)
+            nit_blocks = self._build_nit_blocks(df_dian, df_contable) if self.nit_blocking else None
+            
             # Realizar matching
-            matches, non_matches = self.identify_matches(df_dian, df_contable, dian_doc_col, contable_doc_col)
+            matches, non_matches = self.identify_matches(df_dian, df_contable, dian_doc_col, contable_doc_col,
+                                                         nit_blocks)
             
             # Generar reporte
             report = self.generate_matching_report(matches, non_matches)
@@ -963,7 +1357,8 @@ class CausacionProcessor:
             raise Exception(f"Error en cruce de datos: {e}")
     
     def identify_matches(self, df_dian: pd.DataFrame, df_contable: pd.DataFrame, 
-                        dian_doc_col: str, contable_doc_col: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+                        dian_doc_col: str, contable_doc_col: str,
+                        nit_blocks: Optional[Tuple[pd.Series, pd.Series]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Identificar coincidencias entre registros DIAN y contables
         
@@ -972,6 +1367,8 @@ class CausacionProcessor:
             df_contable: DataFrame contable
             dian_doc_col: Columna de documento en DIAN
             contable_doc_col: Columna de documento en contable
+            nit_blocks: Códigos de bloque por NIT (ver _build_nit_blocks); si es None y
+                nit_blocking está activo, se calculan aquí
             
         Returns:
             Tuple con (DataFrame de coincidencias, DataFrame de no coincidencias)
@@ -992,20 +1389,25 @@ class CausacionProcessor:
             contable_df['match_type'] = 'no_match'
             contable_df['matched_dian_id'] = None
             
+            if nit_blocks is None and self.nit_blocking:
+                nit_blocks = self._build_nit_blocks(df_dian, df_contable)
+            
             # 1. Cruce primario por número de documento (exacto)
             self.logger.info("Realizando cruce primario por documento...")
             exact_matches = self._find_exact_document_matches(dian_df, contable_df, dian_doc_col, contable_doc_col)
             
             # 2. Cruce secundario por valor y fecha
             self.logger.info("Realizando cruce secundario por valor y fecha...")
-            secondary_matches = self._find_secondary_matches(dian_df, contable_df, exact_matches)
+            secondary_matches = self._find_secondary_matches(dian_df, contable_df, exact_matches, nit_blocks)
             
             # 3. Cruce por similitud de texto
             self.logger.info("Realizando cruce por similitud...")
-            similarity_matches = self._find_similarity_matches(dian_df, contable_df, exact_matches + secondary_matches)
+            similarity_matches = self._find_similarity_matches(
+                dian_df, contable_df, concat_match_frames(exact_matches, secondary_matches), nit_blocks
+            )
             
             # Combinar todos los matches
-            all_matches = exact_matches + secondary_matches + similarity_matches
+            all_matches = concat_match_frames(exact_matches, secondary_matches, similarity_matches)
             
             # Crear DataFrame de coincidencias
             matches_df = self._create_matches_dataframe(dian_df, contable_df, all_matches)
@@ -1043,7 +1445,7 @@ class CausacionProcessor:
                 'match_rate': 0.0,
                 'match_breakdown': {},
                 'quality_metrics': {},
-                'discrepancies': []
+                'discrepancies': pd.DataFrame(columns=DISCREPANCY_COLUMNS)
             }
             
             # Calcular tasa de matching
@@ -1078,10 +1480,83 @@ class CausacionProcessor:
             self.logger.error(f"Error en generación de reporte: {e}")
             return {'error': str(e)}
     
+    def column_roles(self, df: pd.DataFrame) -> ColumnRoles:
+        """
+        Obtener los roles de las columnas de un DataFrame
+        
+        La clasificación se calcula una vez por conjunto de columnas y se reutiliza en
+        todas las etapas (cruce, validación y hojas de resultado); solo se conservan los
+        últimos COLUMN_ROLES_CACHE_SIZE conjuntos.
+        
+        Args:
+            df: DataFrame a analizar
+            
+        Returns:
+            ColumnRoles con las columnas de cada rol
+        """
+        return self._column_roles(tuple(df.columns))
+    
     def _find_document_column(self, df: pd.DataFrame, source: str) -> str:
         """
         Encontrar columna de documento en el DataFrame
         
+        En el archivo contable se reutiliza la columna guardada en el layout mientras siga
+        conteniendo folios DIAN; si no, se detecta y se guarda en el layout.
+        
+        Args:
+            df: DataFrame a analizar
+            source: Fuente de datos ('DIAN' o 'contable')
+            
+        Returns:
+            Nombre de la columna de documento
+        """
+        if source == 'DIAN':
+            return self._detect_document_column(df, source)
+        
+        self.document_column_detection = {}
+        column = self._layout_document_column(df)
+        if column is None:
+            column = self._detect_document_column(df, source)
+            layout = self.contable_layout
+            if layout is not None and layout.get('columns') == list(df.columns) and column is not None:
+                layout['document_column'] = column
+                self._save_layout(layout)
+        return column
+    
+    def _layout_document_column(self, df: pd.DataFrame) -> Optional[str]:
+        """
+        Columna de documento contable guardada en el layout, si sigue vigente
+        
+        Args:
+            df: DataFrame contable
+            
+        Returns:
+            Nombre de la columna, o None si hay que detectarla
+        """
+        layout = self.contable_layout
+        if not layout or layout.get('columns') != list(df.columns):
+            return None
+        
+        column = layout.get('document_column')
+        if column is None or column not in df.columns:
+            return None
+        
+        # Verificación rápida: la columna sigue teniendo al menos un folio DIAN
+        folios = self._document_probe_folios()
+        if folios:
+            hits = self._count_folio_hits(df[column], folios)
+            if hits == 0:
+                self.logger.info(f"La columna '{column}' del layout guardado ya no contiene folios DIAN, se detecta de nuevo")
+                return None
+            self._record_document_detection(column, hits, len(folios))
+        
+        self.logger.info(f"Usando columna '{column}' para documento contable (layout guardado)")
+        return column
+    
+    def _detect_document_column(self, df: pd.DataFrame, source: str) -> str:
+        """
+        Detectar la columna de documento por nombre y contenido
+        
         Args:
             df: DataFrame a analizar
             source: Fuente de datos ('DIAN' o 'contable')
@@ -1089,76 +1564,59 @@ class CausacionProcessor:
         Returns:
             Nombre de la columna de documento
         """
+        roles = self.column_roles(df)
+        
         if source == 'DIAN':
             # Para archivos DIAN, buscar específicamente 'Folio' primero
             if 'Folio' in df.columns:
                 self.logger.info(f"Usando columna 'Folio' para documento DIAN")
                 return 'Folio'
             
-            # Buscar otras palabras clave
-            keywords = ['folio', 'numero', 'documento', 'factura']
-            for col in df.columns:
-                col_lower = col.lower()
-                if any(keyword in col_lower for keyword in keywords):
-                    # Evitar 'Tipo de documento' que no contiene números
-                    if 'tipo' not in col_lower:
-                        self.logger.info(f"Usando columna '{col}' para documento DIAN")
-                        return col
+            # Buscar otras palabras clave (evitando 'Tipo de documento', que no contiene números)
+            col = roles.first('documento_dian')
+            if col is not None:
+                self.logger.info(f"Usando columna '{col}' para documento DIAN")
+                return col
                         
         else:  # contable
             # PRIORIDAD MÁXIMA: Buscar específicamente "NÚMERO DE DOCUMENTO CRUCE"
-            for col in df.columns:
-                col_lower = col.lower()
-                if 'numero' in col_lower and 'documento' in col_lower and 'cruce' in col_lower:
-                    self.logger.info(f"Usando columna '{col}' para documento contable (NÚMERO DE DOCUMENTO CRUCE - prioridad máxima)")
-                    return col
+            col = roles.first('documento_cruce')
+            if col is not None:
+                self.logger.info(f"Usando columna '{col}' para documento contable (NÚMERO DE DOCUMENTO CRUCE - prioridad máxima)")
+                return col
             
             # Para archivos contables, buscar columna que contenga valores DIAN conocidos
-            if hasattr(self, 'dian_data') and self.dian_data is not None and 'Folio' in self.dian_data.columns:
-                # Obtener algunos folios DIAN para buscar coincidencias
-                folios_dian = self.dian_data['Folio'].dropna().astype(str).head(20).tolist()
-                
+            folios_dian = self._document_probe_folios()
+            if folios_dian:
                 best_match_col = None
                 max_matches = 0
                 
-                # Dar prioridad especial a columnas que contengan "cruce"
-                priority_cols = []
-                regular_cols = []
-                
-                for col in df.columns:
-                    if 'cruce' in col.lower():
-                        priority_cols.append(col)
-                    else:
-                        regular_cols.append(col)
+                # Dar prioridad especial a columnas que contengan "cruce"
+                priority_cols = roles.columns_for('cruce')
+                regular_cols = [col for col in df.columns if col not in priority_cols]
                 
                 # Primero revisar columnas prioritarias, luego las regulares
                 for col in priority_cols + regular_cols:
                     try:
-                        # Convertir la columna a string para búsqueda
-                        col_values = df[col].astype(str)
-                        matches_found = 0
-                        
-                        # Contar cuántos folios DIAN se encuentran en esta columna
-                        for folio in folios_dian:
-                            if col_values.str.contains(folio, na=False).any():
-                                matches_found += 1
-                        
-                        # Si encontramos coincidencias, esta podría ser la columna correcta
-                        # Si es una columna de "cruce" con al menos 1 coincidencia, darle prioridad absoluta
-                        if 'cruce' in col.lower() and matches_found > 0:
-                            self.logger.info(f"Usando columna '{col}' para documento contable (CRUCE detectado con {matches_found} coincidencias - prioridad máxima)")
-                            return col
-                        
-                        if matches_found > max_matches:
-                            max_matches = matches_found
-                            best_match_col = col
-                            
+                        # Contar cuántos folios DIAN aparecen como token exacto en la columna
+                        matches_found = self._count_folio_hits(df[col], folios_dian)
                     except Exception as e:
                         continue
+                    
+                    # Si es una columna de "cruce" con al menos 1 coincidencia, darle prioridad absoluta
+                    if col in priority_cols and matches_found > 0:
+                        self._record_document_detection(col, matches_found, len(folios_dian))
+                        self.logger.info(f"Usando columna '{col}' para documento contable (CRUCE detectado con {matches_found} coincidencias - prioridad máxima, confianza {matches_found / len(folios_dian):.0%})")
+                        return col
+                    
+                    if matches_found > max_matches:
+                        max_matches = matches_found
+                        best_match_col = col
                 
                 # Si encontramos una columna con coincidencias, usarla
                 if best_match_col and max_matches > 0:
-                    self.logger.info(f"Usando columna '{best_match_col}' para documento contable (encontradas {max_matches} coincidencias con folios DIAN)")
+                    self._record_document_detection(best_match_col, max_matches, len(folios_dian))
+                    self.logger.info(f"Usando columna '{best_match_col}' para documento contable (encontradas {max_matches} coincidencias con folios DIAN, confianza {max_matches / len(folios_dian):.0%})")
                     return best_match_col
             
             # Método de respaldo: buscar por contenido numérico
@@ -1191,22 +1649,19 @@ class CausacionProcessor:
             
             # Buscar por palabras clave como fallback - PRIORIDAD PARA "NÚMERO DE DOCUMENTO CRUCE"
             # Primero buscar específicamente "NÚMERO DE DOCUMENTO CRUCE"
-            for col in df.columns:
-                col_lower = col.lower()
-                if 'numero' in col_lower and 'documento' in col_lower and 'cruce' in col_lower:
-                    self.logger.info(f"Usando columna '{col}' para documento contable (NÚMERO DE DOCUMENTO CRUCE encontrado)")
-                    return col
+            col = roles.first('documento_cruce')
+            if col is not None:
+                self.logger.info(f"Usando columna '{col}' para documento contable (NÚMERO DE DOCUMENTO CRUCE encontrado)")
+                return col
             
             # Luego buscar otras palabras clave
-            keywords = ['numero', 'documento', 'cruce', 'factura', 'comprobante']
-            for col in df.columns:
-                col_lower = col.lower()
-                if any(keyword in col_lower for keyword in keywords):
-                    self.logger.info(f"Usando columna '{col}' para documento contable")
-                    return col
+            col = roles.first('documento_contable')
+            if col is not None:
+                self.logger.info(f"Usando columna '{col}' para documento contable")
+                return col
             
             # Como último recurso, buscar columnas 'Unnamed' con contenido numérico
-            unnamed_cols = [col for col in df.columns if 'unnamed' in col.lower()]
+            unnamed_cols = roles.columns_for('unnamed')
             for col in unnamed_cols:
                 try:
                     sample_values = df[col].dropna().head(5)
@@ -1227,8 +1682,45 @@ class CausacionProcessor:
             
         return None
     
+    def _document_probe_folios(self) -> List[Tuple[str, ...]]:
+        """
+        Folios DIAN usados para detectar la columna de documento contable
+        
+        Returns:
+            Tokens de los primeros DOCUMENT_PROBE_FOLIOS folios (vacía si no hay datos DIAN)
+        """
+        if self.dian_data is None or 'Folio' not in self.dian_data.columns:
+            return []
+        return folio_token_groups(self.dian_data['Folio'].dropna().head(DOCUMENT_PROBE_FOLIOS))
+    
+    def _count_folio_hits(self, values: pd.Series, folios: List[Tuple[str, ...]]) -> int:
+        """
+        Contar los folios cuyos tokens aparecen todos en una muestra de la columna
+        
+        Folios y columna se normalizan igual (ver folio_token_groups), así que 'FE-1234'
+        se encuentra en 'FE-1234/5' y un folio leído como 1234.0 en '1234'.
+        
+        Args:
+            values: Columna contable
+            folios: Tokens de los folios DIAN (ver _document_probe_folios)
+            
+        Returns:
+            Cantidad de folios encontrados
+        """
+        tokens = document_tokens(values, DOCUMENT_PROBE_ROWS)
+        return sum(all(token in tokens for token in folio) for folio in folios)
+    
+    def _record_document_detection(self, column: str, hits: int, probes: int):
+        """Guardar el resultado de la detección de la columna de documento contable"""
+        self.document_column_detection = {
+            'column': column,
+            'hits': hits,
+            'probes': probes,
+            'confidence': hits / probes if probes else 0.0
+        }
+    
     def _find_exact_document_matches(self, dian_df: pd.DataFrame, contable_df: pd.DataFrame, 
-                                   dian_col: str, contable_col: str) -> List[Dict[str, Any]]:
+                                   dian_col: str, contable_col: str) -> pd.DataFrame:
         """
         Encontrar coincidencias exactas por número de documento
         
@@ -1239,53 +1731,46 @@ class CausacionProcessor:
             contable_col: Columna de documento en contable
             
         Returns:
-            Lista de coincidencias exactas
+            DataFrame de pares (ver MATCH_COLUMNS) con las coincidencias exactas
         """
-        matches = []
-        
         # Normalizar columnas de documento
         dian_docs = dian_df[dian_col].astype(str).str.strip().str.upper()
         contable_docs = contable_df[contable_col].astype(str).str.strip().str.upper()
         
-        # Crear índice para búsqueda eficiente
-        contable_doc_index = contable_docs.to_dict()
+        # Índice invertido documento -> posiciones contables (se construye una sola vez)
+        contable_doc_index = DocumentHashIndex(contable_docs)
+        dian_pos, contable_pos = contable_doc_index.join(dian_docs)
         
-        for dian_idx, dian_doc in dian_docs.items():
-            if dian_doc in contable_doc_index.values():
-                # Encontrar todos los índices contables que coinciden
-                contable_indices = [idx for idx, doc in contable_doc_index.items() if doc == dian_doc]
-                
-                for contable_idx in contable_indices:
-                    match = {
-                        'dian_idx': dian_idx,
-                        'contable_idx': contable_idx,
-                        'match_type': 'exact_document',
-                        'match_score': 1.0,
-                        'match_reason': f'Documento exacto: {dian_doc}'
-                    }
-                    matches.append(match)
+        matches = build_match_frame(
+            dian_df.index.to_numpy()[dian_pos],
+            contable_df.index.to_numpy()[contable_pos],
+            'exact_document',
+            1.0,
+            ('Documento exacto: ' + dian_docs.iloc[dian_pos]).tolist()
+        )
         
         self.logger.info(f"Encontradas {len(matches)} coincidencias exactas por documento")
         return matches
     
     def _find_secondary_matches(self, dian_df: pd.DataFrame, contable_df: pd.DataFrame, 
-                              existing_matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                              existing_matches: pd.DataFrame,
+                              nit_blocks: Optional[Tuple[pd.Series, pd.Series]] = None) -> pd.DataFrame:
         """
         Encontrar coincidencias secundarias por valor y fecha (optimizado)
         
         Args:
             dian_df: DataFrame DIAN
             contable_df: DataFrame contable
-            existing_matches: Lista de coincidencias existentes
+            existing_matches: DataFrame de pares con las coincidencias existentes
+            nit_blocks: Códigos de bloque por NIT (None = sin bloqueo); solo se comparan
+                registros del mismo NIT, y los registros sin NIT con todos
             
         Returns:
-            Lista de coincidencias secundarias
+            DataFrame de pares (ver MATCH_COLUMNS) con las coincidencias secundarias
         """
-        matches = []
-        
         # Obtener índices ya emparejados
-        matched_dian_indices = {match['dian_idx'] for match in existing_matches}
-        matched_contable_indices = {match['contable_idx'] for match in existing_matches}
+        matched_dian_indices = set(existing_matches['dian_idx'].tolist())
+        matched_contable_indices = set(existing_matches['contable_idx'].tolist())
         
         # Encontrar columnas de valor y fecha
         dian_value_col = self._find_value_column(dian_df, 'DIAN')
@@ -1295,7 +1780,7 @@ class CausacionProcessor:
         
         if not (dian_value_col and contable_value_col):
             self.logger.info("No se encontraron columnas de valor para cruce secundario")
-            return matches
+            return build_match_frame([], [], 'secondary_value_date', 0.0, '')
         
         # Filtrar registros no emparejados
         dian_unmatched = dian_df[~dian_df.index.isin(matched_dian_indices)]
@@ -1303,385 +1788,478 @@ class CausacionProcessor:
         
         if dian_unmatched.empty or contable_unmatched.empty:
             self.logger.info("No hay registros sin emparejar para cruce secundario")
-            return matches
+            return build_match_frame([], [], 'secondary_value_date', 0.0, '')
         
         # Tolerancia para diferencias en valores (5%)
         tolerance = 0.05
         
-        # Crear índices por valor para optimizar búsqueda
-        self.logger.info("Creando índices de valor para optimización...")
-        
-        # Agrupar contables por valor (aproximado)
-        contable_by_value = {}
-        for idx, row in contable_unmatched.iterrows():
-            value = row[contable_value_col]
-            numeric_value = self._safe_to_numeric(value)
-            if numeric_value is not None:
-                # Redondear a 2 decimales para agrupar valores similares
-                rounded_value = round(numeric_value, 2)
-                if rounded_value not in contable_by_value:
-                    contable_by_value[rounded_value] = []
-                contable_by_value[rounded_value].append(idx)
-        
-        self.logger.info(f"Índices creados para {len(contable_by_value)} valores únicos")
-        
-        # Buscar coincidencias
-        processed_count = 0
-        total_dian = len(dian_unmatched)
-        
-        for dian_idx, dian_row in dian_unmatched.iterrows():
-            processed_count += 1
-            if processed_count % 100 == 0:
-                self.logger.info(f"Procesando DIAN: {processed_count}/{total_dian}")
-            
-            dian_value = dian_row[dian_value_col]
-            dian_date = dian_row[dian_date_col] if dian_date_col else None
-            
-            # Convertir valor DIAN a numérico de forma segura
-            numeric_dian_value = self._safe_to_numeric(dian_value)
-            if numeric_dian_value is None:
-                continue
-            
-            # Buscar valores similares en contable
-            rounded_dian_value = round(numeric_dian_value, 2)
-            
-            # Buscar en un rango de valores (±10%)
-            min_value = rounded_dian_value * 0.9
-            max_value = rounded_dian_value * 1.1
-            
-            candidates = []
-            for value, indices in contable_by_value.items():
-                if min_value <= value <= max_value:
-                    candidates.extend(indices)
-            
-            if not candidates:
-                continue
-            
-            # Verificar candidatos
-            for contable_idx in candidates:
-                if contable_idx in matched_contable_indices:
-                    continue
-                
-                contable_row = contable_df.loc[contable_idx]
-                contable_value = contable_row[contable_value_col]
-                contable_date = contable_row[contable_date_col] if contable_date_col else None
-                
-                if pd.isna(contable_value):
-                    continue
-                
-                # Verificar coincidencia de valor
-                value_match = self._check_value_match(dian_value, contable_value, tolerance)
-                
-                if value_match:
-                    # Verificar coincidencia de fecha
-                    date_match = self._check_date_match(dian_date, contable_date)
-                    
-                    if date_match:
-                        match_score = 0.8
-                        match_reason = f'Valor y fecha coinciden: {dian_value}'
-                    else:
-                        match_score = 0.6
-                        match_reason = f'Solo valor coincide: {dian_value}'
-                    
-                    match = {
-                        'dian_idx': dian_idx,
-                        'contable_idx': contable_idx,
-                        'match_type': 'secondary_value_date',
-                        'match_score': match_score,
-                        'match_reason': match_reason
-                    }
-                    matches.append(match)
-                    
-                    # Marcar como emparejados
-                    matched_dian_indices.add(dian_idx)
-                    matched_contable_indices.add(contable_idx)
-                    break
+        # Parsear valores y fechas una sola vez por columna
+        dian_values = self._parse_amount_array(dian_unmatched[dian_value_col])
+        contable_values = self._parse_amount_array(contable_unmatched[contable_value_col])
+        dian_dates = self._parse_date_array(dian_unmatched[dian_date_col] if dian_date_col else None, len(dian_unmatched))
+        contable_dates = self._parse_date_array(contable_unmatched[contable_date_col] if contable_date_col else None, len(contable_unmatched))
+        
+        # Ventana de búsqueda (±10%) por cada registro DIAN con valor numérico
+        rounded_dian_values = np.round(dian_values, 2)
+        min_values = rounded_dian_values * 0.9
+        max_values = rounded_dian_values * 1.1
+        
+        # Acotar la ventana a la banda de tolerancia (con holgura por el redondeo a 2 decimales):
+        # los candidatos fuera de ella nunca pasarían la verificación de valor
+        with np.errstate(invalid='ignore'):
+            band_low = np.minimum(dian_values * (1 - tolerance), dian_values / (1 - tolerance)) - 0.01
+            band_high = np.maximum(dian_values * (1 - tolerance), dian_values / (1 - tolerance)) + 0.01
+        min_values = np.where(np.isnan(dian_values), min_values, np.maximum(min_values, band_low))
+        max_values = np.where(np.isnan(dian_values), max_values, np.minimum(max_values, band_high))
+        
+        # Códigos de bloque por NIT de los registros no emparejados (None = sin bloqueo)
+        rounded_contable_values = np.round(contable_values, 2)
+        dian_codes = None
+        contable_codes = None
+        if nit_blocks is not None:
+            dian_blocks, contable_blocks = nit_blocks
+            dian_codes = dian_blocks.loc[dian_unmatched.index].to_numpy()
+            contable_codes = contable_blocks.loc[contable_unmatched.index].to_numpy()
+            self.logger.info("Cruce secundario restringido a pares del mismo NIT (los registros sin NIT se comparan con todos)")
+        
+        # Evaluar la tabla de pares candidatos y asignar "el primero gana" en orden DIAN
+        dian_positions = []
+        contable_positions = []
+        date_matches = []
+        used_contable = np.zeros(len(contable_unmatched), dtype=bool)
+        
+        # Índice ordenado de valores para búsqueda por rango (searchsorted)
+        value_index = ValueWindowIndex(rounded_contable_values, np.arange(len(contable_unmatched)))
+        
+        for pair_dian, pair_contable, preference in value_index.iter_candidate_pairs(min_values, max_values):
+            candidate_ok = value_tolerance_mask(dian_values[pair_dian], contable_values[pair_contable], tolerance)
+            if dian_codes is not None:
+                candidate_ok &= block_compatibility_mask(dian_codes[pair_dian], contable_codes[pair_contable])
+            pair_dian = pair_dian[candidate_ok]
+            pair_contable = pair_contable[candidate_ok]
+            
+            chosen = greedy_one_to_one(pair_dian, pair_contable, preference[candidate_ok], used_contable)
+            pair_dian = pair_dian[chosen]
+            pair_contable = pair_contable[chosen]
+            
+            dian_positions.append(pair_dian)
+            contable_positions.append(pair_contable)
+            date_matches.append(date_window_mask(dian_dates[pair_dian], contable_dates[pair_contable], 3))
+        
+        if not dian_positions:
+            self.logger.info("Encontradas 0 coincidencias secundarias")
+            return build_match_frame([], [], 'secondary_value_date', 0.0, '')
+        
+        # Conservar el orden de los registros DIAN
+        dian_positions = np.concatenate(dian_positions)
+        order = np.argsort(dian_positions, kind='stable')
+        dian_positions = dian_positions[order]
+        contable_positions = np.concatenate(contable_positions)[order]
+        date_matches = np.concatenate(date_matches)[order]
+        
+        raw_dian_values = dian_unmatched[dian_value_col].to_numpy(dtype=object)[dian_positions]
+        match_reasons = [
+            f'Valor y fecha coinciden: {value}' if date_ok else f'Solo valor coincide: {value}'
+            for value, date_ok in zip(raw_dian_values, date_matches)
+        ]
+        
+        matches = build_match_frame(
+            dian_unmatched.index.to_numpy()[dian_positions],
+            contable_unmatched.index.to_numpy()[contable_positions],
+            'secondary_value_date',
+            np.where(date_matches, 0.8, 0.6),
+            match_reasons
+        )
         
         self.logger.info(f"Encontradas {len(matches)} coincidencias secundarias")
         return matches
     
     def _find_similarity_matches(self, dian_df: pd.DataFrame, contable_df: pd.DataFrame, 
-                               existing_matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                               existing_matches: pd.DataFrame,
+                               nit_blocks: Optional[Tuple[pd.Series, pd.Series]] = None) -> pd.DataFrame:
         """
         Encontrar coincidencias por similitud de texto
         
+        Usa un índice TF-IDF de n-gramas de caracteres para recuperar los top-k candidatos
+        por coseno y, opcionalmente, los reordena con el ratio exacto de SequenceMatcher.
+        
         Args:
             dian_df: DataFrame DIAN
             contable_df: DataFrame contable
-            existing_matches: Lista de coincidencias existentes
+            existing_matches: DataFrame de pares con las coincidencias existentes
+            nit_blocks: Códigos de bloque por NIT (None = sin bloqueo); solo se comparan
+                registros del mismo NIT, y los registros sin NIT con todos
             
         Returns:
-            Lista de coincidencias por similitud
+            DataFrame de pares (ver MATCH_COLUMNS) con las coincidencias por similitud
         """
-        matches = []
-        
         # Obtener índices ya emparejados
-        matched_dian_indices = {match['dian_idx'] for match in existing_matches}
-        matched_contable_indices = {match['contable_idx'] for match in existing_matches}
+        matched_dian_indices = set(existing_matches['dian_idx'].tolist())
+        matched_contable_indices = set(existing_matches['contable_idx'].tolist())
         
         # Encontrar columnas de descripción
         dian_desc_col = self._find_description_column(dian_df, 'DIAN')
         contable_desc_col = self._find_description_column(contable_df, 'contable')
         
-        if dian_desc_col and contable_desc_col:
-            similarity_threshold = 0.7
-            
-            for dian_idx in dian_df.index:
-                if dian_idx in matched_dian_indices:
-                    continue
-                
-                dian_desc = str(dian_df.loc[dian_idx, dian_desc_col]).strip()
-                
-                if not dian_desc or dian_desc == 'nan':
-                    continue
-                
-                best_match = None
-                best_score = 0.0
-                
-                for contable_idx in contable_df.index:
-                    if contable_idx in matched_contable_indices:
-                        continue
-                    
-                    contable_desc = str(contable_df.loc[contable_idx, contable_desc_col]).strip()
-                    
-                    if not contable_desc or contable_desc == 'nan':
-                        continue
-                    
-                    # Calcular similitud
-                    similarity = SequenceMatcher(None, dian_desc.lower(), contable_desc.lower()).ratio()
-                    
-                    if similarity > best_score and similarity >= similarity_threshold:
-                        best_score = similarity
-                        best_match = contable_idx
-                
-                if best_match is not None:
-                    match = {
-                        'dian_idx': dian_idx,
-                        'contable_idx': best_match,
-                        'match_type': 'similarity',
-                        'match_score': best_score,
-                        'match_reason': f'Similitud de texto: {best_score:.2f}'
-                    }
-                    matches.append(match)
-                    
-                    # Marcar como emparejados
-                    matched_dian_indices.add(dian_idx)
-                    matched_contable_indices.add(best_match)
+        if not (dian_desc_col and contable_desc_col):
+            self.logger.info("Encontradas 0 coincidencias por similitud")
+            return build_match_frame([], [], 'similarity', 0.0, '')
+        
+        # Descripciones no emparejadas y no vacías de ambos lados
+        dian_unmatched = dian_df.loc[~dian_df.index.isin(matched_dian_indices), dian_desc_col].astype(str).str.strip()
+        contable_unmatched = contable_df.loc[~contable_df.index.isin(matched_contable_indices), contable_desc_col].astype(str).str.strip()
+        dian_unmatched = dian_unmatched[(dian_unmatched != '') & (dian_unmatched != 'nan')]
+        contable_unmatched = contable_unmatched[(contable_unmatched != '') & (contable_unmatched != 'nan')]
+        
+        if dian_unmatched.empty or contable_unmatched.empty:
+            self.logger.info("Encontradas 0 coincidencias por similitud")
+            return build_match_frame([], [], 'similarity', 0.0, '')
+        
+        # Códigos de bloque por NIT: cada consulta solo se compara con su propio bloque y con
+        # los registros sin NIT (las consultas sin NIT, con todo el corpus)
+        contable_codes = None
+        dian_codes = None
+        if nit_blocks is not None:
+            dian_blocks, contable_blocks = nit_blocks
+            dian_codes = dian_blocks.loc[dian_unmatched.index].to_numpy()
+            contable_codes = contable_blocks.loc[contable_unmatched.index].to_numpy()
+            self.logger.info("Cruce por similitud restringido a bloques de NIT")
+        
+        # Índice de n-gramas sobre el corpus contable (se construye una sola vez)
+        similarity_index = CharNgramIndex(contable_unmatched.tolist(), blocks=contable_codes)
+        search_options = {
+            'top_k': self.similarity_top_k,
+            'threshold': self.similarity_threshold,
+            'rerank': self.similarity_rerank,
+            'query_blocks': dian_codes
+        }
+        
+        workers = self.similarity_workers if self.similarity_workers is not None else (os.cpu_count() or 1)
+        workers = min(workers, len(dian_unmatched))
+        search_result = None
+        
+        if workers > 1:
+            try:
+                self.logger.info(f"Cruce por similitud en paralelo con {workers} procesos")
+                search_result = parallel_search(similarity_index, dian_unmatched.tolist(), workers, **search_options)
+            except Exception as e:
+                self.logger.warning(f"No se pudo ejecutar el cruce por similitud en paralelo, se ejecuta en serie: {e}")
+        
+        if search_result is None:
+            search_result = similarity_index.search(dian_unmatched.tolist(), **search_options)
+        
+        pair_dian, pair_contable, pair_scores = search_result
+        
+        # Asignación uno a uno: cada DIAN toma el mejor candidato aún libre
+        group_starts = np.searchsorted(pair_dian, pair_dian, side='left')
+        candidate_rank = np.arange(len(pair_dian), dtype=np.int64) - group_starts
+        used_contable = np.zeros(len(contable_unmatched), dtype=bool)
+        chosen = greedy_one_to_one(pair_dian, pair_contable, candidate_rank, used_contable)
+        
+        chosen_scores = pair_scores[chosen]
+        matches = build_match_frame(
+            dian_unmatched.index.to_numpy()[pair_dian[chosen]],
+            contable_unmatched.index.to_numpy()[pair_contable[chosen]],
+            'similarity',
+            chosen_scores,
+            [f'Similitud de texto: {score:.2f}' for score in chosen_scores]
+        )
         
         self.logger.info(f"Encontradas {len(matches)} coincidencias por similitud")
         return matches
     
     def _find_value_column(self, df: pd.DataFrame, source: str) -> str:
         """Encontrar columna de valor/monto"""
-        value_keywords = ['valor', 'monto', 'importe', 'total', 'debito', 'credito']
-        
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in value_keywords):
-                return col
-        
-        return None
+        return self.column_roles(df).first('valor')
     
     def _find_date_column(self, df: pd.DataFrame, source: str) -> str:
         """Encontrar columna de fecha"""
-        date_keywords = ['fecha', 'date', 'dia', 'mes', 'año']
-        
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in date_keywords):
-                return col
-        
-        return None
+        return self.column_roles(df).first('fecha')
     
     def _find_description_column(self, df: pd.DataFrame, source: str) -> str:
         """Encontrar columna de descripción"""
-        desc_keywords = ['descripcion', 'concepto', 'detalle', 'observacion']
-        
-        for col in df.columns:
-            if any(keyword in col.lower() for keyword in desc_keywords):
-                return col
-        
-        return None
+        return self.column_roles(df).first('descripcion')
     
-    def _safe_to_numeric(self, value) -> float:
-        """Convertir valor a numérico de forma segura"""
-        if pd.isna(value):
-            return None
+    def _build_nit_blocks(self, dian_df: pd.DataFrame, 
+                          contable_df: pd.DataFrame) -> Optional[Tuple[pd.Series, pd.Series]]:
+        """
+        Calcular el código de bloque por NIT de cada registro DIAN y contable
         
-        try:
-            # Si ya es numérico, retornarlo
-            if isinstance(value, (int, float)):
-                return float(value)
-            
-            # Si es string, intentar convertir
-            if isinstance(value, str):
-                # Limpiar el string (eliminar espacios, comas, etc.)
-                cleaned = str(value).strip().replace(',', '').replace('$', '')
-                
-                # Si el string limpio está vacío o contiene solo letras, retornar None
-                if not cleaned or cleaned.isalpha():
-                    return None
-                
-                return float(cleaned)
+        En DIAN se usa el NIT de la contraparte: el emisor, salvo cuando el emisor es la
+        propia empresa (el NIT más frecuente entre emisor y receptor), en cuyo caso se usa
+        el receptor. Los registros sin NIT (o cuya contraparte sería la propia empresa) reciben
+        WILDCARD_BLOCK: los cruces los comparan con todos los registros del otro lado.
+        
+        Args:
+            dian_df: DataFrame DIAN
+            contable_df: DataFrame contable
             
-            return float(value)
-        except (ValueError, TypeError):
+        Returns:
+            Tuple con (códigos DIAN, códigos contables) indexados como cada DataFrame,
+            o None si no se encuentran las columnas de NIT
+        """
+        dian_roles = self.column_roles(dian_df)
+        contable_roles = self.column_roles(contable_df)
+        dian_emisor_col = dian_roles.first('nit_emisor')
+        dian_receptor_col = dian_roles.first('nit_receptor')
+        contable_nit_col = contable_roles.first('nit_exacto') or contable_roles.first('nit')
+        
+        if not ((dian_emisor_col or dian_receptor_col) and contable_nit_col):
+            self.logger.warning("No se encontraron columnas de NIT, se omite el bloqueo por NIT")
             return None
+        
+        empty_nits = pd.Series('', index=dian_df.index)
+        emisor_nits = normalize_nit(dian_df[dian_emisor_col]) if dian_emisor_col else empty_nits
+        receptor_nits = normalize_nit(dian_df[dian_receptor_col]) if dian_receptor_col else empty_nits
+        
+        # NIT propio: el que más se repite entre emisor y receptor
+        all_nits = pd.concat([emisor_nits, receptor_nits])
+        all_nits = all_nits[all_nits != '']
+        own_nit = all_nits.value_counts().index[0] if not all_nits.empty else None
+        
+        dian_nits = emisor_nits.where((emisor_nits != own_nit) & (emisor_nits != ''), receptor_nits)
+        # Si la contraparte resulta ser la propia empresa, el NIT de la contraparte se desconoce
+        dian_nits = dian_nits.mask(dian_nits == own_nit, '')
+        contable_nits = normalize_nit(contable_df[contable_nit_col])
+        
+        all_nits = pd.concat([dian_nits, contable_nits], ignore_index=True)
+        codes, uniques = pd.factorize(all_nits.mask(all_nits == ''))
+        codes[codes < 0] = WILDCARD_BLOCK
+        dian_codes = pd.Series(codes[:len(dian_nits)], index=dian_df.index)
+        contable_codes = pd.Series(codes[len(dian_nits):], index=contable_df.index)
+        
+        self.logger.info(f"Bloqueo por NIT: {len(uniques)} bloques, {int((codes == WILDCARD_BLOCK).sum())} registros sin NIT "
+                         f"(NIT propio: {own_nit})")
+        return dian_codes, contable_codes
     
-    def _check_value_match(self, value1: float, value2: float, tolerance: float) -> bool:
-        """Verificar si dos valores coinciden dentro de la tolerancia"""
-        if pd.isna(value1) or pd.isna(value2):
-            return False
+    def _parse_amount_array(self, values: pd.Series) -> np.ndarray:
+        """
+        Convertir una columna de valores a float64 una sola vez
         
-        try:
-            val1 = float(value1)
-            val2 = float(value2)
-            
-            if val1 == 0 and val2 == 0:
-                return True
-            
-            if val1 == 0 or val2 == 0:
-                return False
-            
-            difference = abs(val1 - val2) / max(abs(val1), abs(val2))
-            return difference <= tolerance
+        Args:
+            values: Serie con valores monetarios (números o texto como "$ 1.234.567,89")
             
-        except (ValueError, TypeError):
-            return False
+        Returns:
+            Arreglo float64 (NaN para valores no numéricos)
+        """
+        return parse_amounts(values)
     
-    def _check_date_match(self, date1: str, date2: str) -> bool:
-        """Verificar si dos fechas coinciden"""
-        if pd.isna(date1) or pd.isna(date2):
-            return False
+    def _parse_date_array(self, dates: Optional[pd.Series], length: int) -> np.ndarray:
+        """
+        Obtener una columna de fechas como arreglo datetime64
         
-        try:
-            # Intentar convertir a datetime con formato específico
-            def parse_date(date_str):
-                try:
-                    return pd.to_datetime(date_str, format='%d-%m-%Y', errors='coerce')
-                except:
-                    try:
-                        return pd.to_datetime(date_str, format='%d-%m-%Y %H:%M:%S', errors='coerce')
-                    except:
-                        return pd.to_datetime(date_str, dayfirst=True, errors='coerce')
-            
-            dt1 = parse_date(date1)
-            dt2 = parse_date(date2)
-            
-            if pd.isna(dt1) or pd.isna(dt2):
-                return False
-            
-            # Tolerancia de 3 días
-            date_diff = abs((dt1 - dt2).days)
-            return date_diff <= 3
+        Args:
+            dates: Serie con fechas (o None si no hay columna de fecha)
+            length: Número de filas esperado
             
-        except Exception:
-            return False
+        Returns:
+            Arreglo datetime64[ns] (NaT para fechas vacías o inválidas)
+        """
+        if dates is None:
+            return np.full(length, np.datetime64('NaT'), dtype='datetime64[ns]')
+        
+        return self._parse_dates(dates).to_numpy(dtype='datetime64[ns]')
     
     def _create_matches_dataframe(self, dian_df: pd.DataFrame, contable_df: pd.DataFrame, 
-                                matches: List[Dict[str, Any]]) -> pd.DataFrame:
-        """Crear DataFrame con las coincidencias"""
-        if not matches:
-            return pd.DataFrame()
+                                matches: pd.DataFrame) -> pd.DataFrame:
+        """
+        Crear DataFrame con las coincidencias
         
-        match_records = []
+        Cada fila combina el par (índices, tipo, puntaje y motivo) con las columnas del
+        registro DIAN (prefijo dian_) y del registro contable (prefijo contable_).
         
-        for match in matches:
-            dian_idx = match['dian_idx']
-            contable_idx = match['contable_idx']
-            
-            dian_record = dian_df.loc[dian_idx].to_dict()
-            contable_record = contable_df.loc[contable_idx].to_dict()
-            
-            # Combinar registros
-            combined_record = {
-                'source': 'match',
-                'dian_idx': dian_idx,
-                'contable_idx': contable_idx,
-                'match_type': match['match_type'],
-                'match_score': match['match_score'],
-                'match_reason': match['match_reason']
-            }
-            
-            # Agregar columnas DIAN
-            for col, value in dian_record.items():
-                combined_record[f'dian_{col}'] = value
-            
-            # Agregar columnas contables
-            for col, value in contable_record.items():
-                combined_record[f'contable_{col}'] = value
+        Args:
+            dian_df: DataFrame DIAN
+            contable_df: DataFrame contable
+            matches: Pares de coincidencias (ver build_match_frame)
             
-            match_records.append(combined_record)
+        Returns:
+            DataFrame con una fila por coincidencia
+        """
+        if matches.empty:
+            return pd.DataFrame()
+        
+        # Posiciones de cada par (los índices de las coincidencias son etiquetas)
+        dian_positions = dian_df.index.get_indexer(matches['dian_idx'])
+        contable_positions = contable_df.index.get_indexer(matches['contable_idx'])
+        if (dian_positions < 0).any() or (contable_positions < 0).any():
+            raise KeyError("Hay coincidencias con índices que no existen en los DataFrames")
+        
+        pairs = pd.DataFrame({
+            'source': 'match',
+            'dian_idx': matches['dian_idx'].to_numpy(),
+            'contable_idx': matches['contable_idx'].to_numpy(),
+            'match_type': matches['match_type'].to_numpy(),
+            'match_score': matches['match_score'].to_numpy(),
+            'match_reason': matches['match_reason'].to_numpy()
+        })
+        dian_columns = dian_df.take(dian_positions).add_prefix('dian_').reset_index(drop=True)
+        contable_columns = contable_df.take(contable_positions).add_prefix('contable_').reset_index(drop=True)
         
-        return pd.DataFrame(match_records)
+        return self._record_dtypes(pd.concat([pairs, dian_columns, contable_columns], axis=1))
     
     def _create_non_matches_dataframe(self, dian_df: pd.DataFrame, contable_df: pd.DataFrame, 
-                                    matches: List[Dict[str, Any]]) -> pd.DataFrame:
-        """Crear DataFrame con las no coincidencias"""
+                                    matches: pd.DataFrame) -> pd.DataFrame:
+        """
+        Crear DataFrame con las no coincidencias
+        
+        Registros DIAN y contables sin pareja (anti-join por índice), apilados con las
+        columnas 'source' ('DIAN' o 'contable') y 'unmatched_idx' (índice original).
+        
+        Args:
+            dian_df: DataFrame DIAN
+            contable_df: DataFrame contable
+            matches: Pares de coincidencias (ver build_match_frame)
+            
+        Returns:
+            DataFrame con una fila por registro sin pareja (primero DIAN, luego contable)
+        """
+        sides = [
+            (dian_df, ~dian_df.index.isin(matches['dian_idx']), 'DIAN'),
+            (contable_df, ~contable_df.index.isin(matches['contable_idx']), 'contable')
+        ]
+        
         non_matches = []
+        for df, unmatched, source in sides:
+            if not unmatched.any():
+                continue
+            records = df[unmatched]
+            non_matches.append(self._record_dtypes(records.assign(source=source, unmatched_idx=records.index)))
         
-        # Obtener índices emparejados
-        matched_dian_indices = {match['dian_idx'] for match in matches}
-        matched_contable_indices = {match['contable_idx'] for match in matches}
-        
-        # Agregar registros DIAN no emparejados
-        for idx in dian_df.index:
-            if idx not in matched_dian_indices:
-                record = dian_df.loc[idx].to_dict()
-                record['source'] = 'DIAN'
-                record['unmatched_idx'] = idx
-                non_matches.append(record)
-        
-        # Agregar registros contables no emparejados
-        for idx in contable_df.index:
-            if idx not in matched_contable_indices:
-                record = contable_df.loc[idx].to_dict()
-                record['source'] = 'contable'
-                record['unmatched_idx'] = idx
-                non_matches.append(record)
-        
-        return pd.DataFrame(non_matches)
+        if not non_matches:
+            return pd.DataFrame()
+        
+        # Columnas de ambos lados, en orden de aparición (las que faltan en un lado quedan en NaN)
+        return pd.concat(non_matches, ignore_index=True, sort=False).infer_objects()
     
-    def _analyze_discrepancies(self, matches: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Analizar discrepancias en las coincidencias"""
-        discrepancies = []
+    def _record_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Dejar un DataFrame con los tipos que tendría si se construyera fila por fila
         
-        if matches.empty:
-            return discrepancies
+        El texto compacto (category, string) vuelve a object y el resto de los tipos se
+        infiere a partir de los valores.
+        
+        Args:
+            df: DataFrame armado por columnas
+            
+        Returns:
+            DataFrame con los tipos de un DataFrame creado desde registros
+        """
+        compact_columns = [position for position, dtype in enumerate(df.dtypes)
+                           if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))]
+        for position in compact_columns:
+            df.isetitem(position, df.iloc[:, position].astype(object))
+        return df.infer_objects()
+    
+    def _analyze_discrepancies(self, matches: pd.DataFrame) -> pd.DataFrame:
+        """
+        Analizar discrepancias de valor en las coincidencias
+        
+        Cada columna de valor DIAN se compara con cada columna de valor contable sobre los
+        montos parseados una sola vez por columna.
         
+        Args:
+            matches: DataFrame de coincidencias
+            
+        Returns:
+            DataFrame (columnas DISCREPANCY_COLUMNS) con una fila por coincidencia y par de
+            columnas con diferencia distinta de cero, en el orden de las coincidencias
+        """
         # Verificar discrepancias en valores
         value_cols = [col for col in matches.columns if 'valor' in col.lower() or 'monto' in col.lower()]
+        dian_value_cols = [col for col in value_cols if col.startswith('dian_')]
+        contable_value_cols = [col for col in value_cols if col.startswith('contable_')]
+        
+        if matches.empty or not dian_value_cols or not contable_value_cols:
+            return pd.DataFrame(columns=DISCREPANCY_COLUMNS)
+        
+        # Montos parseados: (filas x columnas DIAN) y (filas x columnas contables)
+        dian_amounts = np.column_stack([self._parse_amount_array(matches[col]) for col in dian_value_cols])
+        contable_amounts = np.column_stack([self._parse_amount_array(matches[col]) for col in contable_value_cols])
+        
+        # Diferencias de todos los pares (fila, columna DIAN, columna contable) aplanadas por
+        # fila; los montos no numéricos dan NaN y no cuentan como discrepancia
+        differences = np.abs(dian_amounts[:, :, np.newaxis] - contable_amounts[:, np.newaxis, :])
+        differences = differences.reshape(len(matches), -1)
+        with np.errstate(invalid='ignore'):
+            rows, pairs = np.nonzero(differences > 0)
+        
+        dian_positions, contable_positions = np.divmod(pairs, len(contable_value_cols))
+        
+        def gathered(column: str, default: Any) -> np.ndarray:
+            if column in matches.columns:
+                return matches[column].to_numpy(dtype=object)[rows]
+            return np.full(len(rows), default, dtype=object)
+        
+        return pd.DataFrame({
+            'type': 'value_discrepancy',
+            'dian_idx': gathered('dian_idx', None),
+            'contable_idx': gathered('contable_idx', None),
+            'dian_value': matches[dian_value_cols].to_numpy(dtype=object)[rows, dian_positions],
+            'contable_value': matches[contable_value_cols].to_numpy(dtype=object)[rows, contable_positions],
+            'difference': differences[rows, pairs],
+            'match_score': gathered('match_score', 0)
+        }, columns=DISCREPANCY_COLUMNS)
+    
+    def _first_present_values(self, df: pd.DataFrame, columns: List[str]) -> pd.Series:
+        """
+        Primer valor presente (no nulo ni en blanco) de varias columnas candidatas, por fila
         
-        for _, match in matches.iterrows():
-            dian_value_cols = [col for col in value_cols if col.startswith('dian_')]
-            contable_value_cols = [col for col in value_cols if col.startswith('contable_')]
+        Si ninguna columna tiene valor se conserva el de la última; los valores vacíos y
+        cero quedan como ''.
+        
+        Args:
+            df: DataFrame con los registros
+            columns: Columnas candidatas en orden de prioridad
             
-            for dian_col in dian_value_cols:
-                for contable_col in contable_value_cols:
-                    dian_value = match[dian_col]
-                    contable_value = match[contable_col]
-                    
-                    if not pd.isna(dian_value) and not pd.isna(contable_value):
-                        try:
-                            numeric_dian = self._safe_to_numeric(dian_value)
-                            numeric_contable = self._safe_to_numeric(contable_value)
-                            if numeric_dian is not None and numeric_contable is not None:
-                                diff = abs(numeric_dian - numeric_contable)
-                            else:
-                                continue
-                            if diff > 0:
-                                discrepancy = {
-                                    'type': 'value_discrepancy',
-                                    'dian_idx': match.get('dian_idx'),
-                                    'contable_idx': match.get('contable_idx'),
-                                    'dian_value': dian_value,
-                                    'contable_value': contable_value,
-                                    'difference': diff,
-                                    'match_score': match.get('match_score', 0)
-                                }
-                                discrepancies.append(discrepancy)
-                        except (ValueError, TypeError):
-                            continue
-        
-        return discrepancies
+        Returns:
+            Serie con el índice de df
+        """
+        if not columns:
+            return pd.Series('', index=df.index, dtype=object)
+        
+        candidates = df[columns].astype(object)
+        present = (candidates.notna() & candidates.apply(lambda column: column.astype(str).str.strip() != '')).to_numpy()
+        
+        # Posición de la primera columna presente (la última si ninguna lo está)
+        positions = np.where(present.any(axis=1), present.argmax(axis=1), len(columns) - 1)
+        values = pd.Series(candidates.to_numpy()[np.arange(len(candidates)), positions],
+                           index=df.index, dtype=object)
+        
+        return values.mask(values.isin(['', 0]), '')
+    
+    def _first_nonzero_amount(self, df: pd.DataFrame, columns: List[str]) -> pd.Series:
+        """
+        Primer monto distinto de cero de varias columnas candidatas, por fila
+        
+        Args:
+            df: DataFrame con los registros
+            columns: Columnas de valor en orden de prioridad
+            
+        Returns:
+            Serie float64 con el índice de df (0.0 si ninguna columna tiene monto)
+        """
+        if not columns:
+            return pd.Series(0.0, index=df.index)
+        
+        amounts = pd.DataFrame({position: self._parse_amount_array(df[col]) for position, col in enumerate(columns)},
+                               index=df.index)
+        return amounts.where(amounts.ne(0)).bfill(axis=1).iloc[:, 0].fillna(0.0)
+    
+    def _clean_reference_values(self, values: pd.Series) -> pd.Series:
+        """
+        Convertir una columna de referencias (documento cruce) a texto limpio
+        
+        Args:
+            values: Columna de referencias
+            
+        Returns:
+            Serie de texto sin espacios en los extremos; vacíos, nulos, '0', 'nan' y
+            'none' quedan como ''
+        """
+        text = values.astype(object).astype(str).str.strip()
+        empty = values.isna() | text.str.lower().isin(['0', 'nan', 'none', ''])
+        return text.mask(empty, '')
     
     def get_file_info(self) -> Dict[str, Any]:
         """
@@ -1736,6 +2314,7 @@ class CausacionProcessor:
         self.contable_data = None
         self.dian_file_path = None
         self.contable_file_path = None
+        self.contable_cx_column = None
         self.logger.info("Datos del procesador limpiados")
 
     def create_coincidencias_dataframe(self, matches: pd.DataFrame) -> pd.DataFrame:
@@ -1757,50 +2336,35 @@ class CausacionProcessor:
             
             # Crear DataFrame de coincidencias con estructura simplificada
             coincidencias = pd.DataFrame()
-            
-            # Buscar columna de NIT en los datos originales
-            nit_column = None
-            for col in matches.columns:
-                if 'nit' in col.lower() or 'identificacion' in col.lower() or 'cedula' in col.lower():
-                    nit_column = col
-                    break
+            roles = self.column_roles(matches)
             
             # Solo las 5 columnas solicitadas
             # Buscar NIT (priorizar NIT Receptor de DIAN)
             nit_values = []
-            for col in matches.columns:
-                col_lower = col.lower()
-                if 'nit' in col_lower and 'receptor' in col_lower:
-                    nit_values = matches[col].fillna('').astype(str)
-                    break
-            if len(nit_values) == 0:
-                for col in matches.columns:
-                    col_lower = col.lower()
-                    if 'nit' in col_lower:
-                        nit_values = matches[col].fillna('').astype(str)
-                        break
+            nit_col = roles.first('nit_receptor') or roles.first('nit')
+            if nit_col is not None:
+                nit_values = matches[nit_col].fillna('').astype(str)
             coincidencias['NIT'] = nit_values if len(nit_values) > 0 else ''
             
             # Buscar la columna correcta de documento cruce
             # PRIORIDAD 1: Usar columna CX (índice 90) del DataFrame contable original si está disponible
             documento_cruce_values = pd.Series([''] * len(matches), dtype=str)
             
-            if self.contable_data is not None and len(self.contable_data.columns) > 90:
+            cx_col_name = self.contable_cx_column
+            if cx_col_name is None and self.contable_data is not None and len(self.contable_data.columns) > 90:
+                cx_col_name = self.contable_data.columns[90]
+            
+            if self.contable_data is not None and cx_col_name in self.contable_data.columns:
                 try:
                     # Intentar usar la columna CX (índice 90) del DataFrame contable original
-                    cx_col_name = self.contable_data.columns[90]
                     self.logger.info(f"Usando columna CX (índice 90) por defecto: '{cx_col_name}'")
                     
-                    # Extraer valores usando los índices contables de matches
+                    # Extraer valores con las posiciones contables de las coincidencias (una sola lectura)
                     if 'contable_idx' in matches.columns:
-                        for idx, row in matches.iterrows():
-                            contable_idx = row['contable_idx']
-                            if pd.notna(contable_idx) and contable_idx in self.contable_data.index:
-                                valor = self.contable_data.loc[contable_idx, cx_col_name]
-                                if pd.notna(valor):
-                                    str_valor = str(valor).strip()
-                                    if str_valor and str_valor.lower() not in ['0', 'nan', 'none', '']:
-                                        documento_cruce_values.at[idx] = str_valor
+                        positions = self.contable_data.index.get_indexer(matches['contable_idx'])
+                        found = np.flatnonzero(positions >= 0)
+                        cx_values = self.contable_data[cx_col_name].take(positions[found])
+                        documento_cruce_values.iloc[found] = self._clean_reference_values(cx_values).to_numpy()
                     
                     self.logger.info(f"Valores DOCUMENTO CRUCE extraídos de columna CX: {documento_cruce_values[documento_cruce_values != ''].count()} con valores")
                 except Exception as e:
@@ -1808,47 +2372,23 @@ class CausacionProcessor:
             
             # PRIORIDAD 2: Si no se encontraron valores en CX, buscar por nombre "NÚMERO DE DOCUMENTO CRUCE"
             if documento_cruce_values[documento_cruce_values != ''].count() == 0:
-                documento_cruce_col = None
-                
-                # Normalizar nombres de columnas para comparación (sin tildes, espacios, mayúsculas)
-                def normalize_col_name(col_name):
-                    """Normalizar nombre de columna para comparación"""
-                    import unicodedata
-                    # Convertir a minúsculas y quitar tildes
-                    normalized = unicodedata.normalize('NFD', str(col_name).lower())
-                    normalized = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
-                    # Reemplazar espacios y guiones bajos
-                    normalized = normalized.replace(' ', '_').replace('-', '_')
-                    return normalized
-                
-                target_normalized = normalize_col_name("NÚMERO DE DOCUMENTO CRUCE")
-                
+                # Nombres comparados sin tildes, espacios ni mayúsculas
                 # Buscar específicamente "NÚMERO DE DOCUMENTO CRUCE" con prefijo contable_
-                for col in matches.columns:
-                    col_normalized = normalize_col_name(col)
-                    # Buscar columna que tenga "numero", "documento" y "cruce" con prefijo contable_
-                    if 'contable_' in col_normalized and target_normalized in col_normalized:
-                        documento_cruce_col = col
-                        self.logger.info(f"Columna DOCUMENTO CRUCE encontrada por nombre normalizado: {col}")
-                        break
+                documento_cruce_col = roles.first('documento_cruce_contable')
+                if documento_cruce_col is not None:
+                    self.logger.info(f"Columna DOCUMENTO CRUCE encontrada por nombre normalizado: {documento_cruce_col}")
                 
                 # Si no se encontró con prefijo contable_, buscar sin prefijo pero que contenga "cruce"
                 if documento_cruce_col is None:
-                    for col in matches.columns:
-                        col_normalized = normalize_col_name(col)
-                        if target_normalized in col_normalized or ('numero' in col_normalized and 'documento' in col_normalized and 'cruce' in col_normalized):
-                            documento_cruce_col = col
-                            self.logger.info(f"Columna DOCUMENTO CRUCE encontrada (sin prefijo): {col}")
-                            break
+                    documento_cruce_col = roles.first('documento_cruce_normalizado')
+                    if documento_cruce_col is not None:
+                        self.logger.info(f"Columna DOCUMENTO CRUCE encontrada (sin prefijo): {documento_cruce_col}")
                 
                 # Si aún no se encontró, buscar cualquier columna de documento contable que pueda servir
                 if documento_cruce_col is None:
-                    for col in matches.columns:
-                        col_normalized = normalize_col_name(col)
-                        if 'contable_' in col_normalized and 'numero' in col_normalized and 'documento' in col_normalized:
-                            documento_cruce_col = col
-                            self.logger.info(f"Columna DOCUMENTO CRUCE encontrada (fallback): {col}")
-                            break
+                    documento_cruce_col = roles.first('documento_contable_normalizado')
+                    if documento_cruce_col is not None:
+                        self.logger.info(f"Columna DOCUMENTO CRUCE encontrada (fallback): {documento_cruce_col}")
                 
                 # Extraer valores de la columna encontrada
                 if documento_cruce_col is not None:
@@ -1864,46 +2404,23 @@ class CausacionProcessor:
             
             # Buscar Folio DIAN
             folio_values = []
-            for col in matches.columns:
-                col_lower = col.lower()
-                if 'folio' in col_lower and 'dian' in col_lower:
-                    folio_values = matches[col].fillna('').astype(str)
-                    break
-            if len(folio_values) == 0:
-                for col in matches.columns:
-                    if 'folio' in col.lower():
-                        folio_values = matches[col].fillna('').astype(str)
-                        break
+            folio_col = roles.first('folio_dian') or roles.first('folio')
+            if folio_col is not None:
+                folio_values = matches[folio_col].fillna('').astype(str)
             coincidencias['FOLIO'] = folio_values if len(folio_values) > 0 else ''
             
             # Buscar Valor Total DIAN
             valor_values = []
-            for col in matches.columns:
-                col_lower = col.lower()
-                if ('total' in col_lower or 'valor' in col_lower) and 'dian' in col_lower:
-                    valor_values = pd.to_numeric(matches[col], errors='coerce').fillna(0.0)
-                    break
-            if len(valor_values) == 0:
-                for col in matches.columns:
-                    col_lower = col.lower()
-                    if 'total' in col_lower or ('valor' in col_lower and 'iva' not in col_lower):
-                        valor_values = pd.to_numeric(matches[col], errors='coerce').fillna(0.0)
-                        break
+            valor_col = roles.first('valor_dian') or roles.first('valor_reporte')
+            if valor_col is not None:
+                valor_values = pd.Series(self._parse_amount_array(matches[valor_col]), index=matches.index).fillna(0.0)
             coincidencias['VALOR'] = valor_values if len(valor_values) > 0 else 0.0
             
             # Buscar Nombre/Descripción
             nombre_values = []
-            for col in matches.columns:
-                col_lower = col.lower()
-                if ('descripcion' in col_lower or 'descripción' in col_lower) and 'dian' in col_lower:
-                    nombre_values = matches[col].fillna('').astype(str)
-                    break
-            if len(nombre_values) == 0:
-                for col in matches.columns:
-                    col_lower = col.lower()
-                    if 'descripcion' in col_lower or 'nombre' in col_lower or 'razon' in col_lower:
-                        nombre_values = matches[col].fillna('').astype(str)
-                        break
+            nombre_col = roles.first('descripcion_dian') or roles.first('nombre_reporte')
+            if nombre_col is not None:
+                nombre_values = matches[nombre_col].fillna('').astype(str)
             coincidencias['NOMBRE'] = nombre_values if len(nombre_values) > 0 else ''
             
             # Ordenar por folio
@@ -1936,156 +2453,61 @@ class CausacionProcessor:
                 return pd.DataFrame(columns=['NIT', 'DOCUMENTO CRUCE', 'FOLIO', 'VALOR', 'NOMBRE'])
             
             # Crear DataFrame de no coincidencias con estructura simplificada
-            no_coincidencias = pd.DataFrame()
+            sheets = []
             
             # Identificar registros DIAN sin contraparte
-            dian_only = non_matches[non_matches['source'] == 'DIAN'].copy()
-            contable_only = non_matches[non_matches['source'] == 'contable'].copy()
+            dian_only = non_matches[non_matches['source'] == 'DIAN']
+            contable_only = non_matches[non_matches['source'] == 'contable']
             
-            # Procesar registros DIAN sin contraparte
+            # Procesar registros DIAN sin contraparte: columnas candidatas de cada campo
+            # resueltas una vez (con prefijos posibles) y primer valor presente por fila
             if not dian_only.empty:
-                dian_records = []
-                for idx, row in dian_only.iterrows():
-                    # Buscar columna de NIT (con prefijos posibles)
-                    nit_value = ''
-                    for col in row.index:
-                        col_lower = col.lower()
-                        if ('nit' in col_lower or 'identificacion' in col_lower or 'cedula' in col_lower) and 'receptor' not in col_lower:
-                            nit_value = row.get(col, '')
-                            if pd.notna(nit_value) and str(nit_value).strip():
-                                break
-                    
-                    # Buscar Folio (con prefijos posibles)
-                    folio_value = ''
-                    for col in row.index:
-                        if 'folio' in col.lower():
-                            folio_value = row.get(col, '')
-                            if pd.notna(folio_value) and str(folio_value).strip():
-                                break
-                    
-                    # Buscar Valor (con prefijos posibles)
-                    valor_value = 0.0
-                    for col in row.index:
-                        col_lower = col.lower()
-                        if ('total' in col_lower or 'valor' in col_lower or 'monto' in col_lower) and 'iva' not in col_lower:
-                            valor_value = pd.to_numeric(row.get(col, 0.0), errors='coerce')
-                            if pd.notna(valor_value) and valor_value != 0:
-                                break
-                    
-                    # Buscar Nombre/Descripción (con prefijos posibles)
-                    nombre_value = ''
-                    for col in row.index:
-                        col_lower = col.lower()
-                        if ('descripcion' in col_lower or 'nombre' in col_lower or 'razon' in col_lower or 'social' in col_lower):
-                            nombre_value = row.get(col, '')
-                            if pd.notna(nombre_value) and str(nombre_value).strip():
-                                break
-                    
-                    record = {
-                        'NIT': nit_value if nit_value else '',
-                        'DOCUMENTO CRUCE': '',
-                        'FOLIO': folio_value if folio_value else '',
-                        'VALOR': valor_value if pd.notna(valor_value) else 0.0,
-                        'NOMBRE': nombre_value if nombre_value else ''
-                    }
-                    dian_records.append(record)
-                
-                if dian_records:
-                    dian_df = pd.DataFrame(dian_records)
-                    no_coincidencias = pd.concat([no_coincidencias, dian_df], ignore_index=True)
+                dian_roles = self.column_roles(dian_only)
+                sheets.append(pd.DataFrame({
+                    'NIT': self._first_present_values(dian_only, dian_roles.columns_for('identificacion_emisor')),
+                    'DOCUMENTO CRUCE': '',
+                    'FOLIO': self._first_present_values(dian_only, dian_roles.columns_for('folio')),
+                    'VALOR': self._first_nonzero_amount(dian_only, dian_roles.columns_for('monto_dian')),
+                    'NOMBRE': self._first_present_values(dian_only, dian_roles.columns_for('nombre_dian'))
+                }, index=dian_only.index))
             
             # Procesar registros contables sin contraparte
             if not contable_only.empty:
                 # Logging para debug: mostrar columnas disponibles
                 self.logger.info(f"Procesando {len(contable_only)} registros contables sin contraparte")
-                if len(contable_only) > 0:
-                    sample_cols = [col for col in contable_only.columns if any(kw in col.lower() for kw in ['numero', 'documento', 'cruce'])]
-                    self.logger.info(f"Columnas relacionadas con documento cruce encontradas: {sample_cols[:5]}")
-                
-                contable_records = []
-                documento_cruce_col_found = None
+                contable_roles = self.column_roles(contable_only)
+                sample_cols = contable_roles.columns_for('referencia_documento')
+                self.logger.info(f"Columnas relacionadas con documento cruce encontradas: {sample_cols[:5]}")
                 
                 # Primero, identificar la columna de documento cruce una sola vez
-                for col in contable_only.columns:
-                    col_lower = col.lower()
-                    # Buscar específicamente "NÚMERO DE DOCUMENTO CRUCE" o variaciones
-                    if ('numero' in col_lower and 'documento' in col_lower and 'cruce' in col_lower) or \
-                       ('numero_de_documento_cruce' in col_lower.replace(' ', '_')):
-                        documento_cruce_col_found = col
-                        self.logger.info(f"Columna DOCUMENTO CRUCE encontrada: '{col}'")
-                        break
+                # (específicamente "NÚMERO DE DOCUMENTO CRUCE" o variaciones)
+                documento_cruce_col_found = contable_roles.first('documento_cruce')
+                if documento_cruce_col_found is not None:
+                    self.logger.info(f"Columna DOCUMENTO CRUCE encontrada: '{documento_cruce_col_found}'")
                 
                 # Si no se encontró con "cruce", buscar "NÚMERO DE DOCUMENTO" como fallback
                 if documento_cruce_col_found is None:
-                    for col in contable_only.columns:
-                        col_lower = col.lower()
-                        if 'numero' in col_lower and 'documento' in col_lower and 'cruce' not in col_lower:
-                            documento_cruce_col_found = col
-                            self.logger.info(f"Columna DOCUMENTO encontrada (sin cruce): '{col}'")
-                            break
+                    documento_cruce_col_found = contable_roles.first('numero_documento')
+                    if documento_cruce_col_found is not None:
+                        self.logger.info(f"Columna DOCUMENTO encontrada (sin cruce): '{documento_cruce_col_found}'")
                 
-                for idx, row in contable_only.iterrows():
-                    # Buscar columna de NIT (con prefijos posibles)
-                    nit_value = ''
-                    for col in row.index:
-                        col_lower = col.lower()
-                        if 'nit' in col_lower or 'identificacion' in col_lower or 'cedula' in col_lower:
-                            nit_value = row.get(col, '')
-                            if pd.notna(nit_value) and str(nit_value).strip():
-                                break
-                    
-                    # Buscar DOCUMENTO CRUCE usando la columna identificada
-                    documento_cruce_value = ''
-                    if documento_cruce_col_found:
-                        raw_value = row.get(documento_cruce_col_found, '')
-                        if pd.notna(raw_value):
-                            str_value = str(raw_value).strip()
-                            # Aceptar el valor si no está vacío y no es '0' o 'nan'
-                            if str_value and str_value.lower() not in ['0', 'nan', 'none', '']:
-                                documento_cruce_value = str_value
-                    else:
-                        # Fallback: buscar en cada fila si no se encontró la columna
-                        for col in row.index:
-                            col_lower = col.lower()
-                            if ('numero' in col_lower and 'documento' in col_lower and 'cruce' in col_lower) or \
-                               ('numero_de_documento_cruce' in col_lower.replace(' ', '_')):
-                                raw_value = row.get(col, '')
-                                if pd.notna(raw_value):
-                                    str_value = str(raw_value).strip()
-                                    if str_value and str_value.lower() not in ['0', 'nan', 'none', '']:
-                                        documento_cruce_value = str_value
-                                        break
-                    
-                    # Buscar Valor
-                    valor_value = 0.0
-                    for col in row.index:
-                        col_lower = col.lower()
-                        if ('valor' in col_lower or 'monto' in col_lower or 'debito' in col_lower or 'credito' in col_lower) and 'iva' not in col_lower:
-                            valor_value = pd.to_numeric(row.get(col, 0.0), errors='coerce')
-                            if pd.notna(valor_value) and valor_value != 0:
-                                break
-                    
-                    # Buscar Nombre/Descripción
-                    nombre_value = ''
-                    for col in row.index:
-                        col_lower = col.lower()
-                        if ('descripcion' in col_lower or 'nombre' in col_lower or 'detalle' in col_lower or 'concepto' in col_lower):
-                            nombre_value = row.get(col, '')
-                            if pd.notna(nombre_value) and str(nombre_value).strip():
-                                break
-                    
-                    record = {
-                        'NIT': nit_value if nit_value else '',
-                        'DOCUMENTO CRUCE': documento_cruce_value if documento_cruce_value and str(documento_cruce_value) != '0' else '',
-                        'FOLIO': '',
-                        'VALOR': valor_value if pd.notna(valor_value) else 0.0,
-                        'NOMBRE': nombre_value if nombre_value else ''
-                    }
-                    contable_records.append(record)
+                # Aceptar el documento cruce si no está vacío y no es '0' o 'nan'
+                if documento_cruce_col_found is not None:
+                    documento_cruce_values = self._clean_reference_values(contable_only[documento_cruce_col_found])
+                else:
+                    documento_cruce_values = ''
                 
-                if contable_records:
-                    contable_df = pd.DataFrame(contable_records)
-                    no_coincidencias = pd.concat([no_coincidencias, contable_df], ignore_index=True)
+                sheets.append(pd.DataFrame({
+                    'NIT': self._first_present_values(contable_only, contable_roles.columns_for('identificacion')),
+                    'DOCUMENTO CRUCE': documento_cruce_values,
+                    'FOLIO': '',
+                    'VALOR': self._first_nonzero_amount(contable_only, contable_roles.columns_for('monto_contable')),
+                    'NOMBRE': self._first_present_values(contable_only, contable_roles.columns_for('nombre_contable'))
+                }, index=contable_only.index))
+            
+            # Tipos inferidos a partir de los valores de cada fuente
+            sheets = [sheet.infer_objects() for sheet in sheets]
+            no_coincidencias = pd.concat(sheets, ignore_index=True) if sheets else pd.DataFrame()
             
             # Si no hay registros, crear DataFrame vacío con estructura correcta
             if no_coincidencias.empty:
@@ -2242,36 +2664,71 @@ class CausacionProcessor:
             self.logger.error(f"Error al calcular estadísticas: {e}")
             raise Exception(f"Error al calcular estadísticas: {e}")
 
-    def _evaluate_match_quality(self, row: pd.Series) -> str:
+    def _evaluate_match_quality(self, coincidencias: pd.DataFrame) -> pd.Series:
         """
-        Evaluar la calidad de una coincidencia basada en diferencias de valor y fecha
+        Evaluar la calidad de las coincidencias basada en diferencias de valor y fecha
+        
+        El flujo simplificado no la usa: la hoja de coincidencias no tiene columnas de
+        diferencia. Aplica a DataFrames con el formato detallado.
         
         Args:
-            row: Fila del DataFrame de coincidencias
+            coincidencias: DataFrame de coincidencias con 'DIFERENCIA VALOR' y 'DIFERENCIA FECHA'
             
         Returns:
-            Estado de validación: 'Perfecta', 'Buena', 'Regular', 'Revisar'
+            Serie categórica (categorías MATCH_QUALITY_GRADES) con el estado de validación de
+            cada fila: 'Perfecta', 'Buena', 'Regular', 'Revisar'
         """
         try:
-            diff_valor = abs(row['DIFERENCIA VALOR'])
-            diff_fecha = abs(row['DIFERENCIA FECHA'])
+            diff_valor, diff_fecha = self._match_differences(coincidencias)
+        except KeyError:
+            diff_valor = diff_fecha = np.full(len(coincidencias), np.nan)
+        
+        # Las diferencias no numéricas (NaN) no cumplen ningún umbral y quedan en 'Revisar'
+        grades = np.select(
+            [
+                (diff_valor <= 0.01) & (diff_fecha == 0),
+                (diff_valor <= 1.0) & (diff_fecha <= 1),
+                (diff_valor <= 10.0) & (diff_fecha <= 7)
+            ],
+            MATCH_QUALITY_GRADES[:3],
+            default='Revisar'
+        )
+        return pd.Series(pd.Categorical(grades, categories=MATCH_QUALITY_GRADES),
+                         index=coincidencias.index, name='CALIDAD')
+
+    def _match_differences(self, coincidencias: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Diferencias absolutas de valor y de fecha de las coincidencias
+        
+        Solo cuentan los valores numéricos: el texto (aunque sea '5') y los demás tipos dan
+        NaN y la coincidencia queda en 'Revisar'.
+        
+        Args:
+            coincidencias: DataFrame de coincidencias
             
-            if diff_valor <= 0.01 and diff_fecha == 0:
-                return 'Perfecta'
-            elif diff_valor <= 1.0 and diff_fecha <= 1:
-                return 'Buena'
-            elif diff_valor <= 10.0 and diff_fecha <= 7:
-                return 'Regular'
-            else:
-                return 'Revisar'
-                
-        except Exception:
-            return 'Revisar'
+        Returns:
+            Tupla (diferencia de valor, diferencia de fecha) como arreglos float64
+        """
+        return (np.abs(self._numeric_difference_array(coincidencias['DIFERENCIA VALOR'])),
+                np.abs(self._numeric_difference_array(coincidencias['DIFERENCIA FECHA'])))
+
+    def _numeric_difference_array(self, values: pd.Series) -> np.ndarray:
+        """Columna de diferencias como float64 (NaN para valores que no son números)"""
+        if not pd.api.types.is_numeric_dtype(values):
+            is_number = values.map(lambda value: isinstance(value, numbers.Number)).to_numpy(dtype=bool)
+            values = pd.to_numeric(values.where(is_number), errors='coerce')
+        return values.to_numpy(dtype=float, na_value=np.nan)
 
     def _add_detailed_non_match_reasons(self, no_coincidencias: pd.DataFrame) -> pd.DataFrame:
         """
         Agregar motivos detallados de no coincidencia basados en análisis de datos
         
+        Los motivos salen de NON_MATCH_REASON_RULES: todas las reglas se evalúan por
+        columnas y np.select asigna a cada fila el motivo de la primera regla que cumple.
+        
+        El flujo simplificado no la usa: la hoja de no coincidencias no tiene ORIGEN ni
+        MOTIVO NO COINCIDENCIA. Aplica a DataFrames con el formato detallado.
+        
         Args:
             no_coincidencias: DataFrame de no coincidencias
             
@@ -2282,16 +2739,24 @@ class CausacionProcessor:
             # Crear copia para no modificar el original
             df = no_coincidencias.copy()
             
-            # Analizar motivos específicos
-            for idx, row in df.iterrows():
-                if row['ORIGEN'] == 'DIAN':
-                    # Analizar posibles motivos para registros DIAN sin contraparte
-                    motivo = self._analyze_dian_non_match_reason(row)
-                    df.at[idx, 'MOTIVO NO COINCIDENCIA'] = motivo
-                elif row['ORIGEN'] == 'CONTABLE':
-                    # Analizar posibles motivos para registros contables sin contraparte
-                    motivo = self._analyze_contable_non_match_reason(row)
-                    df.at[idx, 'MOTIVO NO COINCIDENCIA'] = motivo
+            conditions = []
+            reasons = []
+            for origen, reason_rules in NON_MATCH_REASON_RULES.items():
+                is_origen = (df['ORIGEN'] == origen).to_numpy()
+                for rule in self._non_match_reason_rules(df, reason_rules):
+                    conditions.append(is_origen & self._non_match_rule_mask(df, rule))
+                    reasons.append(rule['reason'])
+                # Motivo genérico si no se encuentra causa específica
+                conditions.append(is_origen)
+                reasons.append(reason_rules['default'])
+            
+            if not conditions:
+                return df
+            
+            # Las filas de otros orígenes conservan su motivo
+            current = df['MOTIVO NO COINCIDENCIA'] if 'MOTIVO NO COINCIDENCIA' in df.columns else np.nan
+            motivos = pd.Series(np.select(conditions, reasons, default=''), index=df.index, dtype=object)
+            df['MOTIVO NO COINCIDENCIA'] = motivos.where(np.logical_or.reduce(conditions), current)
             
             return df
             
@@ -2299,75 +2764,51 @@ class CausacionProcessor:
             self.logger.warning(f"Error al agregar motivos detallados: {e}")
             return no_coincidencias
 
-    def _analyze_dian_non_match_reason(self, row: pd.Series) -> str:
+    def _non_match_reason_rules(self, df: pd.DataFrame, reason_rules: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Analizar motivo específico para registro DIAN sin contraparte
+        Reglas de motivo aplicables a un DataFrame
         
         Args:
-            row: Fila del DataFrame de no coincidencias
+            df: DataFrame de no coincidencias
+            reason_rules: Entrada de NON_MATCH_REASON_RULES de un origen
             
         Returns:
-            Motivo específico de no coincidencia
+            Reglas en orden, o lista vacía si falta alguna de sus columnas
         """
-        try:
-            folio = str(row['FOLIO DIAN']).strip()
-            valor = self._safe_to_numeric(row['VALOR DIAN'])
-            fecha = str(row['FECHA DIAN'])
-            
-            # Verificar si el folio tiene formato válido
-            if not folio or folio == 'nan':
-                return 'Folio DIAN vacío o inválido'
-            
-            # Verificar si el valor es muy alto o muy bajo (posible error)
-            if valor > 1000000000:  # Más de 1 billón
-                return 'Valor DIAN extremadamente alto (posible error)'
-            elif valor < 0:
-                return 'Valor DIAN negativo'
-            
-            # Verificar formato de fecha
-            if not fecha or fecha == 'nan':
-                return 'Fecha DIAN vacía o inválida'
-            
-            # Motivo genérico si no se encuentra causa específica
-            return 'Registro DIAN sin contraparte contable'
-            
-        except Exception:
-            return 'Registro DIAN sin contraparte contable'
+        rules = reason_rules['rules']
+        if any(rule['column'] not in df.columns for rule in rules):
+            return []
+        return rules
 
-    def _analyze_contable_non_match_reason(self, row: pd.Series) -> str:
+    def _non_match_rule_mask(self, df: pd.DataFrame, rule: Dict[str, Any]) -> np.ndarray:
         """
-        Analizar motivo específico para registro contable sin contraparte
+        Evaluar una regla de motivo sobre todas las filas
         
         Args:
-            row: Fila del DataFrame de no coincidencias
+            df: DataFrame de no coincidencias
+            rule: Regla de NON_MATCH_REASON_RULES
             
         Returns:
-            Motivo específico de no coincidencia
-        """
-        try:
-            numero_doc = str(row['NÚMERO DOCUMENTO CRUCE']).strip()
-            valor = self._safe_to_numeric(row['VALOR CONTABLE'])
-            fecha = str(row['FECHA CONTABLE'])
-            
-            # Verificar si el número de documento tiene formato válido
-            if not numero_doc or numero_doc == 'nan':
-                return 'Número de documento contable vacío o inválido'
-            
-            # Verificar si el valor es muy alto o muy bajo (posible error)
-            if valor > 1000000000:  # Más de 1 billón
-                return 'Valor contable extremadamente alto (posible error)'
-            elif valor < 0:
-                return 'Valor contable negativo'
-            
-            # Verificar formato de fecha
-            if not fecha or fecha == 'nan':
-                return 'Fecha contable vacía o inválida'
-            
-            # Motivo genérico si no se encuentra causa específica
-            return 'Registro contable sin contraparte DIAN'
-            
-        except Exception:
-            return 'Registro contable sin contraparte DIAN'
+            Arreglo booleano con las filas que cumplen la regla
+        """
+        values = df[rule['column']]
+        test = rule['test']
+        
+        if test == 'blank':
+            text = values.astype(str)
+            if rule.get('strip'):
+                text = text.str.strip()
+            return text.isin(['', 'nan']).to_numpy()
+        
+        amounts = self._parse_amount_array(values)
+        if test == 'not_amount':
+            return np.isnan(amounts)
+        if test == 'above':
+            return amounts > rule['limit']
+        if test == 'below':
+            return amounts < rule['limit']
+        
+        raise ValueError(f"Prueba de motivo desconocida: {test}")
 
     def _calculate_overall_quality(self, stats: Dict[str, Any]) -> str:
         """
@@ -4566,4 +5007,35 @@ class CausacionProcessor:
             'num_format': '#,##0.00',
             'border': 1,
             'align': 'right'
-        })
\ No newline at end of file
+        })
+
+
+def _load_file_worker(kind: str, file_path: Path, settings: Dict[str, Any]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Cargar un archivo DIAN o contable en un proceso de trabajo
+    
+    Args:
+        kind: 'dian' o 'contable'
+        file_path: Ruta del archivo
+        settings: Atributos de configuración del procesador que lanza la carga
+        
+    Returns:
+        Tuple con (DataFrame cargado, estado adicional del procesador)
+    """
+    processor = CausacionProcessor()
+    for name, value in settings.items():
+        setattr(processor, name, value)
+    
+    # El RSS de la carga se mide en el proceso que la ejecuta y se devuelve con el estado
+    if kind == 'dian':
+        with processor.memory_tracker.stage("Carga DIAN"):
+            df = processor.load_dian_file(file_path)
+        return df, {'cleaning_reports': processor.cleaning_reports,
+                    'memory_stages': processor.memory_tracker.stages}
+    
+    with processor.memory_tracker.stage("Carga contable"):
+        df = processor.load_contable_file(file_path)
+    return df, {'contable_cx_column': processor.contable_cx_column,
+                'contable_layout': processor.contable_layout,
+                'cleaning_reports': processor.cleaning_reports,
+                'memory_stages': processor.memory_tracker.stages}
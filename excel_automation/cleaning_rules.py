@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reglas de Limpieza Configurables
+Filtros, normalizaciones y conversiones de tipo por fuente, definidos en un archivo JSON
+y compilados en un plan vectorizado
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Reglas por defecto (se incluyen en el ejecutable junto con resources/)
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / 'resources' / 'cleaning_rules.json'
+
+RULE_KINDS = ('normalize', 'filter', 'coerce')
+RULE_STAGES = ('raw', 'clean')
+NORMALIZE_OPS = ('str', 'strip', 'upper', 'lower')
+MATCH_MODES = ('search', 'fullmatch')
+
+# Conversiones de tipo incluidas; el procesador puede registrar otras (p. ej. 'fecha')
+BUILTIN_COERCIONS: Dict[str, Callable[[pd.Series], pd.Series]] = {
+    'string': lambda values: values.astype(str).str.strip(),
+}
+
+
+def load_cleaning_rules(path: Optional[str | Path] = None) -> Dict[str, Any]:
+    """
+    Cargar un archivo de reglas de limpieza
+
+    Args:
+        path: Ruta del archivo JSON (None = reglas por defecto)
+
+    Returns:
+        Diccionario con las reglas por fuente ('dian', 'contable')
+    """
+    path = Path(path) if path is not None else DEFAULT_RULES_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            rules = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"No se pudo leer el archivo de reglas de limpieza {path}: {e}")
+
+    if not isinstance(rules, dict):
+        raise ValueError(f"El archivo de reglas de limpieza {path} debe contener un objeto JSON")
+    return rules
+
+
+def rules_fingerprint(rules: Dict[str, Any]) -> str:
+    """
+    Huella corta de un conjunto de reglas (cambia si cambia cualquier regla)
+
+    Args:
+        rules: Reglas cargadas con load_cleaning_rules
+
+    Returns:
+        Hash hexadecimal de 16 caracteres
+    """
+    canonical = json.dumps(rules, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def select_columns(df: pd.DataFrame, selector: Dict[str, Any],
+                   object_positions: Optional[set] = None) -> List[int]:
+    """
+    Resolver un selector de columnas a posiciones
+
+    El selector une (OR) posiciones, nombres exactos, palabras clave contenidas en el
+    nombre (sin distinguir mayúsculas) y tipo de dato.
+
+    Args:
+        df: DataFrame sobre el que se resuelve
+        selector: {'positions': [...], 'names': [...], 'keywords': [...], 'dtype': '...'}
+        object_positions: Posiciones que ya se tratan como dtype object (normalizadas a texto)
+
+    Returns:
+        Posiciones de columna en orden ascendente
+    """
+    width = df.shape[1]
+    positions = {position for position in selector.get('positions', []) if 0 <= position < width}
+
+    names = set(selector.get('names', []))
+    keywords = [keyword.lower() for keyword in selector.get('keywords', [])]
+    dtype = selector.get('dtype')
+
+    if names or keywords or dtype:
+        dtypes = df.dtypes
+        for position, column in enumerate(df.columns):
+            name = str(column)
+            if name in names or any(keyword in name.lower() for keyword in keywords):
+                positions.add(position)
+            elif dtype and (dtypes.iloc[position] == dtype
+                            or (dtype == 'object' and position in (object_positions or ()))):
+                positions.add(position)
+
+    return sorted(positions)
+
+
+def pattern_mask(values: pd.Series, pattern: re.Pattern, mode: str = 'search') -> np.ndarray:
+    """
+    Evaluar un patrón compilado sobre una columna (una vez por valor distinto)
+
+    Args:
+        values: Columna a evaluar
+        pattern: Expresión regular compilada
+        mode: 'search' (el patrón aparece en el valor) o 'fullmatch' (el valor completo)
+
+    Returns:
+        Array booleano con el resultado por fila
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    match = pattern.search if mode == 'search' else pattern.fullmatch
+    matches = np.fromiter((match(str(value)) is not None for value in uniques),
+                          dtype=bool, count=len(uniques))
+    return matches[codes]
+
+
+class CleaningPlan:
+    """Plan compilado de reglas de limpieza de una fuente"""
+
+    def __init__(self, rules: List[Dict[str, Any]], source: str,
+                 converters: Optional[Dict[str, Callable[[pd.Series], pd.Series]]] = None):
+        """
+        Compilar las reglas (patrones y validación se hacen una sola vez)
+
+        Args:
+            rules: Lista de reglas de la fuente
+            source: Nombre de la fuente (para mensajes)
+            converters: Conversiones de tipo adicionales por nombre
+        """
+        self.logger = logging.getLogger(__name__)
+        self.source = source
+        self.converters = dict(BUILTIN_COERCIONS)
+        self.converters.update(converters or {})
+        self.rules = [self._compile_rule(rule, number) for number, rule in enumerate(rules, start=1)]
+
+    def _compile_rule(self, rule: Dict[str, Any], number: int) -> Dict[str, Any]:
+        """Validar una regla y precompilar sus patrones"""
+        name = rule.get('name', f'regla_{number}')
+        where = f"Regla '{name}' ({self.source})"
+
+        kind = rule.get('kind')
+        if kind not in RULE_KINDS:
+            raise ValueError(f"{where}: tipo de regla no válido {kind!r} (opciones: {', '.join(RULE_KINDS)})")
+
+        stage = rule.get('stage', 'clean')
+        if stage not in RULE_STAGES:
+            raise ValueError(f"{where}: etapa no válida {stage!r} (opciones: {', '.join(RULE_STAGES)})")
+
+        compiled = {'name': name, 'kind': kind, 'stage': stage}
+
+        if kind == 'normalize':
+            ops = rule.get('ops', [])
+            invalid = [op for op in ops if op not in NORMALIZE_OPS]
+            if not ops or invalid:
+                raise ValueError(f"{where}: operaciones no válidas {invalid or ops} (opciones: {', '.join(NORMALIZE_OPS)})")
+            compiled.update(columns=rule.get('columns', {}), ops=list(ops))
+
+        elif kind == 'coerce':
+            coercion = rule.get('type')
+            if coercion not in self.converters:
+                raise ValueError(f"{where}: conversión no válida {coercion!r} (opciones: {', '.join(self.converters)})")
+            compiled.update(columns=rule.get('columns', {}), type=coercion)
+
+        else:
+            conditions = rule.get('all', [])
+            if not conditions:
+                raise ValueError(f"{where}: un filtro necesita al menos una condición en 'all'")
+            if rule.get('rows', 'all') not in ('all', 'first'):
+                raise ValueError(f"{where}: 'rows' debe ser 'all' o 'first'")
+            compiled.update(rows=rule.get('rows', 'all'),
+                            conditions=[self._compile_condition(condition, where) for condition in conditions])
+
+        return compiled
+
+    def _compile_condition(self, condition: Dict[str, Any], where: str) -> Dict[str, Any]:
+        """Validar una condición de filtro y compilar su expresión regular"""
+        mode = condition.get('match', 'search')
+        if mode not in MATCH_MODES:
+            raise ValueError(f"{where}: modo de comparación no válido {mode!r} (opciones: {', '.join(MATCH_MODES)})")
+
+        flags = 0 if condition.get('case_sensitive', False) else re.IGNORECASE
+        try:
+            pattern = re.compile(condition['pattern'], flags)
+        except KeyError:
+            raise ValueError(f"{where}: la condición no tiene 'pattern'")
+        except re.error as e:
+            raise ValueError(f"{where}: patrón no válido {condition['pattern']!r}: {e}")
+
+        return {
+            'columns': condition.get('columns', {}),
+            'pattern': pattern,
+            'mode': mode,
+            'negate': bool(condition.get('negate', False)),
+            'if_missing': bool(condition.get('if_missing', False)),
+        }
+
+    def run(self, df: pd.DataFrame, stage: str = 'clean') -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+        """
+        Ejecutar las reglas de una etapa: normalizaciones, un único filtro combinado
+        y conversiones de tipo, en ese orden
+
+        Las normalizaciones de columnas que ningún filtro lee se aplican después de
+        filtrar, sobre menos filas; el resultado es el mismo que en el orden declarado.
+
+        Args:
+            df: DataFrame a limpiar (se modifica en sitio salvo el filtrado)
+            stage: 'raw' (antes de la limpieza estructural) o 'clean'
+
+        Returns:
+            Tuple con (DataFrame resultante, reporte por regla en el orden declarado). En
+            filtros 'rows' son las filas excluidas por la regla; en normalizaciones y
+            conversiones, las filas del resultado
+        """
+        rules = [rule for rule in self.rules if rule['stage'] == stage]
+        entries: Dict[int, Dict[str, Any]] = {}
+
+        # Resolver columnas una vez (las normalizaciones dejan texto, es decir dtype object)
+        normalized: set = set()
+        normalize_steps = []
+        for number, rule in enumerate(rules):
+            if rule['kind'] == 'normalize':
+                positions = select_columns(df, rule['columns'], object_positions=normalized)
+                normalized.update(positions)
+                normalize_steps.append((number, rule, positions))
+
+        filter_positions = set()
+        for rule in rules:
+            if rule['kind'] == 'filter':
+                for condition in rule['conditions']:
+                    filter_positions.update(select_columns(df, condition['columns'], object_positions=normalized))
+
+        # 1. Normalizaciones de las columnas que leen los filtros
+        for number, rule, positions in normalize_steps:
+            start = time.perf_counter()
+            for position in positions:
+                if position in filter_positions:
+                    df.isetitem(position, self._normalize(df.iloc[:, position], rule['ops']))
+            entries[number] = self._report_entry(rule, start, 0, len(positions))
+
+        # 2. Filtro combinado: una máscara para todas las reglas, aplicada una vez
+        excluded = np.zeros(len(df), dtype=bool)
+        for number, rule in enumerate(rules):
+            if rule['kind'] != 'filter':
+                continue
+            start = time.perf_counter()
+            rule_mask = self._filter_mask(df, rule)
+            entries[number] = self._report_entry(rule, start, int((rule_mask & ~excluded).sum()))
+            excluded |= rule_mask
+
+        if excluded.any():
+            # take() construye el DataFrame filtrado sin una copia adicional
+            df = df.take(np.flatnonzero(~excluded))
+
+        # 3. Normalizaciones restantes, ya sobre las filas conservadas
+        for number, rule, positions in normalize_steps:
+            start = time.perf_counter()
+            for position in positions:
+                if position not in filter_positions:
+                    df.isetitem(position, self._normalize(df.iloc[:, position], rule['ops']))
+            entries[number]['seconds'] += time.perf_counter() - start
+            entries[number]['rows'] = len(df)
+
+        # 4. Conversiones de tipo
+        for number, rule in enumerate(rules):
+            if rule['kind'] != 'coerce':
+                continue
+            start = time.perf_counter()
+            positions = select_columns(df, rule['columns'])
+            convert = self.converters[rule['type']]
+            for position in positions:
+                df.isetitem(position, convert(df.iloc[:, position]))
+            entries[number] = self._report_entry(rule, start, len(df), len(positions))
+
+        report = [entries[number] for number in sorted(entries)]
+        for entry in report:
+            if entry['kind'] == 'filter':
+                if entry['rows']:
+                    self.logger.info(f"Regla '{entry['name']}' ({self.source}): {entry['rows']} registros excluidos ({entry['seconds']:.3f}s)")
+            else:
+                self.logger.debug(f"Regla '{entry['name']}' ({self.source}): {entry['columns']} columnas ({entry['seconds']:.3f}s)")
+
+        return df, report
+
+    def _normalize(self, values: pd.Series, ops: List[str]) -> pd.Series:
+        """Aplicar operaciones de texto en el orden indicado"""
+        for op in ops:
+            if op == 'str':
+                values = values.astype(str)
+            elif op == 'strip':
+                values = values.str.strip()
+            elif op == 'upper':
+                values = values.str.upper()
+            else:
+                values = values.str.lower()
+        return values
+
+    def _filter_mask(self, df: pd.DataFrame, rule: Dict[str, Any]) -> np.ndarray:
+        """
+        Máscara de filas que cumplen todas las condiciones de un filtro
+
+        Una condición se cumple si el patrón coincide en alguna de sus columnas; si no
+        hay columnas que la resuelvan, vale if_missing.
+        """
+        target = df.iloc[:1] if rule['rows'] == 'first' else df
+        mask = np.ones(len(target), dtype=bool)
+
+        for condition in rule['conditions']:
+            positions = select_columns(df, condition['columns'])
+            if not positions:
+                if not condition['if_missing']:
+                    mask[:] = False
+                continue
+
+            matched = np.zeros(len(target), dtype=bool)
+            for position in positions:
+                matched |= pattern_mask(target.iloc[:, position], condition['pattern'], condition['mode'])
+            mask &= ~matched if condition['negate'] else matched
+
+        if rule['rows'] == 'first':
+            full_mask = np.zeros(len(df), dtype=bool)
+            full_mask[:len(mask)] = mask
+            return full_mask
+        return mask
+
+    def _report_entry(self, rule: Dict[str, Any], start: float, rows: int, columns: int = 0) -> Dict[str, Any]:
+        return {'name': rule['name'], 'kind': rule['kind'], 'stage': rule['stage'],
+                'rows': rows, 'columns': columns, 'seconds': time.perf_counter() - start}
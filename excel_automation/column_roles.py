@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Roles de Columnas
+Clasificación de las columnas de un DataFrame por su nombre (documento, valor, fecha, NIT...)
+calculada una sola vez por conjunto de columnas
+"""
+
+import unicodedata
+from typing import Any, Dict, List, Optional, Sequence
+
+# Cada rol es una lista de cláusulas; una columna tiene el rol si cumple alguna cláusula.
+# Cláusula: 'any' (alguna palabra), 'all' (todas), 'none' (ninguna) y 'equals' (nombre exacto),
+# comparadas con el nombre en minúsculas, o con el nombre sin tildes y con '_' en lugar de
+# espacios y guiones si 'folded' es True.
+COLUMN_ROLES: Dict[str, List[Dict[str, Any]]] = {
+    # Cruce de datos
+    'valor': [{'any': ['valor', 'monto', 'importe', 'total', 'debito', 'credito']}],
+    'fecha': [{'any': ['fecha', 'date', 'dia', 'mes', 'año']}],
+    'descripcion': [{'any': ['descripcion', 'concepto', 'detalle', 'observacion']}],
+    'documento_dian': [{'any': ['folio', 'numero', 'documento', 'factura'], 'none': ['tipo']}],
+    'documento_contable': [{'any': ['numero', 'documento', 'cruce', 'factura', 'comprobante']}],
+    'documento_cruce': [{'all': ['numero', 'documento', 'cruce']}],
+    'numero_documento': [{'all': ['numero', 'documento'], 'none': ['cruce']}],
+    'referencia_documento': [{'any': ['numero', 'documento', 'cruce']}],
+    'cruce': [{'any': ['cruce']}],
+    'unnamed': [{'any': ['unnamed']}],
+    'anio': [{'any': ['año', 'year']}],
+    'mes': [{'any': ['mes', 'month']}],
+    'dia': [{'any': ['dia', 'day']}],
+    'critico': [{'any': ['folio', 'numero', 'identificacion', 'nit', 'ruc', 'fecha', 'valor', 'monto']}],
+    # NIT
+    'nit': [{'any': ['nit']}],
+    'nit_exacto': [{'equals': 'nit'}],
+    'nit_emisor': [{'all': ['nit', 'emisor']}],
+    'nit_receptor': [{'all': ['nit', 'receptor']}],
+    'identificacion': [{'any': ['nit', 'identificacion', 'cedula']}],
+    'identificacion_emisor': [{'any': ['nit', 'identificacion', 'cedula'], 'none': ['receptor']}],
+    # Hojas de resultado
+    'folio': [{'any': ['folio']}],
+    'folio_dian': [{'all': ['folio', 'dian']}],
+    'valor_dian': [{'any': ['total', 'valor'], 'all': ['dian']}],
+    'valor_reporte': [{'any': ['total']}, {'any': ['valor'], 'none': ['iva']}],
+    'monto_dian': [{'any': ['total', 'valor', 'monto'], 'none': ['iva']}],
+    'monto_contable': [{'any': ['valor', 'monto', 'debito', 'credito'], 'none': ['iva']}],
+    'descripcion_dian': [{'any': ['descripcion', 'descripción'], 'all': ['dian']}],
+    'nombre_reporte': [{'any': ['descripcion', 'nombre', 'razon']}],
+    'nombre_dian': [{'any': ['descripcion', 'nombre', 'razon', 'social']}],
+    'nombre_contable': [{'any': ['descripcion', 'nombre', 'detalle', 'concepto']}],
+    'documento_cruce_contable': [{'all': ['contable_', 'numero_de_documento_cruce'], 'folded': True}],
+    'documento_cruce_normalizado': [{'all': ['numero', 'documento', 'cruce'], 'folded': True}],
+    'documento_contable_normalizado': [{'all': ['contable_', 'numero', 'documento'], 'folded': True}],
+}
+
+
+def fold_column_name(name: Any) -> str:
+    """Nombre en minúsculas, sin tildes y con '_' en lugar de espacios y guiones"""
+    normalized = unicodedata.normalize('NFD', str(name).lower())
+    normalized = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+    return normalized.replace(' ', '_').replace('-', '_')
+
+
+def _clause_matches(clause: Dict[str, Any], lower: str, folded: str) -> bool:
+    text = folded if clause.get('folded') else lower
+    if 'equals' in clause and text.strip() != clause['equals']:
+        return False
+    if 'any' in clause and not any(word in text for word in clause['any']):
+        return False
+    if 'all' in clause and not all(word in text for word in clause['all']):
+        return False
+    return not any(word in text for word in clause.get('none', ()))
+
+
+class ColumnRoles:
+    """Roles de las columnas de un DataFrame, en el orden de las columnas"""
+
+    def __init__(self, columns: Sequence[Any], roles: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        """
+        Clasificar todas las columnas una sola vez
+
+        Args:
+            columns: Nombres de las columnas
+            roles: Definición de los roles (por defecto COLUMN_ROLES)
+        """
+        self.columns = list(columns)
+        roles = COLUMN_ROLES if roles is None else roles
+
+        self._by_role: Dict[str, List[Any]] = {role: [] for role in roles}
+        for column in self.columns:
+            lower = str(column).lower()
+            folded = fold_column_name(column)
+            for role, clauses in roles.items():
+                if any(_clause_matches(clause, lower, folded) for clause in clauses):
+                    self._by_role[role].append(column)
+
+    def columns_for(self, role: str) -> List[Any]:
+        """
+        Columnas con un rol
+
+        Args:
+            role: Nombre del rol (clave de COLUMN_ROLES)
+
+        Returns:
+            Lista de columnas en el orden del DataFrame (vacía si ninguna tiene el rol)
+        """
+        return list(self._by_role[role])
+
+    def first(self, role: str) -> Optional[Any]:
+        """Primera columna con el rol, o None"""
+        matches = self._by_role[role]
+        return matches[0] if matches else None
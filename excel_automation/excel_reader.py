@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectores de Excel
+Backends intercambiables para leer hojas de Excel, con proyección de columnas
+"""
+
+import importlib.util
+import time
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+# Backends disponibles: 'auto' elige según el tamaño del archivo
+EXCEL_BACKENDS = ('auto', 'openpyxl', 'calamine', 'pandas')
+
+# Textos que pd.read_excel lee como nulos por defecto (na_values documentado de pandas)
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Textos que pd.read_excel convierte a booleano cuando toda la columna los usa
+_BOOLEAN_STRINGS = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+
+# calamine carga la hoja completa en memoria: por encima de este tamaño se prefiere
+# el lector openpyxl en streaming, que solo conserva las columnas proyectadas
+CALAMINE_MAX_BYTES = 100 * 1024 * 1024
+
+
+def calamine_available() -> bool:
+    """Verificar si python-calamine está instalado"""
+    return importlib.util.find_spec('python_calamine') is not None
+
+
+def resolve_backend(file_path: str | Path, backend: str = 'auto') -> str:
+    """
+    Resolver el backend de lectura para un archivo
+
+    Args:
+        file_path: Ruta del archivo Excel
+        backend: 'auto', 'openpyxl', 'calamine' o 'pandas'
+
+    Returns:
+        Backend concreto a usar ('openpyxl', 'calamine' o 'pandas')
+    """
+    if backend not in EXCEL_BACKENDS:
+        raise ValueError(f"Backend de lectura no válido: {backend} (opciones: {', '.join(EXCEL_BACKENDS)})")
+
+    file_path = Path(file_path)
+
+    # openpyxl y calamine solo aplican a .xlsx; los .xls quedan en pandas (xlrd)
+    if file_path.suffix.lower() != '.xlsx':
+        return 'pandas'
+
+    if backend == 'calamine' and not calamine_available():
+        return 'openpyxl'
+
+    if backend == 'auto':
+        if calamine_available() and file_path.stat().st_size <= CALAMINE_MAX_BYTES:
+            return 'calamine'
+        return 'openpyxl'
+
+    return backend
+
+
+def read_excel_header(file_path: str | Path, header: int = 0) -> List[str]:
+    """
+    Leer solo la fila de encabezados de la primera hoja
+
+    Args:
+        file_path: Ruta del archivo Excel
+        header: Fila (base 0) de los encabezados
+
+    Returns:
+        Nombres de columna tal como los genera pd.read_excel (incluye 'Unnamed: n'
+        y sufijos de duplicados)
+    """
+    return [str(col) for col in pd.read_excel(file_path, header=header, nrows=0).columns]
+
+
+def _convert_value(value):
+    """Convertir un valor de celda como lo hace el lector openpyxl de pandas"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        integer = int(value)
+        return integer if integer == value else value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _is_empty(value) -> bool:
+    """Celda vacía según pandas (sin valor o texto vacío)"""
+    return value is None or value == ''
+
+
+def read_excel_openpyxl(file_path: str | Path, header: int = 0,
+                        positions: Optional[Sequence[int]] = None,
+                        names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Leer la primera hoja en streaming con openpyxl (read-only, iter_rows)
+
+    El resultado es equivalente a pd.read_excel(file_path, header=header), pero se
+    recorren tuplas de valores en lugar de objetos de celda. Con proyección, las celdas
+    fuera de las posiciones pedidas no se convierten ni se guardan en memoria.
+
+    Args:
+        file_path: Ruta del archivo Excel
+        header: Fila (base 0) de los encabezados
+        positions: Posiciones (base 0) de las columnas a leer, en orden ascendente
+            (None = todas las columnas)
+        names: Nombres de columna de la proyección (ver read_excel_header)
+
+    Returns:
+        DataFrame con los datos de la hoja
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+
+        if positions is None:
+            data = _read_full_rows(sheet)
+        else:
+            data = _read_projected_rows(sheet, header, list(positions))
+    finally:
+        workbook.close()
+
+    if positions is None:
+        if len(data) <= header:
+            return pd.DataFrame()
+        names = _header_names(data[header])
+        data = data[header + 1:]
+
+    if not data:
+        return pd.DataFrame(columns=list(names))
+    return _build_frame(data, list(names))
+
+
+def _header_names(row: list) -> list:
+    """Nombres de columna como los genera pd.read_excel ('Unnamed: n' y sufijos '.n')"""
+    names = [f'Unnamed: {position}' if _is_empty(value) else value for position, value in enumerate(row)]
+    unnamed = [position for position, value in enumerate(row) if _is_empty(value)]
+    unnamed_set = set(unnamed)
+
+    # Los duplicados se numeran con los nombres con valor primero y los 'Unnamed' al final
+    counts: Dict[object, int] = {}
+    for position in [position for position in range(len(names)) if position not in unnamed_set] + unnamed:
+        base = name = names[position]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f'{base}.{count}'
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[position] = name
+        counts[name] = count + 1
+    return names
+
+
+def _infer_column(values: list) -> pd.Series:
+    """
+    Inferir el tipo de una columna como pd.read_excel
+
+    Nulos por NA_STRINGS, números (también en texto), booleanos en texto y, para el resto,
+    la inferencia de pd.Series (fechas a datetime64, lo demás object).
+    """
+    values = [np.nan if isinstance(value, str) and value in NA_STRINGS else value for value in values]
+    column = pd.Series(values, dtype=object)
+
+    try:
+        return pd.to_numeric(column)
+    except (ValueError, TypeError):
+        pass
+
+    if all(isinstance(value, str) and value in _BOOLEAN_STRINGS or isinstance(value, bool) for value in values):
+        return pd.Series([_BOOLEAN_STRINGS.get(value, value) for value in values], dtype=bool)
+
+    return pd.Series(values)
+
+
+def _build_frame(rows: List[list], names: list) -> pd.DataFrame:
+    """Armar el DataFrame de las filas de datos con los tipos que infiere pd.read_excel"""
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+    df = pd.concat([_infer_column(list(values)) for values in columns], axis=1, ignore_index=True)
+    df.columns = names
+    return df
+
+
+def _read_full_rows(sheet) -> List[list]:
+    """Leer todas las filas recortando celdas vacías al final (igual que pandas)"""
+    data = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(sheet.iter_rows(values_only=True)):
+        row = [_convert_value(value) for value in row]
+        while row and row[-1] == '':
+            row.pop()
+        if row:
+            last_row_with_data = row_number
+        data.append(row)
+
+    data = data[:last_row_with_data + 1]
+
+    if data:
+        max_width = max(len(row) for row in data)
+        data = [row + [''] * (max_width - len(row)) for row in data]
+    return data
+
+
+def _read_projected_rows(sheet, header: int, positions: List[int]) -> List[list]:
+    """Leer solo las posiciones pedidas de las filas posteriores al encabezado"""
+    width = max(positions) + 1 if positions else 0
+
+    # Relleno para filas más cortas que la última columna proyectada
+    padding = (None,) * width
+    project = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+
+    data = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(sheet.iter_rows(min_row=header + 2, values_only=True)):
+        # Una fila cuenta como dato si tiene cualquier celda, aunque no esté proyectada
+        if not all(_is_empty(value) for value in row):
+            last_row_with_data = row_number
+        if len(row) < width:
+            row = row + padding[:width - len(row)]
+        data.append([_convert_value(value) for value in project(row)])
+
+    # Eliminar filas vacías al final (igual que pandas)
+    return data[:last_row_with_data + 1]
+
+
+def read_excel_calamine(file_path: str | Path, header: int = 0,
+                        positions: Optional[Sequence[int]] = None,
+                        names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Leer la primera hoja con el motor calamine de pandas (python-calamine, en Rust)
+
+    Args:
+        file_path: Ruta del archivo Excel
+        header: Fila (base 0) de los encabezados
+        positions: Posiciones (base 0) de las columnas a leer (None = todas)
+        names: Nombres de columna de la proyección (ver read_excel_header)
+
+    Returns:
+        DataFrame con los datos de la hoja
+    """
+    df = pd.read_excel(file_path, header=header, engine='calamine',
+                       usecols=list(positions) if positions is not None else None)
+    if names is not None:
+        df.columns = list(names)
+    return df
+
+
+def read_excel_frame(file_path: str | Path, header: int = 0,
+                     positions: Optional[Sequence[int]] = None,
+                     names: Optional[Sequence[str]] = None,
+                     backend: str = 'auto') -> pd.DataFrame:
+    """
+    Leer la primera hoja de un archivo Excel con el backend indicado
+
+    Args:
+        file_path: Ruta del archivo Excel
+        header: Fila (base 0) de los encabezados
+        positions: Posiciones (base 0) de las columnas a leer (None = todas)
+        names: Nombres de columna de la proyección (ver read_excel_header)
+        backend: 'auto', 'openpyxl', 'calamine' o 'pandas'
+
+    Returns:
+        DataFrame con los datos de la hoja
+    """
+    backend = resolve_backend(file_path, backend)
+
+    if backend == 'calamine':
+        return read_excel_calamine(file_path, header, positions, names)
+
+    if backend == 'openpyxl':
+        return read_excel_openpyxl(file_path, header, positions, names)
+
+    df = pd.read_excel(file_path, header=header,
+                       usecols=list(positions) if positions is not None else None)
+    if names is not None:
+        df.columns = list(names)
+    return df
+
+
+def benchmark_readers(file_path: str | Path, header: int = 0, repeat: int = 3) -> Dict[str, float]:
+    """
+    Medir el tiempo de lectura de un archivo con cada backend disponible
+
+    Args:
+        file_path: Ruta del archivo Excel
+        header: Fila (base 0) de los encabezados
+        repeat: Repeticiones por backend (se reporta el mejor tiempo)
+
+    Returns:
+        Diccionario backend -> mejor tiempo en segundos
+    """
+    backends = ['pandas', 'openpyxl']
+    if calamine_available():
+        backends.append('calamine')
+
+    timings = {}
+    for backend in backends:
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            read_excel_frame(file_path, header=header, backend=backend)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[backend] = best
+
+    return timings
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de DataFrames Limpios
+Caché en disco (Arrow IPC) indexada por el contenido del archivo y la versión de limpieza
+"""
+
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pyarrow es opcional: sin él la caché queda deshabilitada
+    pa = None
+
+# Metadatos del esquema Arrow: datos adicionales de la entrada y columnas object cuyos
+# nulos son NaN (Arrow no distingue NaN de None en columnas de texto)
+_METADATA_KEY = b'causacion_metadata'
+_NAN_COLUMNS_KEY = b'causacion_nan_columns'
+
+
+def _object_null_kinds(df: pd.DataFrame) -> Optional[Dict[int, str]]:
+    """
+    Tipo de nulo de cada columna object con nulos ('nan' o 'none')
+
+    Returns:
+        Diccionario posición -> tipo de nulo, o None si alguna columna mezcla NaN y None
+    """
+    kinds = {}
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if column.dtype != object:
+            continue
+        nulls = column[column.isna()]
+        if nulls.empty:
+            continue
+        is_none = np.array([value is None for value in nulls], dtype=bool)
+        if is_none.all():
+            kinds[position] = 'none'
+        elif not is_none.any():
+            kinds[position] = 'nan'
+        else:
+            return None
+    return kinds
+
+
+def _restore_nan_columns(df: pd.DataFrame, positions: List[int]) -> pd.DataFrame:
+    """Volver a representar como NaN los nulos de las columnas indicadas"""
+    for position in positions:
+        column = df.iloc[:, position]
+        df.isetitem(position, column.where(column.notna(), np.nan))
+    return df
+
+
+def default_cache_dir() -> Path:
+    """
+    Obtener el directorio de caché por defecto del usuario
+
+    Returns:
+        Ruta del directorio (LOCALAPPDATA en Windows, XDG_CACHE_HOME o ~/.cache en otros)
+    """
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'CausacionDIAN' / 'frames'
+
+
+def file_content_hash(file_path: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Calcular el SHA-256 del contenido de un archivo
+
+    Args:
+        file_path: Ruta del archivo
+        chunk_size: Tamaño del bloque de lectura
+
+    Returns:
+        Hash hexadecimal del contenido
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FrameCache:
+    """Caché LRU en disco de DataFrames en formato Arrow IPC"""
+
+    def __init__(self, directory: Optional[str | Path] = None, max_bytes: int = 512 * 1024 * 1024,
+                 enabled: bool = True):
+        """
+        Inicializar la caché
+
+        Args:
+            directory: Directorio de la caché (None = default_cache_dir())
+            max_bytes: Tamaño máximo total; al superarlo se eliminan las entradas menos usadas
+            enabled: Si False, get() y put() no hacen nada
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        if enabled and pa is None:
+            self.logger.info("pyarrow no está instalado, la caché de archivos limpios queda deshabilitada")
+            self.enabled = False
+
+    def make_key(self, file_path: str | Path, namespace: str, version: str) -> str:
+        """
+        Construir la clave de una entrada
+
+        Args:
+            file_path: Archivo de origen (se usa su contenido, no su nombre ni fecha)
+            namespace: Tipo de datos ('dian', 'contable', ...)
+            version: Versión de las reglas de limpieza
+
+        Returns:
+            Clave hexadecimal
+        """
+        content_hash = file_content_hash(file_path)
+        return hashlib.sha256(f'{namespace}|{version}|{content_hash}'.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f'{key}.arrow'
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, object]]]:
+        """
+        Leer una entrada
+
+        El archivo se lee completo y se convierte a columnas de pandas (copia en memoria):
+        el DataFrame devuelto tiene los mismos tipos que el guardado, sin buffers de Arrow.
+
+        Args:
+            key: Clave de la entrada (ver make_key)
+
+        Returns:
+            Tuple con (DataFrame, metadatos) o None si no existe
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with pa.OSFile(str(path), 'rb') as source:
+                table = pa.ipc.open_file(source).read_all()
+            df = table.to_pandas()
+            schema_metadata = table.schema.metadata or {}
+            metadata = json.loads(schema_metadata.get(_METADATA_KEY, b'{}').decode('utf-8'))
+            nan_columns = json.loads(schema_metadata.get(_NAN_COLUMNS_KEY, b'[]').decode('utf-8'))
+            df = _restore_nan_columns(df, nan_columns)
+
+            # Marcar como usada recientemente (orden LRU por fecha de modificación)
+            os.utime(path, None)
+            return df, metadata
+        except Exception as e:
+            self.logger.warning(f"Entrada de caché inválida, se elimina: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, df: pd.DataFrame, metadata: Optional[Dict[str, object]] = None) -> bool:
+        """
+        Guardar una entrada y aplicar el límite de tamaño
+
+        Solo se conservan entradas que se leen de vuelta idénticas al DataFrame original.
+
+        Args:
+            key: Clave de la entrada (ver make_key)
+            df: DataFrame a guardar
+            metadata: Datos adicionales serializables en JSON
+
+        Returns:
+            True si la entrada quedó guardada
+        """
+        if not self.enabled:
+            return False
+
+        null_kinds = _object_null_kinds(df)
+        if null_kinds is None:
+            self.logger.info("Columnas con nulos mixtos (NaN y None), no se guarda en caché")
+            return False
+
+        path = self._entry_path(key)
+        temp_path = path.with_suffix('.tmp')
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            table = pa.Table.from_pandas(df)
+            schema_metadata = dict(table.schema.metadata or {})
+            schema_metadata[_METADATA_KEY] = json.dumps(metadata or {}).encode('utf-8')
+            nan_columns = [position for position, kind in null_kinds.items() if kind == 'nan']
+            schema_metadata[_NAN_COLUMNS_KEY] = json.dumps(nan_columns).encode('utf-8')
+            table = table.replace_schema_metadata(schema_metadata)
+
+            with pa.OSFile(str(temp_path), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temp_path, path)
+        except Exception as e:
+            self.logger.warning(f"No se pudo guardar en caché: {e}")
+            self._remove(temp_path)
+            return False
+
+        # Tipos que Arrow no conserva (p. ej. columnas object mixtas) no se guardan
+        cached = self.get(key)
+        if (cached is None or not cached[0].equals(df) or not cached[0].dtypes.equals(df.dtypes)
+                or _object_null_kinds(cached[0]) != null_kinds):
+            self.logger.info("El DataFrame no se conserva igual en formato Arrow, no se guarda en caché")
+            self._remove(path)
+            return False
+
+        self._evict()
+        return True
+
+    def clear(self):
+        """Eliminar todas las entradas"""
+        if self.directory.exists():
+            for path in self.directory.glob('*.arrow'):
+                self._remove(path)
+
+    def _evict(self):
+        """Eliminar las entradas menos usadas hasta respetar max_bytes"""
+        entries = []
+        for path in self.directory.glob('*.arrow'):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.logger.info(f"Entrada de caché eliminada por tamaño: {path.name}")
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
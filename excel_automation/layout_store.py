@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Layouts de Archivo
+Layouts ya resueltos (fila de encabezados, columnas proyectadas, mapeo de columnas sin
+nombre y columna de documento) guardados en JSON e indexados por la fila de encabezados
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .column_roles import COLUMN_ROLES
+from .frame_cache import default_cache_dir
+
+# Versión del formato de los layouts: incrementarla invalida los layouts guardados
+LAYOUT_VERSION = 1
+
+
+def default_layout_dir() -> Path:
+    """Directorio de layouts por defecto (junto a la caché de archivos limpios)"""
+    return default_cache_dir().parent / 'layouts'
+
+
+def layout_signature(source: str, header_columns: List[str], version: str = '',
+                     projection: Sequence[Any] = ()) -> str:
+    """
+    Calcular la firma de un layout a partir de su fila de encabezados
+
+    La firma incluye también la tabla de roles de columnas y las reglas de proyección, de
+    modo que al cambiarlas no se reutilizan posiciones ni mapeos resueltos con las anteriores.
+
+    Args:
+        source: Tipo de archivo ('dian', 'contable')
+        header_columns: Nombres de columna de la fila de encabezados
+        version: Versión de las reglas de limpieza (el layout depende de la limpieza)
+        projection: Reglas con que se eligen las columnas a leer (palabras clave, posiciones)
+
+    Returns:
+        Hash hexadecimal
+    """
+    payload = json.dumps([LAYOUT_VERSION, source, version, list(header_columns), COLUMN_ROLES, list(projection)],
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LayoutStore:
+    """Layouts de archivo en disco, un JSON por firma de encabezados"""
+
+    def __init__(self, directory: Optional[str | Path] = None, enabled: bool = True):
+        """
+        Inicializar el almacén
+
+        Args:
+            directory: Directorio de los layouts (None = default_layout_dir())
+            enabled: Si False, get() y put() no hacen nada
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory) if directory is not None else default_layout_dir()
+        self.enabled = enabled
+
+    def _entry_path(self, signature: str) -> Path:
+        return self.directory / f'{signature}.json'
+
+    def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        """
+        Leer un layout
+
+        Args:
+            signature: Firma del layout (ver layout_signature)
+
+        Returns:
+            Diccionario del layout, o None si no existe o no se puede leer
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(signature)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                layout = json.load(file)
+            if not isinstance(layout, dict):
+                raise ValueError("el layout no es un objeto JSON")
+            return layout
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Layout guardado inválido, se elimina: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, signature: str, layout: Dict[str, Any]) -> bool:
+        """
+        Guardar un layout (reemplaza el anterior con la misma firma)
+
+        Args:
+            signature: Firma del layout (ver layout_signature)
+            layout: Datos del layout serializables en JSON
+
+        Returns:
+            True si el layout quedó guardado
+        """
+        if not self.enabled:
+            return False
+
+        path = self._entry_path(signature)
+        temp_path = path.with_suffix('.tmp')
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(layout, file, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"No se pudo guardar el layout: {e}")
+            self._remove(temp_path)
+            return False
+
+    def clear(self):
+        """Eliminar todos los layouts"""
+        if self.directory.exists():
+            for path in self.directory.glob('*.json'):
+                self._remove(path)
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de Cruce
+Estructuras de índice y utilidades vectorizadas para el cruce DIAN vs contable
+"""
+
+import pandas as pd
+import numpy as np
+import numbers
+import re
+from typing import Iterator, List, Tuple, Sequence, Union
+
+# Código de bloque de los registros sin clave (p. ej. sin NIT): se comparan con todos los bloques
+WILDCARD_BLOCK = -1
+
+# Columnas de un conjunto de coincidencias (pares de índices DIAN/contable)
+MATCH_COLUMNS = ['dian_idx', 'contable_idx', 'match_type', 'match_score', 'match_reason']
+
+
+def build_match_frame(dian_idx: Sequence, contable_idx: Sequence, match_type: str,
+                      match_score: Union[float, Sequence[float]],
+                      match_reason: Union[str, Sequence[str]]) -> pd.DataFrame:
+    """
+    Construir un conjunto de coincidencias compacto a partir de arreglos de pares
+
+    Args:
+        dian_idx: Índices (etiquetas) de los registros DIAN
+        contable_idx: Índices (etiquetas) de los registros contables
+        match_type: Tipo de coincidencia
+        match_score: Puntaje (escalar o uno por par)
+        match_reason: Motivo (escalar o uno por par)
+
+    Returns:
+        DataFrame con las columnas de MATCH_COLUMNS, una fila por par
+    """
+    dian_idx = np.asarray(dian_idx, dtype=np.int64)
+    contable_idx = np.asarray(contable_idx, dtype=np.int64)
+    n_pairs = len(dian_idx)
+
+    if np.ndim(match_score) == 0:
+        match_score = np.full(n_pairs, match_score, dtype=np.float64)
+    if isinstance(match_reason, str):
+        match_reason = [match_reason] * n_pairs
+
+    return pd.DataFrame({
+        'dian_idx': dian_idx,
+        'contable_idx': contable_idx,
+        'match_type': pd.Series([match_type] * n_pairs, dtype=object),
+        'match_score': np.asarray(match_score, dtype=np.float64),
+        'match_reason': pd.Series(list(match_reason), dtype=object)
+    }, columns=MATCH_COLUMNS)
+
+
+def concat_match_frames(*frames: pd.DataFrame) -> pd.DataFrame:
+    """
+    Concatenar conjuntos de coincidencias conservando el orden de las etapas
+
+    Args:
+        frames: DataFrames de pares en el orden de las etapas de cruce
+
+    Returns:
+        DataFrame de pares combinado (vacío pero tipado si no hay pares)
+    """
+    non_empty = [frame for frame in frames if not frame.empty]
+    if not non_empty:
+        return build_match_frame([], [], 'no_match', 0.0, '')
+    return pd.concat(non_empty, ignore_index=True)[MATCH_COLUMNS]
+
+
+class DocumentHashIndex:
+    """Índice invertido de clave de documento normalizada a posiciones de fila"""
+
+    def __init__(self, keys: pd.Series):
+        """
+        Construir el índice una sola vez sobre las claves del lado contable
+
+        Args:
+            keys: Serie con las claves de documento ya normalizadas
+        """
+        codes, uniques = pd.factorize(keys.to_numpy(dtype=object))
+
+        # Posiciones agrupadas por clave (orden estable: ascendente dentro de cada clave)
+        order = np.argsort(codes, kind='stable')
+        order = order[codes[order] >= 0]
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+
+        self._positions = order.astype(np.int64)
+        self._counts = counts.astype(np.int64)
+        self._starts = np.cumsum(self._counts) - self._counts
+        self._lookup = pd.Index(uniques)
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def join(self, probe_keys: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Hash-join de las claves de consulta contra el índice
+
+        Args:
+            probe_keys: Serie con las claves de documento a buscar (lado DIAN)
+
+        Returns:
+            Tuple con (posiciones de consulta, posiciones del índice) como arreglos int64,
+            ordenados por posición de consulta y luego por posición del índice
+        """
+        key_ids = self._lookup.get_indexer(probe_keys.to_numpy(dtype=object))
+        found = np.flatnonzero(key_ids >= 0)
+        key_ids = key_ids[found]
+
+        counts = self._counts[key_ids]
+        total = int(counts.sum())
+
+        left = np.repeat(found, counts).astype(np.int64)
+
+        # Desplazamiento de cada par dentro del grupo de su clave
+        group_offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        within = np.arange(total, dtype=np.int64) - group_offsets
+        right = self._positions[np.repeat(self._starts[key_ids], counts) + within]
+
+        return left, right
+
+
+class ValueWindowIndex:
+    """Índice de valores ordenados para buscar candidatos dentro de una ventana de valor"""
+
+    def __init__(self, values: np.ndarray, positions: np.ndarray):
+        """
+        Construir el índice ordenado una sola vez
+
+        Args:
+            values: Valores numéricos (redondeados) del lado contable; NaN se ignora
+            positions: Posición de fila de cada valor
+        """
+        values = np.asarray(values, dtype=np.float64)
+        positions = np.asarray(positions, dtype=np.int64)
+        valid = ~np.isnan(values)
+        values = values[valid]
+        positions = positions[valid]
+
+        # Rango de primera aparición de cada valor: conserva la semántica "el primero gana"
+        # del antiguo diccionario valor -> índices (orden de inserción)
+        first_seen_rank, _ = pd.factorize(values)
+
+        order = np.lexsort((positions, values))
+        self._values = values[order]
+        self._positions = positions[order]
+        rank = first_seen_rank[order].astype(np.int64)
+        # Clave única de preferencia: primero el rango del valor y luego la posición
+        self._preference = rank * (int(positions.max()) + 1 if len(positions) else 1) + self._positions
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def window_bounds(self, low: np.ndarray, high: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Obtener los límites [inicio, fin) en el arreglo ordenado para cada ventana
+
+        Args:
+            low: Límite inferior (inclusive) de cada ventana
+            high: Límite superior (inclusive) de cada ventana
+
+        Returns:
+            Tuple con (inicio, fin) por ventana; fin <= inicio indica ventana vacía
+        """
+        start = np.searchsorted(self._values, low, side='left')
+        end = np.searchsorted(self._values, high, side='right')
+        return start, end
+
+    def iter_candidate_pairs(self, low: np.ndarray, high: np.ndarray,
+                             max_pairs: int = 2_000_000) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Generar la tabla de pares candidatos para un lote de ventanas
+
+        Args:
+            low: Límite inferior (inclusive) de cada ventana
+            high: Límite superior (inclusive) de cada ventana
+            max_pairs: Máximo aproximado de pares por bloque (acota la memoria)
+
+        Yields:
+            Tuple con (posición de la ventana, posición candidata, preferencia) por bloque.
+            Los pares quedan agrupados por ventana en orden ascendente; dentro de cada
+            ventana, una preferencia menor indica un valor visto antes (y, a igual valor,
+            una posición menor)
+        """
+        start, end = self.window_bounds(low, high)
+        counts = np.maximum(end - start, 0)
+
+        # Partir las ventanas en bloques consecutivos según el número de pares
+        block_of_query = np.cumsum(counts) // max(int(max_pairs), 1)
+        block_edges = np.flatnonzero(np.diff(block_of_query)) + 1
+        bounds = np.concatenate(([0], block_edges, [len(counts)]))
+
+        for block_start, block_end in zip(bounds[:-1], bounds[1:]):
+            block_counts = counts[block_start:block_end]
+            total = int(block_counts.sum())
+            if total == 0:
+                continue
+
+            query = np.repeat(np.arange(block_start, block_end, dtype=np.int64), block_counts)
+            offsets = np.repeat(start[block_start:block_end] - (np.cumsum(block_counts) - block_counts),
+                                block_counts)
+            sorted_idx = np.arange(total, dtype=np.int64) + offsets
+
+            yield query, self._positions[sorted_idx], self._preference[sorted_idx]
+
+
+def value_tolerance_mask(values1: np.ndarray, values2: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Verificar en bloque si pares de valores coinciden dentro de la tolerancia relativa
+
+    Args:
+        values1: Primer valor de cada par (float64, NaN = no numérico)
+        values2: Segundo valor de cada par (float64, NaN = no numérico)
+        tolerance: Diferencia relativa máxima permitida
+
+    Returns:
+        Arreglo booleano con el resultado por par
+    """
+    abs1 = np.abs(values1)
+    abs2 = np.abs(values2)
+    both_zero = (values1 == 0) & (values2 == 0)
+    both_non_zero = (values1 != 0) & (values2 != 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        difference = np.abs(values1 - values2) / np.maximum(abs1, abs2)
+
+    # Las comparaciones con NaN son falsas, así que los no numéricos quedan excluidos
+    return both_zero | (both_non_zero & (difference <= tolerance))
+
+
+def date_window_mask(dates1: np.ndarray, dates2: np.ndarray, max_days: int) -> np.ndarray:
+    """
+    Verificar en bloque si pares de fechas están a máximo max_days días
+
+    Args:
+        dates1: Primera fecha de cada par (datetime64, NaT = sin fecha)
+        dates2: Segunda fecha de cada par (datetime64, NaT = sin fecha)
+        max_days: Diferencia máxima en días
+
+    Returns:
+        Arreglo booleano con el resultado por par
+    """
+    valid = ~(np.isnat(dates1) | np.isnat(dates2))
+    days = np.zeros(len(valid), dtype=np.int64)
+    # División entera: equivale a Timedelta.days (redondeo hacia abajo)
+    days[valid] = (dates1[valid] - dates2[valid]) // np.timedelta64(1, 'D')
+    return valid & (np.abs(days) <= max_days)
+
+
+def greedy_one_to_one(left: np.ndarray, right: np.ndarray, preference: np.ndarray,
+                      used_right: np.ndarray) -> np.ndarray:
+    """
+    Asignación uno a uno "el primero gana" sobre una tabla de pares
+
+    Cada grupo (mismo valor de left, contiguos y en orden de prioridad) toma el par
+    libre de menor preferencia.
+
+    Args:
+        left: Posición izquierda de cada par, agrupada y en orden de prioridad
+        right: Posición derecha de cada par
+        preference: Preferencia de cada par dentro de su grupo (menor es mejor, única)
+        used_right: Máscara booleana de posiciones derechas ya asignadas (se actualiza en sitio)
+
+    Returns:
+        Índices de los pares elegidos, en orden de grupo
+    """
+    if len(left) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    group_starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+    group_ends = np.r_[group_starts[1:], len(left)]
+
+    # Mejor par de cada grupo sin ordenar: mínimo por segmento con reduceat
+    group_sizes = group_ends - group_starts
+    best_preference = np.minimum.reduceat(preference, group_starts)
+    best_pairs = np.flatnonzero(preference == np.repeat(best_preference, group_sizes))
+
+    chosen = []
+    for group_start, group_end, best_pair in zip(group_starts.tolist(), group_ends.tolist(),
+                                                 best_pairs.tolist()):
+        if used_right[right[best_pair]]:
+            # Conflicto: el mejor par libre del grupo, si queda alguno
+            group_free = ~used_right[right[group_start:group_end]]
+            if not group_free.any():
+                continue
+            group_preference = np.where(group_free, preference[group_start:group_end],
+                                        np.iinfo(np.int64).max)
+            best_pair = group_start + int(np.argmin(group_preference))
+
+        used_right[right[best_pair]] = True
+        chosen.append(best_pair)
+
+    return np.asarray(chosen, dtype=np.int64)
+
+
+# Pesos del dígito de verificación del NIT (DIAN), de derecha a izquierda
+NIT_CHECK_WEIGHTS = (3, 7, 13, 17, 19, 23, 29, 37, 41, 43, 47, 53, 59, 67, 71)
+
+
+def nit_check_digit(nit_base: str) -> int:
+    """
+    Calcular el dígito de verificación de un NIT
+
+    Args:
+        nit_base: Dígitos del NIT sin dígito de verificación
+
+    Returns:
+        Dígito de verificación (0-9)
+    """
+    total = sum(int(digit) * weight for digit, weight in zip(reversed(nit_base), NIT_CHECK_WEIGHTS))
+    remainder = total % 11
+    return 11 - remainder if remainder > 1 else remainder
+
+
+def _normalize_nit_value(value) -> str:
+    """Normalizar un NIT individual (ver normalize_nit)"""
+    text = str(value).strip()
+    if not text or text.lower() in ('nan', 'none', 'nat'):
+        return ''
+
+    # Valores numéricos leídos como float (830116500.0)
+    if re.fullmatch(r'\d+\.0+', text):
+        text = text.split('.')[0]
+
+    # Dígito de verificación separado por guion o espacio (830.116.500-1)
+    separated = re.fullmatch(r'([\d.,\s]+?)\s*[-\s]\s*(\d)', text)
+    if separated:
+        text = separated.group(1)
+
+    digits = re.sub(r'\D', '', text).lstrip('0')
+
+    # NIT de persona jurídica (9 dígitos, inicia en 8 o 9) con dígito de verificación pegado
+    if len(digits) == 10 and digits[0] in '89' and nit_check_digit(digits[:9]) == int(digits[9]):
+        digits = digits[:9]
+
+    return digits
+
+
+def normalize_nit(values: pd.Series) -> pd.Series:
+    """
+    Normalizar NITs a solo dígitos y sin dígito de verificación
+
+    Args:
+        values: Serie con NITs en cualquier formato (texto o numérico)
+
+    Returns:
+        Serie de claves de NIT ('' cuando no hay NIT)
+    """
+    # Se normaliza cada valor único una sola vez
+    unique_values = pd.unique(values.astype(str))
+    mapping = {value: _normalize_nit_value(value) for value in unique_values}
+    return values.astype(str).map(mapping)
+
+
+def _document_texts(values: pd.Series) -> pd.Series:
+    """Texto en mayúsculas de cada valor (los decimales enteros se escriben sin '.0')"""
+    return values.map(lambda value: str(int(value)) if isinstance(value, float) and value.is_integer()
+                      else str(value)).str.upper()
+
+
+def document_tokens(values: pd.Series, max_rows: int = 10000) -> set:
+    """
+    Tokens normalizados de una columna para detectar la columna de documento
+
+    Cada valor distinto de la muestra aporta sus tramos alfanuméricos en mayúsculas y sus
+    tramos de dígitos ('FE-001234' -> FE, 001234); los decimales enteros se escriben
+    sin '.0'.
+
+    Args:
+        values: Columna a indexar
+        max_rows: Filas de la muestra (las primeras de la columna)
+
+    Returns:
+        Conjunto de tokens
+    """
+    sample = values.head(max_rows).dropna()
+    if sample.empty:
+        return set()
+
+    text = _document_texts(pd.Series(pd.unique(sample), dtype=object))
+
+    tokens = set(text.str.findall(r'[0-9A-Z]+').explode().dropna())
+    tokens.update(text.str.findall(r'\d+').explode().dropna())
+    return tokens
+
+
+def folio_token_groups(folios: pd.Series) -> List[Tuple[str, ...]]:
+    """
+    Tokens de cada folio, normalizados igual que en document_tokens
+
+    Un folio aparece en una columna cuando todos sus tokens están en document_tokens de la
+    columna ('FE-1234' se encuentra en 'FE-1234/5', el folio 1234.0 en '1234').
+
+    Args:
+        folios: Folios (texto o números)
+
+    Returns:
+        Tupla de tokens por folio no vacío, en el orden de la serie
+    """
+    folios = folios.dropna()
+    if folios.empty:
+        return []
+
+    token_lists = _document_texts(folios.astype(object)).str.findall(r'[0-9A-Z]+')
+    return [tuple(tokens) for tokens in token_lists if tokens]
+
+
+# Símbolos y códigos de moneda que se ignoran en los montos en texto
+_CURRENCY_PATTERN = r'(?i)\s+|\$|COP|USD|€'
+
+
+def _parse_amount_texts(texts: pd.Series) -> np.ndarray:
+    """Convertir montos en texto a float64 (ver parse_amounts)"""
+    text = texts.str.strip()
+
+    # Negativos entre paréntesis: (1.234,50)
+    parenthesized = text.str.startswith('(') & text.str.endswith(')')
+    text = text.str.replace(r'^\((.*)\)$', r'\1', regex=True).str.replace(_CURRENCY_PATTERN, '', regex=True)
+
+    scientific = text.str.fullmatch(r'[+-]?\d+(\.\d+)?[eE][+-]?\d+').to_numpy(dtype=bool)
+    valid = text.str.fullmatch(r'[+-]?[\d.,]*\d[\d.,]*').to_numpy(dtype=bool)
+    negative = (text.str.startswith('-') | parenthesized).to_numpy(dtype=bool)
+    body = text.str.lstrip('+-')
+
+    dots = body.str.count(r'\.').to_numpy()
+    commas = body.str.count(',').to_numpy()
+    last_separator = np.maximum(body.str.rfind('.').to_numpy(), body.str.rfind(',').to_numpy())
+    digits_after = body.str.len().to_numpy() - last_separator - 1
+    zero_integer = (body.str.startswith('0') & (last_separator == 1)).to_numpy(dtype=bool)
+
+    # El último separador es decimal si hay '.' y ',' a la vez, o si aparece una sola vez
+    # sin formar un grupo de miles (1.234 y 1,234 son miles; 1.5, 12,50 y 0.125 decimales)
+    single = (dots + commas) == 1
+    decimal = ((dots > 0) & (commas > 0)) | (single & ((digits_after != 3) | zero_integer | (last_separator == 0)))
+
+    with_decimal = body.str.replace(r'[.,](?=.*[.,])', '', regex=True).str.replace(',', '.', regex=False)
+    without_separators = body.str.replace(r'[.,]', '', regex=True)
+    number_text = with_decimal.where(decimal, without_separators)
+
+    parsed = pd.to_numeric(number_text, errors='coerce').to_numpy(dtype=np.float64)
+    parsed = np.where(negative, -parsed, parsed)
+    parsed[~valid] = np.nan
+    if scientific.any():
+        parsed[scientific] = pd.to_numeric(text[scientific]).to_numpy(dtype=np.float64)
+    return parsed
+
+
+def parse_amounts(values: pd.Series) -> np.ndarray:
+    """
+    Convertir una columna de montos (formato colombiano o internacional) a float64
+
+    Acepta números, texto con separadores de miles '.' o ',' (1.234.567,89 y 1,234,567.89),
+    símbolos de moneda ($, COP, USD), negativos con signo o entre paréntesis y notación
+    científica. Vacíos y texto no numérico quedan en NaN.
+
+    Args:
+        values: Serie con montos
+
+    Returns:
+        Arreglo float64 con el mismo largo que la serie
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Cada valor distinto se interpreta una sola vez
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+
+    is_text = uniques.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    is_number = uniques.map(lambda value: isinstance(value, numbers.Number)).to_numpy(dtype=bool)
+
+    parsed_uniques = np.full(len(uniques), np.nan)
+    if is_number.any():
+        parsed_uniques[is_number] = uniques[is_number].astype(np.float64).to_numpy()
+    if is_text.any():
+        parsed_uniques[is_text] = _parse_amount_texts(uniques[is_text].astype(str))
+
+    parsed = np.full(len(values), np.nan)
+    valid = codes >= 0
+    parsed[valid] = parsed_uniques[codes[valid]]
+    return parsed
+
+
+def block_compatibility_mask(left_blocks: np.ndarray, right_blocks: np.ndarray) -> np.ndarray:
+    """
+    Verificar en bloque si pares de registros pueden compararse según su código de bloque
+
+    Args:
+        left_blocks: Código de bloque del registro izquierdo (DIAN) de cada par
+        right_blocks: Código de bloque del registro derecho (contable) de cada par
+
+    Returns:
+        Arreglo booleano: mismo bloque, o alguno de los dos en WILDCARD_BLOCK
+    """
+    left_blocks = np.asarray(left_blocks, dtype=np.int64)
+    right_blocks = np.asarray(right_blocks, dtype=np.int64)
+    return (left_blocks == right_blocks) | (left_blocks == WILDCARD_BLOCK) | (right_blocks == WILDCARD_BLOCK)
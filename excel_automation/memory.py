@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Uso de Memoria
+Tipos de datos compactos para los DataFrames y medición del RSS máximo por etapa
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import psutil
+except ImportError:  # psutil es opcional: en Linux se lee /proc/self/statm
+    psutil = None
+
+# Proporción máxima de valores distintos para convertir una columna de texto en categórica
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _pyarrow_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _all_strings(values: pd.Series) -> bool:
+    """Verificar que una columna object solo contiene str (sin nulos ni otros tipos)"""
+    return bool(values.map(type).eq(str).all()) if len(values) else False
+
+
+def compact_dtypes(df: pd.DataFrame, category_max_ratio: float = CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """
+    Convertir las columnas a tipos de datos compactos sin perder información
+
+    - Texto repetido (pocos valores distintos): category.
+    - Resto del texto: string[pyarrow] (o string si pyarrow no está instalado).
+    - Enteros y decimales con valores enteros y sin nulos: el entero más pequeño que los contiene.
+
+    Solo se convierten columnas object formadas únicamente por str, para que las
+    comparaciones posteriores no encuentren nulos nuevos (pd.NA).
+
+    Args:
+        df: DataFrame a compactar
+        category_max_ratio: Proporción máxima de valores distintos para usar category
+
+    Returns:
+        DataFrame nuevo con los tipos compactos (mismos valores, índice y columnas)
+    """
+    string_dtype = pd.StringDtype('pyarrow') if _pyarrow_available() else pd.StringDtype()
+    compact = df.copy(deep=False)
+
+    for position in range(compact.shape[1]):
+        values = compact.iloc[:, position]
+        dtype = values.dtype
+
+        if dtype == object:
+            if not _all_strings(values):
+                continue
+            if values.nunique() <= category_max_ratio * len(values):
+                compact.isetitem(position, values.astype('category'))
+            else:
+                compact.isetitem(position, values.astype(string_dtype))
+
+        elif pd.api.types.is_integer_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+            compact.isetitem(position, pd.to_numeric(values, downcast='integer'))
+
+        elif pd.api.types.is_float_dtype(dtype) and len(values):
+            numbers = values.to_numpy()
+            # Solo decimales que en realidad son enteros: los montos con centavos conservan float64
+            if np.isfinite(numbers).all() and (numbers == np.round(numbers)).all():
+                compact.isetitem(position, pd.to_numeric(numbers.astype(np.int64), downcast='integer'))
+
+    return compact
+
+
+def frame_memory_bytes(df: pd.DataFrame) -> int:
+    """Memoria ocupada por un DataFrame, incluidos los objetos str de las columnas object"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def current_rss() -> Optional[int]:
+    """
+    RSS actual del proceso en bytes
+
+    Returns:
+        Bytes residentes, o None si no se puede medir en esta plataforma
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class StageMemoryTracker:
+    """Medición del RSS máximo de cada etapa del procesamiento (muestreo en segundo plano)"""
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Inicializar el medidor
+
+        Args:
+            interval: Segundos entre muestras del RSS
+        """
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Medir una etapa: RSS al inicio, al final y máximo muestreado durante la etapa
+
+        Args:
+            name: Nombre de la etapa
+        """
+        start_rss = current_rss()
+        if start_rss is None:
+            yield
+            return
+
+        peak = [start_rss]
+        stop = threading.Event()
+
+        def sample():
+            while not stop.wait(self.interval):
+                rss = current_rss()
+                if rss > peak[0]:
+                    peak[0] = rss
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            end_rss = current_rss()
+            entry = {
+                'stage': name,
+                'seconds': time.perf_counter() - start,
+                'rss_start': start_rss,
+                'rss_end': end_rss,
+                'rss_peak': max(peak[0], end_rss),
+            }
+            self.stages.append(entry)
+            self.logger.info(
+                f"Etapa '{name}': RSS máximo {entry['rss_peak'] / 2**20:.1f} MB "
+                f"(inicio {start_rss / 2**20:.1f} MB, fin {end_rss / 2**20:.1f} MB, {entry['seconds']:.2f}s)"
+            )
+
+    def summary(self) -> str:
+        """Tabla de texto con el RSS máximo por etapa"""
+        lines = [f"{'Etapa':<28}{'RSS máx (MB)':>14}{'Δ fin (MB)':>12}{'Tiempo (s)':>12}"]
+        for entry in self.stages:
+            lines.append(
+                f"{entry['stage']:<28}{entry['rss_peak'] / 2**20:>14.1f}"
+                f"{(entry['rss_end'] - entry['rss_start']) / 2**20:>12.1f}{entry['seconds']:>12.2f}"
+            )
+        return '\n'.join(lines)
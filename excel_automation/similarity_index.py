@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de Similitud de Texto
+Vectores TF-IDF de n-gramas de caracteres con recuperación top-k por coseno
+"""
+
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .matching_engine import WILDCARD_BLOCK
+
+# Máximo de SequenceMatcher por documento que conserva cada índice (los más usados)
+MATCHER_CACHE_SIZE = 4096
+
+
+def char_ngrams(text: str, ngram_size: int) -> List[str]:
+    """
+    Obtener los n-gramas de caracteres de un texto (con bordes de palabra)
+
+    Args:
+        text: Texto ya normalizado
+        ngram_size: Tamaño del n-grama
+
+    Returns:
+        Lista de n-gramas (con repeticiones)
+    """
+    padded = f' {text} '
+    if len(padded) <= ngram_size:
+        return [padded]
+    return [padded[i:i + ngram_size] for i in range(len(padded) - ngram_size + 1)]
+
+
+class CharNgramIndex:
+    """Índice invertido de vectores TF-IDF de n-gramas de caracteres"""
+
+    def __init__(self, texts: Sequence[str], ngram_size: int = 3,
+                 blocks: Optional[np.ndarray] = None, matcher_cache_size: int = MATCHER_CACHE_SIZE):
+        """
+        Construir el índice sobre el corpus (se normaliza a minúsculas una sola vez)
+
+        Args:
+            texts: Textos del corpus (lado contable)
+            ngram_size: Tamaño de los n-gramas de caracteres
+            blocks: Código de bloque opcional por documento; las consultas con bloque
+                solo se comparan contra documentos del mismo bloque o en WILDCARD_BLOCK,
+                y las consultas en WILDCARD_BLOCK contra todos
+            matcher_cache_size: Máximo de SequenceMatcher por documento en caché (LRU)
+        """
+        self.ngram_size = ngram_size
+        self.texts = [str(text).lower() for text in texts]
+        self.matcher_cache_size = matcher_cache_size
+        self._matcher_for = lru_cache(maxsize=matcher_cache_size)(self._build_matcher)
+
+        self.blocks = None
+        self._block_docs: Dict[int, np.ndarray] = {}
+        if blocks is not None:
+            self.blocks = np.asarray(blocks, dtype=np.int64)
+            order = np.argsort(self.blocks, kind='stable')
+            codes, starts = np.unique(self.blocks[order], return_index=True)
+            for code, docs in zip(codes.tolist(), np.split(order, starts[1:])):
+                self._block_docs[code] = docs
+
+        vocabulary: Dict[str, int] = {}
+        doc_ids: List[int] = []
+        gram_ids: List[int] = []
+        counts: List[int] = []
+
+        for doc_id, text in enumerate(self.texts):
+            for gram, count in Counter(char_ngrams(text, ngram_size)).items():
+                doc_ids.append(doc_id)
+                gram_ids.append(vocabulary.setdefault(gram, len(vocabulary)))
+                counts.append(count)
+
+        n_docs = len(self.texts)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        gram_ids = np.asarray(gram_ids, dtype=np.int64)
+
+        # IDF suavizado y vectores de documento normalizados (L2)
+        document_frequency = np.bincount(gram_ids, minlength=len(vocabulary))
+        self._idf = np.log((1 + n_docs) / (1 + document_frequency)) + 1.0
+        self._unseen_idf = np.log(1 + n_docs) + 1.0
+
+        weights = np.asarray(counts, dtype=np.float64) * self._idf[gram_ids]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights ** 2, minlength=n_docs))
+        if len(weights):
+            weights /= norms[doc_ids]
+
+        # Listas de postings agrupadas por n-grama (formato CSR)
+        order = np.argsort(gram_ids, kind='stable')
+        self._posting_docs = doc_ids[order]
+        self._posting_weights = weights[order]
+        self._posting_starts = np.concatenate(([0], np.cumsum(document_frequency))).astype(np.int64)
+        self._vocabulary = vocabulary
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getstate__(self) -> Dict[str, object]:
+        # La caché de SequenceMatcher no se envía a los procesos de trabajo: cada uno arma la suya
+        state = self.__dict__.copy()
+        del state['_matcher_for']
+        return state
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__dict__.update(state)
+        self._matcher_for = lru_cache(maxsize=self.matcher_cache_size)(self._build_matcher)
+
+    def _build_matcher(self, doc_id: int) -> SequenceMatcher:
+        """SequenceMatcher con el documento como seq2 (su preprocesamiento se hace una vez)"""
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(self.texts[doc_id])
+        return matcher
+
+    def _block_candidates(self, block: int) -> np.ndarray:
+        """Documentos comparables con una consulta del bloque (ordenados por id)"""
+        if block == WILDCARD_BLOCK:
+            return np.arange(len(self.texts), dtype=np.int64)
+        empty_docs = np.empty(0, dtype=np.int64)
+        return np.union1d(self._block_docs.get(block, empty_docs), self._block_docs.get(WILDCARD_BLOCK, empty_docs))
+
+    def _query_vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Vector TF-IDF normalizado de la consulta (solo n-gramas del vocabulario)"""
+        gram_counts = Counter(char_ngrams(text, self.ngram_size))
+
+        known_ids = []
+        known_weights = []
+        squared_norm = 0.0
+        for gram, count in gram_counts.items():
+            gram_id = self._vocabulary.get(gram)
+            if gram_id is None:
+                squared_norm += (count * self._unseen_idf) ** 2
+                continue
+            weight = count * self._idf[gram_id]
+            known_ids.append(gram_id)
+            known_weights.append(weight)
+            squared_norm += weight ** 2
+
+        if not known_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        return (np.asarray(known_ids, dtype=np.int64),
+                np.asarray(known_weights, dtype=np.float64) / np.sqrt(squared_norm))
+
+    def top_k(self, text: str, k: Optional[int],
+              block: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recuperar los documentos más similares por coseno
+
+        Args:
+            text: Texto de consulta ya en minúsculas
+            k: Número máximo de documentos (None = todos los documentos con coseno > 0)
+            block: Código de bloque opcional (solo documentos de ese bloque o en
+                WILDCARD_BLOCK; WILDCARD_BLOCK = todos los documentos)
+
+        Returns:
+            Tuple con (ids de documento, coseno) ordenados por coseno descendente y
+            luego por id ascendente
+        """
+        gram_ids, query_weights = self._query_vector(text)
+        if len(gram_ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        starts = self._posting_starts[gram_ids]
+        lengths = self._posting_starts[gram_ids + 1] - starts
+        total = int(lengths.sum())
+        posting_idx = np.arange(total, dtype=np.int64) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+
+        docs = self._posting_docs[posting_idx]
+        contributions = self._posting_weights[posting_idx] * np.repeat(query_weights, lengths)
+
+        if block is not None and block != WILDCARD_BLOCK and self.blocks is not None:
+            doc_blocks = self.blocks[docs]
+            keep = (doc_blocks == block) | (doc_blocks == WILDCARD_BLOCK)
+            docs = docs[keep]
+            contributions = contributions[keep]
+
+        doc_ids, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions, minlength=len(doc_ids))
+
+        order = np.lexsort((doc_ids, -scores))
+        if k is not None:
+            order = order[:k]
+        return doc_ids[order], scores[order]
+
+    def sequence_ratio(self, query: str, doc_id: int, threshold: float = 0.0) -> float:
+        """
+        Similitud exacta de difflib entre la consulta y un documento
+
+        Args:
+            query: Texto de consulta ya en minúsculas
+            doc_id: Id del documento
+            threshold: Si las cotas rápidas quedan por debajo, se retorna 0.0 sin calcular
+
+        Returns:
+            SequenceMatcher(None, query, documento).ratio()
+        """
+        # SequenceMatcher por documento en una caché acotada (ver matcher_cache_size)
+        matcher = self._matcher_for(doc_id)
+        matcher.set_seq1(query)
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            return 0.0
+        return matcher.ratio()
+
+    def search(self, queries: Sequence[str], top_k: Optional[int] = 20, threshold: float = 0.7,
+               rerank: bool = True, query_blocks: Optional[Sequence[int]] = None
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Buscar candidatos para un lote de consultas
+
+        Args:
+            queries: Textos de consulta (lado DIAN)
+            top_k: Candidatos recuperados por coseno por consulta (None = búsqueda exhaustiva)
+            threshold: Similitud mínima para conservar un candidato
+            rerank: Si True, el puntaje final es el ratio exacto de SequenceMatcher
+            query_blocks: Código de bloque opcional por consulta (requiere índice con bloques)
+
+        Returns:
+            Tuple con (posición de consulta, id de documento, puntaje), agrupados por
+            consulta y ordenados por puntaje descendente y luego por id de documento
+        """
+        query_positions = []
+        doc_positions = []
+        scores = []
+
+        all_docs = np.arange(len(self.texts), dtype=np.int64)
+
+        for query_pos, query in enumerate(queries):
+            query = str(query).lower()
+            block = None
+            if query_blocks is not None and self.blocks is not None:
+                block = int(query_blocks[query_pos])
+
+            if top_k is None and rerank:
+                # Exhaustivo: equivale a comparar contra todo el corpus (o todo el bloque)
+                candidate_ids = all_docs if block is None else self._block_candidates(block)
+                candidate_scores = None
+            else:
+                candidate_ids, candidate_scores = self.top_k(query, top_k, block)
+
+            if rerank:
+                candidate_scores = np.array(
+                    [self.sequence_ratio(query, doc_id, threshold) for doc_id in candidate_ids.tolist()],
+                    dtype=np.float64
+                )
+
+            keep = candidate_scores >= threshold
+            candidate_ids = candidate_ids[keep]
+            candidate_scores = candidate_scores[keep]
+            order = np.lexsort((candidate_ids, -candidate_scores))
+
+            query_positions.append(np.full(len(order), query_pos, dtype=np.int64))
+            doc_positions.append(candidate_ids[order])
+            scores.append(candidate_scores[order])
+
+        if not query_positions:
+            return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                    np.empty(0, dtype=np.float64))
+
+        return np.concatenate(query_positions), np.concatenate(doc_positions), np.concatenate(scores)
+
+
+# Índice compartido por cada proceso de trabajo (se recibe una sola vez en el inicializador)
+_worker_index: Optional[CharNgramIndex] = None
+_worker_options: Dict[str, object] = {}
+
+
+def _init_search_worker(index: CharNgramIndex, options: Dict[str, object]):
+    """Inicializar un proceso de trabajo con el corpus y los parámetros de búsqueda"""
+    global _worker_index, _worker_options
+    _worker_index = index
+    _worker_options = options
+
+
+def _search_shard(shard: Tuple[int, List[str], Optional[np.ndarray]]
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Buscar candidatos para un fragmento de consultas dentro de un proceso de trabajo"""
+    offset, queries, query_blocks = shard
+    query_positions, doc_positions, scores = _worker_index.search(
+        queries, query_blocks=query_blocks, **_worker_options
+    )
+    return query_positions + offset, doc_positions, scores
+
+
+def parallel_search(index: CharNgramIndex, queries: Sequence[str], workers: int,
+                    top_k: Optional[int] = 20, threshold: float = 0.7, rerank: bool = True,
+                    query_blocks: Optional[Sequence[int]] = None
+                    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ejecutar CharNgramIndex.search repartiendo las consultas en un ProcessPoolExecutor
+
+    El índice se envía a cada proceso una sola vez (inicializador) y los fragmentos se
+    combinan en orden, así que el resultado es idéntico al de la búsqueda en serie.
+
+    Args:
+        index: Índice construido sobre el corpus contable
+        queries: Textos de consulta (lado DIAN)
+        workers: Número de procesos
+        top_k: Candidatos recuperados por coseno por consulta
+        threshold: Similitud mínima
+        rerank: Si True, reordenar con SequenceMatcher
+        query_blocks: Código de bloque opcional por consulta
+
+    Returns:
+        Tuple con (posición de consulta, id de documento, puntaje), igual que search()
+    """
+    queries = [str(query) for query in queries]
+    options = {'top_k': top_k, 'threshold': threshold, 'rerank': rerank}
+    if query_blocks is not None:
+        query_blocks = np.asarray(query_blocks, dtype=np.int64)
+
+    # Varios fragmentos por proceso para equilibrar la carga
+    shard_size = max(1, -(-len(queries) // (workers * 4)))
+    shards = [
+        (start, queries[start:start + shard_size],
+         None if query_blocks is None else query_blocks[start:start + shard_size])
+        for start in range(0, len(queries), shard_size)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                             initargs=(index, options)) as executor:
+        results = list(executor.map(_search_shard, shards))
+
+    if not results:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float64))
+
+    query_positions, doc_positions, scores = zip(*results)
+    return np.concatenate(query_positions), np.concatenate(doc_positions), np.concatenate(scores)
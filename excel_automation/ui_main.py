@@ -437,15 +437,12 @@ class ProcessingThread(QThread):
             self.progress.emit("Inicializando procesador de causación...")
             processor = CausacionProcessor()
             
-            # Cargar archivo DIAN
-            self.progress.emit("Cargando archivo DIAN...")
-            dian_df = processor.load_dian_file(self.dian_file)
-            self.progress.emit(f"Archivo DIAN cargado: {len(dian_df)} registros")
-            
-            # Cargar archivo contable
-            self.progress.emit("Cargando archivo contable...")
-            contable_df = processor.load_contable_file(self.contable_file)
-            self.progress.emit(f"Archivo contable cargado: {len(contable_df)} registros")
+            # Cargar archivos DIAN y contable en paralelo (progreso por archivo); esta etapa
+            # mide solo este proceso, el RSS de cada carga llega como 'Carga DIAN' / 'Carga contable'
+            with processor.memory_tracker.stage("Carga (proceso principal)"):
+                dian_df, contable_df = processor.load_files_concurrently(
+                    self.dian_file, self.contable_file, progress_callback=self.progress.emit
+                )
             
             # Validar archivos
             self.progress.emit("Validando archivos...")
@@ -456,20 +453,23 @@ class ProcessingThread(QThread):
             
             # Realizar matching de datos
             self.progress.emit("Realizando cruce de datos...")
-            matching_result = processor.perform_data_matching(dian_df, contable_df)
+            with processor.memory_tracker.stage("Cruce de datos"):
+                matching_result = processor.perform_data_matching(dian_df, contable_df)
             matches_df = matching_result['matches']
             non_matches_df = matching_result['non_matches']
             self.progress.emit(f"Cruce completado: {len(matches_df)} coincidencias, {len(non_matches_df)} no coincidencias")
             
             # Generar DataFrames estructurados
             self.progress.emit("Generando DataFrames de resultado...")
-            coincidencias_df = processor.create_coincidencias_dataframe(matches_df)
-            no_coincidencias_df = processor.create_no_coincidencias_dataframe(non_matches_df)
+            with processor.memory_tracker.stage("DataFrames de resultado"):
+                coincidencias_df = processor.create_coincidencias_dataframe(matches_df)
+                no_coincidencias_df = processor.create_no_coincidencias_dataframe(non_matches_df)
             self.progress.emit("DataFrames estructurados creados")
             
             # Calcular estadísticas
             self.progress.emit("Calculando estadísticas...")
-            stats = processor.calculate_statistics(coincidencias_df, no_coincidencias_df)
+            with processor.memory_tracker.stage("Estadísticas"):
+                stats = processor.calculate_statistics(coincidencias_df, no_coincidencias_df)
             self.stats = stats
             self.progress.emit(f"Estadísticas calculadas - Calidad: {stats['resumen_ejecutivo']['calidad_general']}")
             
@@ -479,16 +479,21 @@ class ProcessingThread(QThread):
             output_dir = Config.OUTPUT_PATH
             output_dir.mkdir(exist_ok=True)
             
-            excel_path = processor.create_excel_file(
-                coincidencias_df=coincidencias_df,
-                no_coincidencias_df=no_coincidencias_df,
-                output_path=output_dir,
-                stats=stats
-            )
+            with processor.memory_tracker.stage("Archivo Excel"):
+                excel_path = processor.create_excel_file(
+                    coincidencias_df=coincidencias_df,
+                    no_coincidencias_df=no_coincidencias_df,
+                    output_path=output_dir,
+                    stats=stats
+                )
             
             excel_path_obj = Path(excel_path)
             self.progress.emit(f"Archivo Excel creado: {excel_path_obj.name}")
             
+            # Memoria máxima por etapa (proceso principal)
+            for entry in processor.memory_tracker.stages:
+                self.progress.emit(f"Memoria - {entry['stage']}: {entry['rss_peak'] / 2**20:.1f} MB máx.")
+            
             # Mensaje de éxito con estadísticas
             import sys
             is_executable = getattr(sys, 'frozen', False)
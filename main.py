@@ -1,9 +1,14 @@
 import sys
+import multiprocessing
 from pathlib import Path
 
 def main():
     if len(sys.argv) > 1 and sys.argv[1] == "--console":
         run_console_mode()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        run_benchmark_mode(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--memory":
+        run_memory_mode(sys.argv[2:])
     else:
         run_gui_mode()
 
@@ -38,5 +43,59 @@ def run_console_mode():
     except Exception as e:
         print(f"Error durante el procesamiento: {e}")
 
+def run_benchmark_mode(file_args):
+    from excel_automation.excel_reader import benchmark_readers, calamine_available, resolve_backend
+    from config import Config
+    
+    print("=== Benchmark de lectores de Excel ===")
+    if not calamine_available():
+        print("python-calamine no está instalado (pip install python-calamine); se omite ese backend")
+    
+    files = [Path(arg) for arg in file_args] or sorted(Config.INPUT_PATH.glob("*.xlsx"))
+    if not files:
+        print(f"No hay archivos .xlsx en {Config.INPUT_PATH}")
+        return
+    
+    for file_path in files:
+        size_kb = file_path.stat().st_size / 1024
+        print(f"\n{file_path.name} ({size_kb:.0f} KB) - backend automático: {resolve_backend(file_path)}")
+        timings = benchmark_readers(file_path)
+        base = timings['pandas']
+        for backend, seconds in timings.items():
+            print(f"  {backend:<10} {seconds:8.3f} s   x{base / seconds:5.1f}")
+
+def run_memory_mode(args):
+    from excel_automation.causacion_processor import CausacionProcessor
+    from excel_automation.memory import frame_memory_bytes
+    
+    compact = "--compact" in args
+    files = [arg for arg in args if arg != "--compact"]
+    if len(files) != 2:
+        print("Uso: python main.py --memory ARCHIVO_DIAN ARCHIVO_CONTABLE [--compact]")
+        return
+    
+    print(f"=== Memoria por etapa ({'tipos compactos' if compact else 'tipos por defecto'}) ===")
+    processor = CausacionProcessor()
+    processor.compact_dtypes = compact
+    tracker = processor.memory_tracker
+    
+    with tracker.stage("Carga DIAN"):
+        dian_df = processor.load_dian_file(files[0])
+    with tracker.stage("Carga contable"):
+        contable_df = processor.load_contable_file(files[1])
+    with tracker.stage("Cruce de datos"):
+        result = processor.perform_data_matching(dian_df, contable_df)
+    with tracker.stage("DataFrames de resultado"):
+        coincidencias_df = processor.create_coincidencias_dataframe(result['matches'])
+        no_coincidencias_df = processor.create_no_coincidencias_dataframe(result['non_matches'])
+    with tracker.stage("Estadísticas"):
+        processor.calculate_statistics(coincidencias_df, no_coincidencias_df)
+    
+    print(tracker.summary())
+    print(f"\nDataFrame DIAN: {frame_memory_bytes(dian_df) / 2**20:.2f} MB, "
+          f"contable: {frame_memory_bytes(contable_df) / 2**20:.2f} MB")
+
 if __name__ == "__main__":
+    # Necesario para los procesos de trabajo en el ejecutable (PyInstaller)
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
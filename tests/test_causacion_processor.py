@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del procesador sobre DataFrames armados a mano
+"""
+
+import pandas as pd
+import pytest
+
+from excel_automation import causacion_processor
+from excel_automation.causacion_processor import COLUMN_ROLES_CACHE_SIZE, CausacionProcessor
+from excel_automation.frame_cache import FrameCache
+from excel_automation.matching_engine import WILDCARD_BLOCK, build_match_frame
+
+OWN_NIT = '800197268'
+
+
+@pytest.fixture
+def processor():
+    return CausacionProcessor()
+
+
+def nit_frames():
+    dian = pd.DataFrame({
+        'Folio': ['F1', 'F2', 'F3'],
+        'Fecha Emisión': pd.to_datetime(['2024-01-05', '2024-01-06', '2024-01-07']),
+        'NIT Emisor': ['900111111', '900.222.222-1', ''],
+        'NIT Receptor': [OWN_NIT, OWN_NIT, OWN_NIT],
+        'Total': [1000.0, 2000.0, 3000.0],
+    }, index=[10, 11, 12])
+    contable = pd.DataFrame({
+        'NIT': ['900222222', '900111111', '900111111', '900333333'],
+        'Fecha': pd.to_datetime(['2024-01-05', '2024-01-05', '2024-01-06', '2024-01-07']),
+        'Valor': [1000.0, 1000.0, 2000.0, 3000.0],
+    }, index=[20, 21, 22, 23])
+    return dian, contable
+
+
+def test_nit_blocks_use_the_counterparty_and_wildcard_for_missing_nit(processor):
+    dian, contable = nit_frames()
+
+    dian_blocks, contable_blocks = processor._build_nit_blocks(dian, contable)
+
+    assert dian_blocks[12] == WILDCARD_BLOCK
+    assert dian_blocks[10] == contable_blocks[21] == contable_blocks[22]
+    assert dian_blocks[11] == contable_blocks[20]
+    assert contable_blocks[23] not in (dian_blocks[10], dian_blocks[11])
+
+
+def test_secondary_matches_with_nit_blocking_stay_inside_one_block(processor):
+    dian, contable = nit_frames()
+    no_matches = build_match_frame([], [], 'exact_document', 1.0, '')
+
+    unblocked = processor._find_secondary_matches(dian, contable, no_matches)
+    nit_blocks = processor._build_nit_blocks(dian, contable)
+    blocked = processor._find_secondary_matches(dian, contable, no_matches, nit_blocks)
+
+    assert list(zip(unblocked['dian_idx'], unblocked['contable_idx'])) == [(10, 20), (11, 22), (12, 23)]
+    assert list(zip(blocked['dian_idx'], blocked['contable_idx'])) == [(10, 21), (12, 23)]
+
+    dian_blocks, contable_blocks = nit_blocks
+    for dian_idx, contable_idx in zip(blocked['dian_idx'], blocked['contable_idx']):
+        dian_block, contable_block = dian_blocks[dian_idx], contable_blocks[contable_idx]
+        assert dian_block == contable_block or WILDCARD_BLOCK in (dian_block, contable_block)
+
+
+def test_column_roles_are_reused_per_column_set_and_bounded(processor):
+    df = pd.DataFrame(columns=['Valor', 'Fecha'])
+    assert processor.column_roles(df) is processor.column_roles(df.copy())
+
+    for number in range(COLUMN_ROLES_CACHE_SIZE + 5):
+        processor.column_roles(pd.DataFrame(columns=[f'columna_{number}']))
+
+    assert processor._column_roles.cache_info().currsize == COLUMN_ROLES_CACHE_SIZE
+
+
+def test_contable_cache_key_covers_projection_rules(processor, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    processor.frame_cache = FrameCache(tmp_path / 'cache')
+    source = tmp_path / 'archivo.xlsx'
+    source.write_bytes(b'contenido')
+    contable_key = processor._frame_cache_key(source, 'contable')
+    dian_key = processor._frame_cache_key(source, 'dian')
+
+    monkeypatch.setattr(causacion_processor, 'CONTABLE_PROJECTION_RULES', [['valor', 'nit'], [0, 90]])
+
+    assert processor._frame_cache_key(source, 'contable') != contable_key
+    assert processor._frame_cache_key(source, 'dian') == dian_key
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de las reglas de limpieza: el plan compilado equivale a los filtros escritos a mano
+que reemplaza
+"""
+
+import pandas as pd
+import pytest
+
+from excel_automation.cleaning_rules import CleaningPlan, load_cleaning_rules, rules_fingerprint
+
+DIAN_COLUMNS = ['Tipo de documento', 'CUFE/CUDE', 'Folio', 'Prefijo', 'Divisa', 'Forma de Pago',
+                'Medio de Pago', 'Fecha Emisión', 'Fecha Recepción', 'NIT Emisor', 'Nombre Emisor']
+
+
+def dian_frame() -> pd.DataFrame:
+    rows = [
+        ['Factura electrónica', 'a1', 101, 'FE', 'COP', 'Contado', 'Efectivo', '01-01-2024', '02-01-2024', '900', ' Proveedor Uno '],
+        [' Application response ', 'a2', 102, 'AR', 'COP', 'Contado', 'Efectivo', '01-01-2024', '02-01-2024', '901', 'Proveedor Dos'],
+        ['Nómina individual', 'a3', 103, 'NI', 'COP', 'Contado', 'Efectivo', '01-01-2024', '02-01-2024', '902', 'Proveedor Tres'],
+        ['nomina de ajuste', 'a4', 104, 'NA', 'COP', 'Contado', 'Efectivo', '01-01-2024', '02-01-2024', '903', 'Proveedor Cuatro'],
+        ['Factura electrónica', 'a5', 105, 'FE', 'COP', 'Crédito', 'Banco', '03-01-2024', '04-01-2024', '830', 'meridian consulting ltda'],
+        ['Nota crédito', 'a6', 106, 'NC', 'COP', 'Crédito', 'Banco', '05-01-2024', '06-01-2024', '904', None],
+    ]
+    return pd.DataFrame(rows, columns=DIAN_COLUMNS)
+
+
+def legacy_dian_filters(df: pd.DataFrame) -> pd.DataFrame:
+    """Filtros DIAN anteriores a las reglas (espacios, tipo de documento y emisor propio)"""
+    clean_df = df.copy()
+    for col in clean_df.select_dtypes(include=['object']).columns:
+        clean_df[col] = clean_df[col].astype(str).str.strip()
+
+    def excluded_type(values):
+        return (values.str.contains('APPLICATION RESPONSE', case=False, na=False) |
+                values.str.contains('NOMINA', case=False, na=False) |
+                values.str.contains('NÓMINA', case=False, na=False))
+
+    columna_a = clean_df.columns[0]
+    clean_df[columna_a] = clean_df[columna_a].astype(str).str.strip().str.upper()
+    clean_df = clean_df[~excluded_type(clean_df[columna_a])].copy()
+
+    columna_k = clean_df.columns[10]
+    clean_df[columna_k] = clean_df[columna_k].astype(str).str.strip().str.upper()
+    es_meridian = clean_df[columna_k].str.contains('MERIDIAN CONSULTING LTDA', case=False, na=False)
+    clean_df = clean_df[~(es_meridian & excluded_type(clean_df[columna_a]))].copy()
+
+    tipo_doc_cols = [col for col in clean_df.columns if any(kw in col.lower() for kw in ['tipo', 'documento', 'type', 'doc'])]
+    for col in tipo_doc_cols:
+        clean_df[col] = clean_df[col].astype(str).str.strip().str.upper()
+        clean_df = clean_df[~excluded_type(clean_df[col])].copy()
+
+    nombre_cols = [col for col in clean_df.columns if any(kw in col.lower() for kw in ['nombre', 'emisor', 'name', 'issuer', 'remitente'])]
+    for col in nombre_cols:
+        clean_df[col] = clean_df[col].astype(str).str.strip().str.upper()
+        es_meridian = clean_df[col].str.contains('MERIDIAN CONSULTING LTDA', case=False, na=False)
+        mask = ~(es_meridian & excluded_type(clean_df[tipo_doc_cols[0]])) if tipo_doc_cols else ~es_meridian
+        clean_df = clean_df[mask].copy()
+
+    return clean_df
+
+
+def legacy_contable_filters(df: pd.DataFrame) -> pd.DataFrame:
+    """Filtros contables anteriores (fila de metadatos, espacios y comprobante 'P')"""
+    clean_df = df.copy()
+    first_row_values = clean_df.iloc[0].astype(str).str.lower().tolist()
+    metadata_keywords = ['meridian', 'modelo', 'importacion', 'movimiento', 'contable']
+    if any(any(kw in str(val) for kw in metadata_keywords) for val in first_row_values[:3]):
+        clean_df = clean_df.iloc[1:].reset_index(drop=True)
+
+    for col in clean_df.select_dtypes(include=['object']).columns:
+        clean_df[col] = clean_df[col].astype(str).str.strip()
+
+    primera_columna = clean_df.columns[0]
+    clean_df[primera_columna] = clean_df[primera_columna].astype(str).str.strip().str.upper()
+    return clean_df[clean_df[primera_columna] == 'P'].copy()
+
+
+def run_plan(rules, source, df):
+    plan = CleaningPlan([rule for rule in rules if rule['kind'] != 'coerce'], source)
+    df, _ = plan.run(df, 'raw')
+    df = df.reset_index(drop=True)
+    df, report = plan.run(df, 'clean')
+    return df, report
+
+
+def test_dian_plan_matches_legacy_filters():
+    rules = load_cleaning_rules()
+
+    cleaned, report = run_plan(rules['dian'], 'dian', dian_frame())
+    expected = legacy_dian_filters(dian_frame())
+
+    pd.testing.assert_frame_equal(cleaned, expected)
+    excluded = {entry['name']: entry['rows'] for entry in report if entry['kind'] == 'filter'}
+    assert excluded == {'tipo_documento_excluido': 3, 'emisor_propio_sin_tipo_documento': 0}
+
+
+def test_contable_plan_matches_legacy_filters():
+    rules = load_cleaning_rules()
+    df = pd.DataFrame({
+        'Tipo': ['MERIDIAN MODELO', ' p ', 'P', 'C', 'PP', 'p'],
+        'Código': ['', '1', '2', '3', '4', '5'],
+        'Descripción': ['', ' uno ', 'dos', 'tres', 'cuatro', 'cinco'],
+        'Valor': [None, 10.0, 20.0, 30.0, 40.0, 50.0],
+    })
+
+    cleaned, _ = run_plan(rules['contable'], 'contable', df)
+    expected = legacy_contable_filters(df)
+
+    pd.testing.assert_frame_equal(cleaned, expected)
+
+
+def test_filter_condition_if_missing():
+    rules = [{'name': 'sin_columna', 'kind': 'filter',
+              'all': [{'columns': {'keywords': ['inexistente']}, 'pattern': 'X', 'if_missing': True},
+                      {'columns': {'positions': [0]}, 'pattern': '^B'}]}]
+    df = pd.DataFrame({'a': ['A1', 'B1', 'B2']})
+
+    cleaned, report = CleaningPlan(rules, 'prueba').run(df)
+
+    assert cleaned['a'].tolist() == ['A1']
+    assert report[0]['rows'] == 2
+
+
+@pytest.mark.parametrize('rule', [
+    {'kind': 'unknown'},
+    {'kind': 'normalize', 'ops': ['title']},
+    {'kind': 'coerce', 'type': 'decimal'},
+    {'kind': 'filter', 'all': []},
+    {'kind': 'filter', 'all': [{'pattern': '('}]},
+    {'kind': 'filter', 'stage': 'late', 'all': [{'pattern': 'x'}]},
+])
+def test_invalid_rules_are_rejected_when_compiling(rule):
+    with pytest.raises(ValueError):
+        CleaningPlan([rule], 'prueba')
+
+
+def test_rules_fingerprint_changes_with_rules():
+    rules = load_cleaning_rules()
+    changed = load_cleaning_rules()
+    changed['contable'][-1]['all'][0]['pattern'] = 'Q'
+
+    assert rules_fingerprint(rules) == rules_fingerprint(load_cleaning_rules())
+    assert rules_fingerprint(rules) != rules_fingerprint(changed)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de los roles de columnas: equivalencia con las búsquedas por palabra clave que reemplazan
+"""
+
+import pytest
+
+from excel_automation.column_roles import COLUMN_ROLES, ColumnRoles, fold_column_name
+
+COLUMNS = ['Tipo de documento', 'Folio', 'Fecha Emisión', 'NIT Emisor', 'NIT Receptor', 'IVA',
+           'Total', 'Número de documento', 'Número de documento cruce', 'Descripción', 'Valor IVA',
+           'Crédito', 'Unnamed: 12', 'nit', 'Folio_DIAN', 'Valor_DIAN',
+           'Contable_Número de documento cruce', 'Numero documento', 'Numero documento cruce']
+
+
+def legacy_scan(columns, any_words=(), all_words=(), none_words=()):
+    """Búsqueda por palabras clave en el nombre en minúsculas (lógica anterior)"""
+    found = []
+    for col in columns:
+        lower = str(col).lower()
+        if any_words and not any(word in lower for word in any_words):
+            continue
+        if not all(word in lower for word in all_words):
+            continue
+        if any(word in lower for word in none_words):
+            continue
+        found.append(col)
+    return found
+
+
+@pytest.mark.parametrize('role, any_words, all_words, none_words', [
+    ('valor', ['valor', 'monto', 'importe', 'total', 'debito', 'credito'], [], []),
+    ('fecha', ['fecha', 'date', 'dia', 'mes', 'año'], [], []),
+    ('documento_dian', ['folio', 'numero', 'documento', 'factura'], [], ['tipo']),
+    ('documento_cruce', [], ['numero', 'documento', 'cruce'], []),
+    ('numero_documento', [], ['numero', 'documento'], ['cruce']),
+    ('nit_emisor', [], ['nit', 'emisor'], []),
+    ('identificacion_emisor', ['nit', 'identificacion', 'cedula'], [], ['receptor']),
+    ('monto_dian', ['total', 'valor', 'monto'], [], ['iva']),
+    ('valor_dian', ['total', 'valor'], ['dian'], []),
+    ('unnamed', ['unnamed'], [], []),
+])
+def test_roles_match_legacy_keyword_scans(role, any_words, all_words, none_words):
+    roles = ColumnRoles(COLUMNS)
+    assert roles.columns_for(role) == legacy_scan(COLUMNS, any_words, all_words, none_words)
+
+
+def test_roles_with_several_clauses_and_exact_names():
+    roles = ColumnRoles(COLUMNS)
+
+    # valor_reporte: cualquier 'total', o 'valor' sin 'iva'
+    assert roles.columns_for('valor_reporte') == ['Total', 'Valor_DIAN']
+    assert roles.columns_for('nit_exacto') == ['nit']
+    assert roles.first('folio') == 'Folio'
+    assert roles.first('cruce') == 'Número de documento cruce'
+    assert ColumnRoles(['Total']).first('fecha') is None
+
+
+def test_folded_roles_ignore_accents_and_separators():
+    roles = ColumnRoles(COLUMNS)
+
+    assert fold_column_name('Contable_Número de-documento') == 'contable_numero_de_documento'
+    assert roles.columns_for('documento_cruce_contable') == ['Contable_Número de documento cruce']
+    assert roles.columns_for('documento_cruce_normalizado') == ['Número de documento cruce',
+                                                                'Contable_Número de documento cruce',
+                                                                'Numero documento cruce']
+
+
+def test_custom_roles_and_every_default_role_is_available():
+    roles = ColumnRoles(['Codigo', 'Nombre'], roles={'codigo': [{'any': ['codigo']}]})
+    assert roles.columns_for('codigo') == ['Codigo']
+
+    default_roles = ColumnRoles([])
+    for role in COLUMN_ROLES:
+        assert default_roles.columns_for(role) == []
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del lector openpyxl en streaming: mismo resultado que pd.read_excel
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from excel_automation.excel_reader import read_excel_header, read_excel_openpyxl
+
+HEADER = ['Folio', 'Texto', None, 'Folio', 'Valor', 'Fecha', 'Activo', 'Código', 'Mixto', 'Flag', 'Vacía']
+ROWS = [
+    [101, 'uno', 'x', 1, 1500.5, datetime(2024, 1, 5), True, '00123', 'a', 'TRUE', None],
+    [102, 'NA', None, 2, None, None, False, '45', 7, 'false', None],
+    [103, None, 'z', 3, 20, datetime(2024, 2, 1), True, ' 12 ', 2.5, 'True', None],
+]
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Reporte de prueba'])
+    sheet.append([])
+    sheet.append(HEADER)
+    for row in ROWS:
+        sheet.append(row)
+    path = tmp_path / 'prueba.xlsx'
+    workbook.save(path)
+    return path
+
+
+def test_full_read_matches_pandas(workbook_path):
+    expected = pd.read_excel(workbook_path, header=2)
+    result = read_excel_openpyxl(workbook_path, header=2)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert list(result.columns)[:4] == ['Folio', 'Texto', 'Unnamed: 2', 'Folio.1']
+
+
+@pytest.mark.parametrize('positions', [[0], [1, 4, 5], [0, 3, 7, 8, 9, 10]])
+def test_projected_read_matches_pandas(workbook_path, positions):
+    names = read_excel_header(workbook_path, header=2)
+    expected = pd.read_excel(workbook_path, header=2, usecols=positions)
+    result = read_excel_openpyxl(workbook_path, 2, positions, [names[i] for i in positions])
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_header_only_sheet(tmp_path):
+    workbook = Workbook()
+    workbook.active.append(['Folio', 'Valor'])
+    path = tmp_path / 'vacio.xlsx'
+    workbook.save(path)
+
+    pd.testing.assert_frame_equal(read_excel_openpyxl(path), pd.read_excel(path), check_index_type=False)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la caché de DataFrames limpios (ida y vuelta por Arrow)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_automation.frame_cache import FrameCache
+
+pytest.importorskip('pyarrow')
+
+
+def cleaned_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Folio': ['101', '102', '103'],
+        'Nombre': ['Uno', np.nan, 'Tres'],
+        'Referencia': [None, 'R2', None],
+        'Valor': [10.5, np.nan, 30.0],
+        'Cantidad': [1, 2, 3],
+        'Fecha': pd.to_datetime(['2024-01-01', None, '2024-01-03']),
+    }, index=[5, 7, 9])
+
+
+def test_put_get_round_trip_restores_nan_and_none(tmp_path):
+    cache = FrameCache(tmp_path)
+    df = cleaned_frame()
+
+    assert cache.put('clave', df, {'layout_signature': 'abc', 'rows': 3})
+    cached, metadata = cache.get('clave')
+
+    pd.testing.assert_frame_equal(cached, df)
+    assert cached['Nombre'].iloc[1] is not None and np.isnan(cached['Nombre'].iloc[1])
+    assert cached['Referencia'].iloc[0] is None
+    assert metadata == {'layout_signature': 'abc', 'rows': 3}
+
+
+def test_put_rejects_mixed_nulls_and_missing_key_returns_none(tmp_path):
+    cache = FrameCache(tmp_path)
+    df = pd.DataFrame({'texto': ['a', None, np.nan]})
+
+    assert not cache.put('mixta', df)
+    assert cache.get('mixta') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_corrupt_entry_is_removed(tmp_path):
+    cache = FrameCache(tmp_path)
+    (tmp_path / 'rota.arrow').write_bytes(b'no es arrow')
+
+    assert cache.get('rota') is None
+    assert not (tmp_path / 'rota.arrow').exists()
+
+
+def test_make_key_depends_on_content_namespace_and_version(tmp_path):
+    cache = FrameCache(tmp_path / 'cache')
+    first = tmp_path / 'a.xlsx'
+    second = tmp_path / 'b.xlsx'
+    first.write_bytes(b'contenido')
+    second.write_bytes(b'contenido')
+
+    key = cache.make_key(first, 'dian', '2')
+    assert key == cache.make_key(second, 'dian', '2')
+    assert key != cache.make_key(first, 'contable', '2')
+    assert key != cache.make_key(first, 'dian', '3')
+
+
+def test_disabled_cache_does_nothing(tmp_path):
+    cache = FrameCache(tmp_path, enabled=False)
+
+    assert not cache.put('clave', cleaned_frame())
+    assert cache.get('clave') is None
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del almacén de layouts y de su firma
+"""
+
+from excel_automation.layout_store import LayoutStore, layout_signature
+
+HEADER = ['Tipo de documento', 'CUFE/CUDE', 'Folio', 'Prefijo', 'NIT Emisor', 'Total']
+
+
+def test_put_get_round_trip(tmp_path):
+    store = LayoutStore(tmp_path)
+    layout = {'header_row': 2, 'usecols': [0, 2, 5], 'document_column': 'Folio'}
+
+    assert store.put('firma', layout)
+    assert store.get('firma') == layout
+    assert store.get('otra') is None
+
+
+def test_invalid_layout_is_removed(tmp_path):
+    store = LayoutStore(tmp_path)
+    (tmp_path / 'rota.json').write_text('[1, 2', encoding='utf-8')
+    (tmp_path / 'lista.json').write_text('[1, 2]', encoding='utf-8')
+
+    assert store.get('rota') is None
+    assert store.get('lista') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disabled_store_does_nothing(tmp_path):
+    store = LayoutStore(tmp_path, enabled=False)
+
+    assert not store.put('firma', {'header_row': 0})
+    assert store.get('firma') is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_clear_removes_layouts(tmp_path):
+    store = LayoutStore(tmp_path)
+    store.put('a', {'header_row': 0})
+    store.put('b', {'header_row': 1})
+
+    store.clear()
+
+    assert store.get('a') is None and store.get('b') is None
+
+
+def test_signature_depends_on_header_source_version_and_projection():
+    signature = layout_signature('dian', HEADER, '1', projection=['folio', 'total'])
+
+    assert signature == layout_signature('dian', list(HEADER), '1', projection=('folio', 'total'))
+    assert signature != layout_signature('contable', HEADER, '1', projection=['folio', 'total'])
+    assert signature != layout_signature('dian', HEADER[:-1], '1', projection=['folio', 'total'])
+    assert signature != layout_signature('dian', HEADER, '2', projection=['folio', 'total'])
+    assert signature != layout_signature('dian', HEADER, '1', projection=['folio'])
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del motor de cruce: equivalencia con la lógica escalar que reemplaza
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_automation.matching_engine import (WILDCARD_BLOCK, DocumentHashIndex, ValueWindowIndex,
+                                              block_compatibility_mask, document_tokens,
+                                              folio_token_groups, greedy_one_to_one, nit_check_digit,
+                                              normalize_nit, parse_amounts, value_tolerance_mask)
+
+
+def scalar_greedy(left, right, preference, used_right):
+    """Asignación "el primero gana" fila a fila (lógica anterior)"""
+    chosen = []
+    for group in pd.unique(left):
+        pairs = [pair for pair in np.flatnonzero(left == group) if not used_right[right[pair]]]
+        if pairs:
+            best = min(pairs, key=lambda pair: preference[pair])
+            used_right[right[best]] = True
+            chosen.append(best)
+    return chosen
+
+
+def scalar_window(values, low, high):
+    """Diccionario valor -> posiciones recorrido en orden de inserción (lógica anterior)"""
+    by_value = {}
+    for position, value in enumerate(values):
+        if not np.isnan(value):
+            by_value.setdefault(value, []).append(position)
+
+    candidates = []
+    for value, positions in by_value.items():
+        if low <= value <= high:
+            candidates.extend(positions)
+    return candidates
+
+
+def test_greedy_one_to_one_resolves_conflicts():
+    left = np.array([0, 0, 1, 1, 2, 3, 3])
+    right = np.array([5, 6, 5, 7, 6, 7, 8])
+    preference = np.array([0, 1, 0, 1, 0, 1, 0])
+    used = np.zeros(10, dtype=bool)
+
+    chosen = greedy_one_to_one(left, right, preference, used)
+
+    assert chosen.tolist() == [0, 3, 4, 6]
+    assert used[[5, 6, 7, 8]].all()
+
+
+def test_greedy_one_to_one_matches_scalar_assignment():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        sizes = rng.integers(1, 5, size=30)
+        left = np.repeat(np.arange(30), sizes)
+        right = rng.integers(0, 25, size=len(left))
+        preference = np.concatenate([rng.permutation(size) for size in sizes])
+        used = rng.random(25) < 0.2
+        expected_used = used.copy()
+
+        chosen = greedy_one_to_one(left, right, preference, used)
+
+        assert chosen.tolist() == scalar_greedy(left, right, preference, expected_used)
+        assert used.tolist() == expected_used.tolist()
+
+
+def test_greedy_one_to_one_empty():
+    used = np.zeros(3, dtype=bool)
+    empty = np.empty(0, dtype=np.int64)
+    assert len(greedy_one_to_one(empty, empty, empty, used)) == 0
+    assert not used.any()
+
+
+@pytest.mark.parametrize('max_pairs', [1, 3, 2_000_000])
+def test_iter_candidate_pairs_matches_scalar_window(max_pairs):
+    rng = np.random.default_rng(3)
+    values = np.round(rng.choice([10.0, 12.5, 99.99, 100.0, 101.0, 250.0, -20.0, np.nan], size=40), 2)
+    queries = np.array([100.0, 11.0, 250.0, -20.0, 5.0, 0.0])
+    low = queries * 0.9
+    high = queries * 1.1
+
+    index = ValueWindowIndex(values, np.arange(len(values)))
+    found = {query: [] for query in range(len(queries))}
+    for query, position, preference in index.iter_candidate_pairs(low, high, max_pairs=max_pairs):
+        for query_pos in np.unique(query):
+            in_query = query == query_pos
+            ordered = position[in_query][np.argsort(preference[in_query], kind='stable')]
+            found[int(query_pos)].extend(ordered.tolist())
+
+    for query_pos in range(len(queries)):
+        assert found[query_pos] == scalar_window(values, low[query_pos], high[query_pos])
+
+
+def test_document_hash_index_join():
+    index = DocumentHashIndex(pd.Series(['A', 'B', 'A', None, 'C']))
+    left, right = index.join(pd.Series(['A', 'X', 'C', 'B']))
+
+    assert left.tolist() == [0, 0, 2, 3]
+    assert right.tolist() == [0, 2, 4, 1]
+
+
+@pytest.mark.parametrize('nit_base, digit', [('800197268', 4), ('890903938', 8), ('860034313', 7)])
+def test_nit_check_digit(nit_base, digit):
+    assert nit_check_digit(nit_base) == digit
+
+
+def test_normalize_nit_formats():
+    values = pd.Series(['800.197.268-4', '8001972684', 800197268.0, ' 800197268 ', '0123',
+                        '1234567890', None, 'nan', ''])
+    assert normalize_nit(values).tolist() == ['800197268', '800197268', '800197268', '800197268',
+                                              '123', '1234567890', '', '', '']
+
+
+def test_value_tolerance_mask():
+    values1 = np.array([100.0, 100.0, 0.0, 0.0, np.nan, -100.0])
+    values2 = np.array([104.0, 106.0, 0.0, 5.0, 100.0, -103.0])
+    assert value_tolerance_mask(values1, values2, 0.05).tolist() == [True, False, True, False, False, True]
+
+
+def test_parse_amounts_colombian_formats():
+    values = pd.Series(['$ 1.234.567,89', '1,234,567.89', '(1.500)', '0.500', '2.5E3', 'COP 12', 'abc', None, 7],
+                       dtype=object)
+    parsed = parse_amounts(values)
+    expected = [1234567.89, 1234567.89, -1500.0, 0.5, 2500.0, 12.0, np.nan, np.nan, 7.0]
+    np.testing.assert_allclose(parsed, expected)
+
+
+def test_folio_tokens_found_in_document_tokens():
+    tokens = document_tokens(pd.Series(['FE-1234/5', 'X 99', 1234.0, '777.0']))
+    groups = folio_token_groups(pd.Series(['FE-1234', 1234.0, 777.0, 'FE-9999', '-']))
+
+    assert groups == [('FE', '1234'), ('1234',), ('777',), ('FE', '9999')]
+    assert [all(token in tokens for token in group) for group in groups] == [True, True, True, False]
+
+
+def test_block_compatibility_mask_wildcard():
+    left = np.array([1, 1, WILDCARD_BLOCK, 2])
+    right = np.array([1, 2, 3, WILDCARD_BLOCK])
+    assert block_compatibility_mask(left, right).tolist() == [True, False, True, True]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del índice de n-gramas: equivalencia con la comparación exhaustiva por SequenceMatcher
+"""
+
+import pickle
+from difflib import SequenceMatcher
+
+import numpy as np
+import pytest
+
+from excel_automation.matching_engine import WILDCARD_BLOCK
+from excel_automation.similarity_index import CharNgramIndex, char_ngrams, parallel_search
+
+CORPUS = ['Servicios de consultoria SAS', 'Papeleria el punto', 'consultoria y servicios',
+          'Transportes del norte', 'servicios de consultoria', 'Ferreteria central']
+QUERIES = ['SERVICIOS DE CONSULTORIA', 'transportes norte', 'algo distinto', 'papeleria punto']
+
+
+def scalar_search(queries, corpus, threshold):
+    """Comparar cada consulta con todo el corpus (lógica anterior)"""
+    pairs = []
+    for query_pos, query in enumerate(queries):
+        scored = [(SequenceMatcher(None, query.lower(), text.lower()).ratio(), doc_id)
+                  for doc_id, text in enumerate(corpus)]
+        scored = [(score, doc_id) for score, doc_id in scored if score >= threshold]
+        for score, doc_id in sorted(scored, key=lambda item: (-item[0], item[1])):
+            pairs.append((query_pos, doc_id, score))
+    return pairs
+
+
+def test_char_ngrams_pads_text():
+    assert char_ngrams('ab', 3) == [' ab', 'ab ']
+    assert char_ngrams('', 3) == ['  ']
+
+
+def test_exhaustive_search_matches_scalar_comparison():
+    index = CharNgramIndex(CORPUS)
+    query_pos, doc_ids, scores = index.search(QUERIES, top_k=None, threshold=0.5, rerank=True)
+
+    expected = scalar_search(QUERIES, CORPUS, 0.5)
+    assert list(zip(query_pos.tolist(), doc_ids.tolist())) == [(query, doc) for query, doc, _ in expected]
+    np.testing.assert_allclose(scores, [score for _, _, score in expected])
+
+
+def test_top_k_retrieval_keeps_best_candidates():
+    index = CharNgramIndex(CORPUS)
+    doc_ids, scores = index.top_k('servicios de consultoria', 2)
+
+    all_ids, all_scores = index.top_k('servicios de consultoria', None)
+    assert doc_ids.tolist() == all_ids[:2].tolist()
+    assert doc_ids[0] == 4
+    assert np.all(np.diff(all_scores) <= 0)
+    np.testing.assert_allclose(scores[0], 1.0)
+
+
+def test_top_k_with_rerank_finds_the_exact_best_match():
+    index = CharNgramIndex(CORPUS)
+    query_pos, doc_ids, _ = index.search(QUERIES, top_k=3, threshold=0.7, rerank=True)
+
+    expected = scalar_search(QUERIES, CORPUS, 0.7)
+    best_expected = {query: doc for query, doc, _ in reversed(expected)}
+    best_found = {query: doc for query, doc in reversed(list(zip(query_pos.tolist(), doc_ids.tolist())))}
+    assert best_found == best_expected
+
+
+def test_bounded_matcher_cache_keeps_scores_and_survives_pickling():
+    index = CharNgramIndex(CORPUS, matcher_cache_size=2)
+    expected = CharNgramIndex(CORPUS).search(QUERIES, top_k=None, threshold=0.3)
+
+    result = pickle.loads(pickle.dumps(index)).search(QUERIES, top_k=None, threshold=0.3)
+    index.search(QUERIES, top_k=None, threshold=0.3)
+
+    for result_part, expected_part in zip(result, expected):
+        np.testing.assert_array_equal(result_part, expected_part)
+    assert index._matcher_for.cache_info().currsize == 2
+
+
+@pytest.mark.parametrize('top_k, threshold, rerank', [(None, 0.5, True), (3, 0.3, True), (2, 0.1, False)])
+def test_parallel_search_matches_serial_search(top_k, threshold, rerank):
+    index = CharNgramIndex(CORPUS * 3)
+    queries = QUERIES * 5
+
+    serial = index.search(queries, top_k=top_k, threshold=threshold, rerank=rerank)
+    parallel = parallel_search(index, queries, 2, top_k=top_k, threshold=threshold, rerank=rerank)
+
+    for parallel_part, serial_part in zip(parallel, serial):
+        np.testing.assert_array_equal(parallel_part, serial_part)
+
+
+def test_parallel_search_without_queries():
+    query_pos, doc_ids, scores = parallel_search(CharNgramIndex(CORPUS), [], 2)
+    assert len(query_pos) == len(doc_ids) == len(scores) == 0
+
+
+def test_blocks_restrict_candidates_and_wildcard_sees_all():
+    blocks = np.array([1, 2, 1, 3, WILDCARD_BLOCK, 2])
+    index = CharNgramIndex(CORPUS, blocks=blocks)
+    queries = ['servicios de consultoria', 'servicios de consultoria', 'servicios de consultoria']
+    query_blocks = [2, 1, WILDCARD_BLOCK]
+
+    for top_k in (None, 10):
+        query_pos, doc_ids, _ = index.search(queries, top_k=top_k, threshold=0.3, rerank=True,
+                                             query_blocks=query_blocks)
+        found = {query: set(doc_ids[query_pos == query].tolist()) for query in range(3)}
+
+        assert found[0] <= {1, 4, 5}
+        assert 4 in found[0]
+        assert found[1] <= {0, 2, 4}
+        assert found[2] == {doc for _, doc, _ in scalar_search(queries[:1], CORPUS, 0.3)}